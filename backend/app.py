@@ -10,19 +10,32 @@ app.py - Flask应用程序的入口文件
 - 可以根据需要创建不同配置的应用实例
 """
 
+import os
 from flask import Flask  # Flask是Web框架,用于创建Web应用
-from config import Config  # 导入配置文件,包含数据库URL等设置
-from extensions import db, jwt,jwt_blacklist, migrate  # 导入需要的Flask扩展
+from config import get_config  # 导入配置文件,包含数据库URL等设置
+from extensions import db, jwt,jwt_blacklist, idempotency, migrate, metrics, pool_monitor, rate_limiter, replica_router  # 导入需要的Flask扩展
 from routes import initialize_routes  # 导入API路由初始化函数
+from representations import output_json  # 快速JSON响应编码
+from seed import seed_command  # flask seed：批量生成测试数据
+from idempotency import purge_idempotency_keys_command  # flask purge-idempotency-keys：清理过期幂等键
+from modules.change.commands import apply_due_changes_command  # flask apply-due-changes：应用到期变动
+from modules.auth.passwords import password_hasher  # 密码哈希：有界线程池
+from modules.change.feed import change_feed, token_scope_allowed  # 待确认变动的事件推送（SSE）
 from flask_jwt_extended import JWTManager
 from flask_restful import Api
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+from routing import PRIMARY_UNTIL_HEADER
 
 
-def create_app():
+def create_app(config_object=None):
     """
     创建并配置Flask应用实例的工厂函数
     
+    参数:
+        config_object: 配置类，默认按环境变量 APP_ENV 选择（见 config.get_config）。
+                       测试或脚本可以传入 Config 的子类来切换数据库等配置。
+    
     工作流程：
     1. 创建Flask应用实例（相当于获取"营业执照"）
     2. 加载配置（设置应用的各种参数）
@@ -98,31 +111,58 @@ def create_app():
     
     # 从Config对象加载配置
     # 可以设置数据库URL、密钥等重要参数
-    app.config.from_object(Config)
+    app.config.from_object(config_object or get_config())
+
+    # 部署在反向代理之后时，按 X-Forwarded-For 取真实的客户端IP（限流按IP计数），只信任配置的代理层数
+    hops = app.config.get('TRUSTED_PROXY_HOPS', 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
         
     # 初始化各种Flask扩展
     # 这些扩展为应用添加额外功能：
     db.init_app(app)   # SQLAlchemy：数据库操作能力
+    replica_router.init_app(app, db)  # 读写分离：配置了从库时，只读接口读从库
     
-    # 初始化迁移
-    migrate.init_app(app, db)
+    # 初始化迁移（迁移脚本位于 backend/migrations，与启动时的工作目录无关）
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(__file__), 'migrations'))
 
     jwt.init_app(app)  # JWT：用户认证功能
+    password_hasher.init_app(app)  # 密码哈希：在有界线程池中计算，登录高峰不会占满所有 worker
+    jwt_blacklist.init_app(app, db)  # JWT黑名单：按配置选择存储后端
+    idempotency.init_app(app, db)  # 写接口的幂等键：重试的请求返回第一次的响应
     
-    CORS(app)  # 允许所有来源的跨域请求
+    CORS(app, expose_headers=[PRIMARY_UNTIL_HEADER])  # 允许所有来源的跨域请求，前端可以读到读主库的响应头（见 routing.py）
+
+    metrics.init_app(app)  # 请求耗时与SQL统计，GET /metrics 输出
+    rate_limiter.init_app(app, db)  # 令牌桶限流：超出配额的请求直接返回 429（在 metrics 之后注册，429 同样计入统计）
+    pool_monitor.init_app(app, db, metrics)  # 连接设置（SQLite PRAGMA、语句超时）与连接池监控
 
     # 在此处初始化 Api 对象，直接传入 app
     api = Api(app)
+    # 用更快的 JSON 编码器替换 flask_restful 默认的 JSON 表示（见 representations.py）
+    api.representation('application/json')(output_json)
     
     # 注册所有API路由
     # 设置所有的API端点（URLs）
     initialize_routes(api,app)
+    change_feed.init_app(app)  # 变动事件推送：每个进程一个推送线程，有订阅者时才启动
+
+    # 注册命令行命令：flask seed（见 seed.py）、flask apply-due-changes（见 modules/change/commands.py）、
+    # flask purge-idempotency-keys（见 idempotency.py）
+    app.cli.add_command(seed_command)
+    app.cli.add_command(apply_due_changes_command)
+    app.cli.add_command(purge_idempotency_keys_command)
     
     @jwt.token_in_blocklist_loader
     def check_if_token_in_blacklist(jwt_header, jwt_payload):
         jti = jwt_payload['jti']
         return jti in jwt_blacklist
 
+    @jwt.token_verification_loader
+    def check_token_scope(jwt_header, jwt_payload):
+        # 事件流令牌（放在 URL 中，见 modules/change/feed.py）只能用于事件流接口
+        return token_scope_allowed(jwt_payload)
+
     return app
 
 # 当直接运行此文件时（而不是作为模块导入时）
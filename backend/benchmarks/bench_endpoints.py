@@ -0,0 +1,307 @@
+"""
+接口基准测试
+
+在 datagen.py 生成的 SQLite 数据库上，通过 Flask 测试客户端逐个压测各个接口，
+对每个场景报告：
+- 延迟分位数 p50 / p95 / p99 和平均值（毫秒）
+- 每个请求执行的 SQL 条数
+- 单个请求的内存分配峰值（tracemalloc，单独多执行一次，不影响计时）
+
+同一 scale + seed 的数据只生成一次（缓存为模板文件），每次运行复制一份再测，
+写操作场景（确认/拒绝变动、添加员工等）不会污染下一次运行的数据。
+
+结果写成 JSON（--output），用 --compare 指定上一次的结果文件可以直接看到 p95 的变化。
+
+用法（在 backend 目录下执行）:
+    python benchmarks/bench_endpoints.py --scale small --iterations 200 --output results.json
+    python benchmarks/bench_endpoints.py --scale small --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import sqlalchemy  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+
+import datagen  # noqa: E402
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), '.data')
+
+# 批量确认场景每个请求处理的变动条数
+BATCH_SIZE = 50
+
+
+# ---------- 场景 ----------
+# 每个场景是一个函数 (ctx, i) -> (方法, URL, 请求参数)，i 为本场景内的请求序号。
+# ctx 保存登录令牌、待确认变动ID等运行时数据（见 BenchContext）。
+
+def login(ctx, i):
+    return 'POST', '/api/auth/login', {'json': {'username': f'{datagen.USER_PREFIX}1', 'password': datagen.USER_PASSWORD}}
+
+
+def companies(ctx, i):
+    return 'GET', '/api/companies', {}
+
+
+def company_projects(ctx, i):
+    return 'GET', f'/api/companies/{i % ctx.sizes["companies"] + 1}/projects', {}
+
+
+def active_employees(ctx, i):
+    return 'GET', '/api/active-employees?limit=200', {'headers': ctx.headers}
+
+
+def active_employees_with_total(ctx, i):
+    return 'GET', '/api/active-employees?limit=200&with_total=true', {'headers': ctx.headers}
+
+
+def active_employees_by_project(ctx, i):
+    return 'GET', f'/api/active-employees?project_id={i % ctx.sizes["projects"] + 1}', {'headers': ctx.headers}
+
+
+def search_employees(ctx, i):
+    # 轮流搜索 姓、姓+名、名（前缀、完全匹配和包含匹配都会出现）
+    surname, given = datagen.SURNAMES[i % len(datagen.SURNAMES)], datagen.GIVEN[i % len(datagen.GIVEN)]
+    query = (surname, surname + given, given)[i % 3]
+    return 'GET', '/api/employees/search', {'headers': ctx.headers, 'query_string': {'q': query}}
+
+
+def headcount(ctx, i):
+    return 'GET', '/api/stats/headcount', {'headers': ctx.headers}
+
+
+def pending_changes(ctx, i):
+    return 'GET', '/api/pending-changes?limit=200', {'headers': ctx.headers}
+
+
+def add_employee(ctx, i):
+    return 'POST', '/api/employees', {'headers': ctx.headers, 'json': {
+        'name': f'基准员工{i}', 'position': '施工员', 'efffective_date': '2024-01-01',
+    }}
+
+
+def transfer_employee(ctx, i):
+    return 'PUT', f'/api/pending-changes/{i % ctx.sizes["employees"] + 1}/transfer', {'headers': ctx.headers, 'json': {
+        'new_company': 1, 'new_project': 1, 'effective_date': '2024-06-01',
+    }}
+
+
+def approve_change(ctx, i):
+    return 'PUT', f'/api/pending-changes/{ctx.take_pending(1)[0]}/approve', {'headers': ctx.headers}
+
+
+def reject_change(ctx, i):
+    return 'PUT', f'/api/pending-changes/{ctx.take_pending(1)[0]}/reject', {'headers': ctx.headers}
+
+
+def batch_approve_changes(ctx, i):
+    return 'PUT', '/api/pending-changes/approve', {'headers': ctx.headers, 'json': {'ids': ctx.take_pending(BATCH_SIZE)}}
+
+
+SCENARIOS = {
+    'login': login,
+    'companies': companies,
+    'company_projects': company_projects,
+    'active_employees': active_employees,
+    'active_employees_with_total': active_employees_with_total,
+    'active_employees_by_project': active_employees_by_project,
+    'search_employees': search_employees,
+    'pending_changes': pending_changes,
+    'headcount': headcount,
+    'add_employee': add_employee,
+    'transfer_employee': transfer_employee,
+    'approve_change': approve_change,
+    'reject_change': reject_change,
+    'batch_approve_changes': batch_approve_changes,
+}
+
+
+class BenchContext:
+    """场景共享的运行时数据"""
+
+    def __init__(self, client, sizes):
+        from extensions import db
+        from modules.change import ChangeRequest
+
+        self.sizes = sizes
+        response = client.post('/api/auth/login', json={
+            'username': f'{datagen.USER_PREFIX}1', 'password': datagen.USER_PASSWORD,
+        })
+        self.headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+        # 确认/拒绝场景依次取用待确认的变动，每个变动只处理一次
+        self._pending = list(db.session.execute(
+            select(ChangeRequest.id).where(ChangeRequest.status == '待确认').order_by(ChangeRequest.id)
+        ).scalars())
+        db.session.remove()
+
+    def take_pending(self, count):
+        if len(self._pending) < count:
+            raise RuntimeError('待确认变动已用完，请减少 --iterations 或使用更大的 --scale')
+        taken, self._pending = self._pending[:count], self._pending[count:]
+        return taken
+
+
+# ---------- 测量 ----------
+
+def percentile(sorted_values, pct):
+    """最近秩法（nearest-rank）求百分位数"""
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(client, engine, ctx, scenario, iterations, warmup):
+    """执行一个场景：先预热，再计时 iterations 次，最后单独执行一次测量内存峰值"""
+    statements = [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    def send(i):
+        method, url, kwargs = scenario(ctx, i)
+        return client.open(url, method=method, **kwargs)
+
+    for i in range(warmup):
+        send(i)
+
+    timings = []
+    status_codes = {}
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    try:
+        for i in range(warmup, warmup + iterations):
+            started = time.perf_counter()
+            response = send(i)
+            timings.append((time.perf_counter() - started) * 1000)
+            status_codes[response.status_code] = status_codes.get(response.status_code, 0) + 1
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+
+    tracemalloc.start()
+    try:
+        send(warmup + iterations)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries_per_request': round(statements[0] / iterations, 2),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'status_codes': {str(code): count for code, count in sorted(status_codes.items())},
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(__file__), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_database(data_dir, scale, seed):
+    """返回本次运行使用的数据库文件：模板不存在时先生成，然后复制一份"""
+    os.makedirs(data_dir, exist_ok=True)
+    template = os.path.join(data_dir, f'bench_{scale}_{seed}.db')
+    if not os.path.exists(template):
+        print(f'生成 {scale} 规模的数据（seed={seed}）...')
+        datagen.build_database(template, scale, seed, verbose=True)
+    run_db = os.path.join(data_dir, 'run.db')
+    shutil.copyfile(template, run_db)
+    return run_db
+
+
+def run(scale='small', seed=42, iterations=100, warmup=5, scenarios=None, data_dir=DEFAULT_DATA_DIR):
+    """执行基准测试，返回可写成 JSON 的结果字典"""
+    from flask_migrate import upgrade
+    from app import create_app
+    from extensions import db
+
+    db_path = prepare_database(data_dir, scale, seed)
+    app = create_app(datagen.bench_config(db_path))
+    names = scenarios or list(SCENARIOS)
+    # 模板可能是在较早的代码版本上生成的，先把副本迁移到最新的表结构
+    with app.app_context():
+        upgrade()
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'scale': scale,
+            'sizes': datagen.SCALES[scale],
+            'seed': seed,
+            'iterations': iterations,
+            'warmup': warmup,
+        },
+        'scenarios': {},
+    }
+    with app.app_context():
+        client = app.test_client()
+        ctx = BenchContext(client, datagen.SCALES[scale])
+        for name in names:
+            results['scenarios'][name] = run_scenario(client, db.engine, ctx, SCENARIOS[name], iterations, warmup)
+        db.session.remove()
+        db.engine.dispose()
+    return results
+
+
+def print_results(results, baseline=None):
+    header = f"{'scenario':<30}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'peak KB':>10}"
+    if baseline:
+        header += f"{'p95 vs base':>13}"
+    print(header)
+    for name, r in results['scenarios'].items():
+        line = (f"{name:<30}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+                f"{r['queries_per_request']:>9}{r['peak_memory_kb']:>10}")
+        base = (baseline or {}).get('scenarios', {}).get(name)
+        if base and base['p95_ms']:
+            line += f"{(r['p95_ms'] - base['p95_ms']) / base['p95_ms']:>+13.0%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='接口基准测试')
+    parser.add_argument('--scale', choices=datagen.SCALES, default='small', help='数据规模')
+    parser.add_argument('--seed', type=int, default=42, help='数据生成的随机种子')
+    parser.add_argument('--iterations', type=int, default=100, help='每个场景计时的请求数')
+    parser.add_argument('--warmup', type=int, default=5, help='每个场景预热的请求数')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='只运行指定场景（可重复）')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='数据库模板的缓存目录')
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    parser.add_argument('--compare', help='与之前的结果 JSON 文件对比')
+    args = parser.parse_args()
+
+    results = run(args.scale, args.seed, args.iterations, args.warmup, args.scenario, args.data_dir)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
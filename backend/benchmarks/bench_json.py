@@ -0,0 +1,107 @@
+"""
+JSON 响应编码基准测试
+
+对比三种编码方式在大名单上的编码耗时和响应体积：
+- restful_default: flask_restful 默认方式（标准库 json，中文转义为 \\uXXXX）
+- stdlib_utf8: 标准库 json，ensure_ascii=False
+- fast: representations.dumps（有 orjson 时用 orjson，否则退回 stdlib_utf8）
+
+数据模拟 EmployeeSchema 序列化后的在岗名单（中文姓名、公司、项目名）。
+
+用法（在 backend 目录下执行）:
+    python benchmarks/bench_json.py --rows 50000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import representations  # noqa: E402
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何林罗高'
+GIVEN = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华建国志'
+POSITIONS = ['项目经理', '施工员', '安全员', '质检员', '资料员', '造价员', '技术负责人']
+
+
+def make_roster(rows, seed=42):
+    """生成与 /api/active-employees 响应结构相同的员工名单"""
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    employees = []
+    for i in range(1, rows + 1):
+        company_id = rng.randint(1, 50)
+        project_id = rng.randint(1, 2000)
+        employees.append({
+            'id': i,
+            'name': rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN) for _ in range(rng.randint(1, 2))),
+            'position': rng.choice(POSITIONS),
+            'efffective_date': (start + timedelta(days=rng.randint(0, 1800))).isoformat(),
+            'status': rng.choice(['在岗', '待岗']),
+            'company_id': company_id,
+            'company_name': f'第{company_id}工程分公司',
+            'project_id': project_id,
+            'project_name': f'珠海横琴第{project_id}号综合体项目',
+            'creator_id': 1,
+        })
+    return {'employees': employees, 'next_cursor': None}
+
+
+ENCODERS = {
+    'restful_default': lambda data: (json.dumps(data) + '\n').encode('utf-8'),
+    'stdlib_utf8': lambda data: json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+    'fast': representations.dumps,
+}
+
+
+def run(rows, repeat):
+    payload = make_roster(rows)
+    results = {
+        'rows': rows,
+        'repeat': repeat,
+        'fast_backend': 'orjson' if representations.orjson is not None else 'stdlib',
+        'encoders': {},
+    }
+    for name, encode in ENCODERS.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = encode(payload)
+            timings.append((time.perf_counter() - started) * 1000)
+        results['encoders'][name] = {
+            'median_ms': round(statistics.median(timings), 2),
+            'min_ms': round(min(timings), 2),
+            'bytes': len(body),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON 响应编码基准测试')
+    parser.add_argument('--rows', type=int, default=50000, help='员工条数')
+    parser.add_argument('--repeat', type=int, default=5, help='每种编码器重复次数')
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    baseline = results['encoders']['restful_default']
+    print(f"{args.rows} 名员工，fast 编码器使用 {results['fast_backend']}")
+    print(f"{'encoder':<18}{'median ms':>12}{'min ms':>10}{'bytes':>14}{'speedup':>10}{'size':>8}")
+    for name, r in results['encoders'].items():
+        speedup = baseline['median_ms'] / r['median_ms'] if r['median_ms'] else float('inf')
+        size = r['bytes'] / baseline['bytes']
+        print(f"{name:<18}{r['median_ms']:>12}{r['min_ms']:>10}{r['bytes']:>14}{speedup:>9.1f}x{size:>7.0%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+登录基准测试
+
+比较不同密码哈希方法和代价（PASSWORD_HASH_METHOD）下的登录吞吐量和延迟：
+对每个方法新建一个空的 SQLite 数据库（执行迁移），注册一个用户，
+再由 --concurrency 个线程并发发送共 --requests 个登录请求，报告：
+- 吞吐量（每秒登录次数）
+- 延迟分位数 p50 / p95（毫秒）
+- 各状态码的次数（哈希线程池已满时登录返回 503）
+
+并发线程数大于 --workers（PASSWORD_HASH_WORKERS）时，多出的请求在哈希线程池中排队，
+可以看到调高代价后登录高峰的排队延迟，以及 PASSWORD_HASH_MAX_PENDING 的拒绝效果。
+
+用法（在 backend 目录下执行）:
+    python benchmarks/bench_login.py --requests 200 --concurrency 8 --workers 2
+    python benchmarks/bench_login.py --method scrypt:32768:8:1 --method pbkdf2:sha256:600000 --output login.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import datagen  # noqa: E402
+from bench_endpoints import DEFAULT_DATA_DIR, _git_commit, percentile  # noqa: E402
+
+DEFAULT_METHODS = ['pbkdf2:sha256:100000', 'pbkdf2:sha256:600000', 'scrypt:16384:8:1', 'scrypt:32768:8:1']
+USERNAME = 'bench_login'
+PASSWORD = datagen.USER_PASSWORD
+
+
+def login_config(db_path, method, workers, max_pending):
+    """基准测试配置，换成指定的哈希方法和线程池大小"""
+
+    class LoginConfig(datagen.bench_config(db_path)):
+        PASSWORD_HASH_METHOD = method
+        PASSWORD_HASH_WORKERS = workers
+        PASSWORD_HASH_MAX_PENDING = max_pending
+
+    return LoginConfig
+
+
+def run_method(app, requests, concurrency):
+    """注册用户后由 concurrency 个线程并发登录，共 requests 次"""
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={'username': USERNAME, 'password': PASSWORD})
+    if response.status_code != 201:
+        raise RuntimeError(f'注册失败: {response.status_code} {response.get_json()}')
+
+    timings = []
+    status_codes = {}
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker():
+        thread_client = app.test_client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started = time.perf_counter()
+            response = thread_client.post('/api/auth/login', json={'username': USERNAME, 'password': PASSWORD})
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                timings.append(elapsed)
+                status_codes[response.status_code] = status_codes.get(response.status_code, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        'logins_per_second': round(status_codes.get(200, 0) / wall, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'status_codes': {str(code): count for code, count in sorted(status_codes.items())},
+    }
+
+
+def run(methods=None, requests=100, concurrency=4, workers=2, max_pending=32, data_dir=DEFAULT_DATA_DIR):
+    """执行基准测试，返回可写成 JSON 的结果字典"""
+    from flask_migrate import upgrade
+    from app import create_app
+    from extensions import db
+
+    methods = methods or DEFAULT_METHODS
+    os.makedirs(data_dir, exist_ok=True)
+    db_path = os.path.join(data_dir, 'login.db')
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'requests': requests,
+            'concurrency': concurrency,
+            'workers': workers,
+            'max_pending': max_pending,
+        },
+        'methods': {},
+    }
+    for method in methods:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        app = create_app(login_config(db_path, method, workers, max_pending))
+        with app.app_context():
+            upgrade()
+            results['methods'][method] = run_method(app, requests, concurrency)
+            db.session.remove()
+            db.engine.dispose()
+    return results
+
+
+def print_results(results):
+    print(f"{'method':<26}{'logins/s':>10}{'p50 ms':>10}{'p95 ms':>10}  status")
+    for method, r in results['methods'].items():
+        codes = ' '.join(f'{code}x{count}' for code, count in r['status_codes'].items())
+        print(f"{method:<26}{r['logins_per_second']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}  {codes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='登录基准测试')
+    parser.add_argument('--method', action='append', help=f'哈希方法（可重复），默认 {" ".join(DEFAULT_METHODS)}')
+    parser.add_argument('--requests', type=int, default=100, help='每个方法的登录请求数')
+    parser.add_argument('--concurrency', type=int, default=4, help='并发发送请求的线程数')
+    parser.add_argument('--workers', type=int, default=2, help='PASSWORD_HASH_WORKERS')
+    parser.add_argument('--max-pending', type=int, default=32, help='PASSWORD_HASH_MAX_PENDING')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='临时数据库所在目录')
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    results = run(args.method, args.requests, args.concurrency, args.workers, args.max_pending, args.data_dir)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+基准测试数据生成器
+
+生成指定规模的 SQLite 数据库：公司、项目、用户、员工和变动历史。
+表结构通过迁移脚本（flask_migrate.upgrade）创建，与生产库的索引一致；
+数据由 seed.py（flask seed 命令的实现）生成并批量插入。
+
+同样的 scale 和 seed 总是生成同样的数据，不同时间的基准测试结果可以直接对比。
+
+用法（在 backend 目录下执行）:
+    python benchmarks/datagen.py --db /tmp/bench.db --scale large --seed 42
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import seed  # noqa: E402
+from config import BenchConfig  # noqa: E402
+
+# 预设规模、生成用户的用户名和密码、姓名用字，见 seed.py
+SCALES = seed.SCALES
+USER_PREFIX = seed.USER_PREFIX
+USER_PASSWORD = seed.USER_PASSWORD
+# 生成姓名用的姓和名（姓名搜索场景的关键词）
+SURNAMES = seed.SURNAMES
+GIVEN = seed.GIVEN
+
+
+def bench_config(db_path):
+    """基准测试使用的配置：bench 环境配置（WAL 等），数据库换成指定的 SQLite 文件"""
+
+    class BenchFileConfig(BenchConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.abspath(db_path)}'
+
+    return BenchFileConfig
+
+
+def build_database(db_path, scale='large', seed_value=42, verbose=False):
+    """
+    重新生成基准测试数据库：删除旧文件，执行迁移建表，再插入数据
+
+    返回 {表名: 行数}。
+    """
+    from flask_migrate import upgrade
+    from app import create_app
+    from extensions import db
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    app = create_app(bench_config(db_path))
+
+    def report(name, count, seconds):
+        print(f'{name:<16}{count:>10} 行 {seconds:>8.2f} 秒')
+
+    with app.app_context():
+        upgrade()
+        counts = seed.seed_database(db, SCALES[scale], seed_value, report=report if verbose else None)
+        db.engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成基准测试数据库')
+    parser.add_argument('--db', required=True, help='SQLite 数据库文件路径（已存在时会被覆盖）')
+    parser.add_argument('--scale', choices=SCALES, default='large', help='数据规模')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = build_database(args.db, args.scale, args.seed, verbose=True)
+    print(f'共 {sum(counts.values())} 行，耗时 {time.perf_counter() - started:.2f} 秒')
+
+
+if __name__ == '__main__':
+    main()
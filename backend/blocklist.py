@@ -0,0 +1,240 @@
+"""
+blocklist.py - JWT 黑名单（已登出令牌）存储
+
+原来的黑名单是进程内的 set()：
+- 多进程部署时，在 A 进程登出的令牌在 B 进程仍然有效
+- 条目永不过期，集合无限增长
+
+现在拆成两层：
+1. 后端存储（backend）：保存所有被吊销的令牌，所有进程共享
+   - MemoryBlocklistBackend: 进程内存储，仅适合单进程开发和测试
+   - DatabaseBlocklistBackend: revoked_token 表，多进程共享
+2. 本地缓存（TokenBlocklist）：每个进程在内存中维护 {jti: 过期时间}
+   - 每次请求的检查只是一次字典查找，O(1)，不访问数据库
+   - 距上次同步超过 JWT_BLOCKLIST_SYNC_INTERVAL 秒时，从后端拉取新增的吊销记录，
+     因此其他进程的登出最多延迟一个同步间隔生效
+   - 条目在令牌自身的 exp 之后自动清除（令牌过期后本来就会被拒绝）
+
+同步在检查令牌的认证钩子中执行，但使用独立的数据库连接（不是请求的会话）：
+不会提交或回滚请求的会话中已有的修改。同一进程同一时间只有一个线程同步，其他线程直接用本地缓存。
+
+增量同步的游标是数据库分配的自增 id，而不是各进程的时钟：
+id 按分配顺序递增，但并发事务的提交顺序可能不同（后分配的先提交），
+被跳过的 id 在 GAP_TIMEOUT_SECONDS 内继续查询，回滚留下的空洞到期后放弃（与 modules/change/feed.py 相同）。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.pool import StaticPool
+
+# 被跳过的 id（可能是尚未提交的事务）继续查询的时间（秒）
+GAP_TIMEOUT_SECONDS = 30
+# 一次跳过的 id 超过这个数量时不再逐个跟踪（通常是数据库重启后自增值跳跃）
+MAX_TRACKED_GAP = 100
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _to_timestamp(value):
+    """datetime（UTC，无时区）转为 Unix 时间戳；None 表示永不过期"""
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _to_datetime(timestamp):
+    """Unix 时间戳转为 datetime（UTC，无时区）；None 表示永不过期"""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+class MemoryBlocklistBackend:
+    """进程内后端：只在当前进程可见，适合单进程开发和测试"""
+
+    def __init__(self):
+        self._entries = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._entries[jti] = (expires_at, self._next_id)
+            self._next_id += 1
+
+    def fetch_after(self, after_id, extra_ids=()):
+        with self._lock:
+            rows = [(row_id, jti, exp) for jti, (exp, row_id) in self._entries.items()
+                    if row_id > after_id or row_id in extra_ids]
+            return sorted(rows), self._next_id - 1
+
+    def purge(self, now):
+        with self._lock:
+            expired = [jti for jti, (exp, _) in self._entries.items() if exp is not None and exp <= now]
+            for jti in expired:
+                del self._entries[jti]
+
+
+class DatabaseBlocklistBackend:
+    """数据库后端：吊销记录写入 revoked_token 表，所有进程共享"""
+
+    def __init__(self, db):
+        from modules.auth.models import RevokedToken
+        self._db = db
+        self._table = RevokedToken.__table__
+
+    def add(self, jti, expires_at):
+        self._db.session.execute(insert(self._table).values(
+            jti=jti, expires_at=_to_datetime(expires_at), created_at=_utcnow()
+        ))
+        self._db.session.commit()
+
+    @contextmanager
+    def _connection(self):
+        """
+        独立于请求会话的连接（主库），with 块结束时提交
+
+        内存 SQLite（测试）只有一个所有会话共用的连接（StaticPool），独立的连接提交或回滚会影响会话中的事务，
+        此时借用会话的连接执行、不提交。
+        """
+        engine = self._db.engine
+        if isinstance(engine.pool, StaticPool):
+            yield self._db.session.connection(bind_arguments={'bind': engine})
+            return
+        with engine.begin() as conn:
+            yield conn
+
+    def fetch_after(self, after_id, extra_ids=()):
+        """
+        读取 id > after_id 以及 extra_ids 中未过期的吊销记录，返回 ([(id, jti, 过期时间戳)], 当前最大 id)
+
+        在独立的连接上执行（主库），不影响请求的会话。
+        """
+        table = self._table
+        condition = table.c.id > after_id
+        if extra_ids:
+            condition = or_(condition, table.c.id.in_(extra_ids))
+        with self._connection() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.jti, table.c.expires_at)
+                .where(condition)
+                .where(or_(table.c.expires_at.is_(None), table.c.expires_at > _utcnow()))
+                .order_by(table.c.id)
+            ).all()
+            max_id = conn.execute(select(func.max(table.c.id))).scalar() or 0
+        return [(row_id, jti, _to_timestamp(expires_at)) for row_id, jti, expires_at in rows], max_id
+
+    def purge(self, now):
+        """删除已过期的吊销记录，在独立的连接和事务中执行"""
+        table = self._table
+        with self._connection() as conn:
+            conn.execute(delete(table).where(table.c.expires_at <= _to_datetime(now)))
+
+
+class TokenBlocklist:
+    """
+    带本地缓存的 JWT 黑名单
+
+    用法与原来的 set 保持一致：
+    - jwt_blacklist.add(jti, exp)  登出时吊销令牌（exp 为令牌的过期时间戳）
+    - jti in jwt_blacklist         每次请求检查令牌是否已被吊销
+    """
+
+    def __init__(self):
+        self._backend = MemoryBlocklistBackend()
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_id = 0
+        self._gaps = {}  # 被跳过的 id -> 发现时间
+        self._sync_interval = 5
+        self._purge_interval = 3600
+        self._last_sync = time.time()
+        self._last_purge = time.time()
+
+    def init_app(self, app, db):
+        """
+        根据配置选择后端：
+        - JWT_BLOCKLIST_BACKEND: 'database'（默认）或 'memory'
+        - JWT_BLOCKLIST_SYNC_INTERVAL: 从后端同步的间隔（秒），即跨进程生效的最大延迟
+        - JWT_BLOCKLIST_PURGE_INTERVAL: 清理后端过期记录的间隔（秒）
+        """
+        backend = app.config.get('JWT_BLOCKLIST_BACKEND', 'database')
+        if backend == 'database':
+            self._backend = DatabaseBlocklistBackend(db)
+        elif backend == 'memory':
+            self._backend = MemoryBlocklistBackend()
+        else:
+            raise ValueError(f'未知的JWT黑名单后端 (Unknown JWT blocklist backend): {backend}')
+        self._sync_interval = app.config.get('JWT_BLOCKLIST_SYNC_INTERVAL', 5)
+        self._purge_interval = app.config.get('JWT_BLOCKLIST_PURGE_INTERVAL', 3600)
+        with self._lock:
+            self._cache.clear()
+        self._last_id = 0
+        self._gaps = {}
+        self._last_sync = 0
+        self._last_purge = time.time()
+
+    def add(self, jti, expires_at=None):
+        """吊销令牌：写入后端，并立即加入本进程缓存"""
+        self._backend.add(jti, expires_at)
+        with self._lock:
+            self._cache[jti] = expires_at
+
+    def __contains__(self, jti):
+        now = time.time()
+        if now - self._last_sync >= self._sync_interval:
+            self.sync(now)
+        expires_at = self._cache.get(jti, False)
+        if expires_at is False:
+            return False
+        return expires_at is None or expires_at > now
+
+    def __len__(self):
+        return len(self._cache)
+
+    def sync(self, now=None):
+        """
+        从后端拉取增量吊销记录，并清理本地缓存中已过期的条目
+
+        其他线程正在同步时直接返回（本次检查使用本地缓存）。
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._sync(now if now is not None else time.time())
+        finally:
+            self._sync_lock.release()
+
+    def _sync(self, now):
+        self._last_sync = now
+        seen = time.monotonic()
+        self._gaps = {row_id: at for row_id, at in self._gaps.items() if seen - at < GAP_TIMEOUT_SECONDS}
+        rows, max_id = self._backend.fetch_after(self._last_id, sorted(self._gaps))
+        if max_id < self._last_id:
+            # 自增值回退（记录被清空后数据库重启），从头同步；重复的记录被字典去重
+            self._last_id = 0
+            self._gaps = {}
+            rows, max_id = self._backend.fetch_after(0)
+        for row_id, _, _ in rows:
+            self._gaps.pop(row_id, None)
+            if row_id > self._last_id:
+                if row_id - self._last_id <= MAX_TRACKED_GAP:
+                    self._gaps.update((skipped, seen) for skipped in range(self._last_id + 1, row_id))
+                self._last_id = row_id
+
+        with self._lock:
+            self._cache.update((jti, exp) for _, jti, exp in rows)
+            expired = [jti for jti, exp in self._cache.items() if exp is not None and exp <= now]
+            for jti in expired:
+                del self._cache[jti]
+
+        if now - self._last_purge >= self._purge_interval:
+            self._last_purge = now
+            self._backend.purge(now)
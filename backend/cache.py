@@ -0,0 +1,153 @@
+"""
+cache.py - 进程内版本号缓存
+
+用于"读多写少"的数据（如公司、项目目录）：
+- 每个缓存对象维护一个版本号（version）
+- 读取时若缓存条目的版本号与当前版本一致，直接返回，不访问数据库
+- 相关数据写入并提交成功后，版本号 +1，所有旧条目随之失效
+
+失效时机由 SQLAlchemy 会话事件驱动：
+- after_flush: 记录本次事务是否写过被关注的模型（ORM 对象）
+- do_orm_execute: 记录本次事务是否通过 session.execute 对被关注模型的表执行过 INSERT/UPDATE/DELETE
+  （如变动审批的集合式 UPDATE、批量导入的 executemany）
+- after_commit: 事务提交成功后才让缓存失效（回滚则不失效）
+
+注意：缓存只在当前进程内有效，多进程部署时其他进程的写入无法通知到本进程，
+因此可以额外设置 ttl，让条目在一段时间后强制过期。
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# session.info 中记录"提交后需要失效的缓存"的键
+_PENDING_KEY = '_versioned_cache_pending'
+
+# 已注册的 (缓存, 模型类元组) 列表，由会话事件统一检查
+_watched = []
+
+
+class VersionedCache:
+    """
+    带版本号的进程内缓存
+
+    参数:
+    - name: 缓存名称（用于调试和监控）
+    - ttl: 条目最长存活秒数，None 表示只靠版本号失效
+    """
+
+    def __init__(self, name, ttl=None):
+        self.name = name
+        self.ttl = ttl
+        self.version = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """
+        读取缓存条目；未命中（或已失效）时调用 loader() 加载并写入缓存
+
+        加载期间如果版本号发生变化（有并发写入），加载结果只返回给本次调用，
+        不写入缓存，避免把旧数据缓存到新版本下。
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, loaded_at, value = entry
+                if version == self.version and (self.ttl is None or now - loaded_at < self.ttl):
+                    return value
+            version = self.version
+
+        value = loader()
+
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = (version, now, value)
+        return value
+
+    def invalidate(self):
+        """版本号 +1，并清空所有条目"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+
+def invalidate_on_commit(cache, *models):
+    """
+    当事务中写入（新增/修改/删除）了 models 中任一模型的数据，并且事务提交成功后，使 cache 失效
+
+    能感知 ORM 对象的写入和通过会话执行的 INSERT/UPDATE/DELETE 语句；
+    绕过会话直接用连接写入时（如 flask seed），请调用 mark_stale(session, cache) 或 cache.invalidate()。
+    """
+    _watched.append((cache, tuple(models)))
+
+
+def mark_stale(session, cache):
+    """手动标记：当前事务提交成功后使 cache 失效"""
+    session.info.setdefault(_PENDING_KEY, set()).add(cache)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_stale_caches(session, flush_context):
+    if not _watched:
+        return
+    touched = list(session.new) + list(session.dirty) + list(session.deleted)
+    for cache, models in _watched:
+        if any(isinstance(obj, models) for obj in touched):
+            mark_stale(session, cache)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_stale_caches_from_statements(orm_execute_state):
+    if not _watched or not (orm_execute_state.is_insert or orm_execute_state.is_update
+                            or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    name = getattr(table, 'name', None)
+    for cache, models in _watched:
+        if any(model.__table__.name == name for model in models):
+            mark_stale(orm_execute_state.session, cache)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_stale_caches(session):
+    for cache in session.info.pop(_PENDING_KEY, ()):
+        cache.invalidate()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_stale_caches(session, previous_transaction):
+    # 只有最外层事务回滚时才丢弃标记；SAVEPOINT 回滚不影响外层事务已经写入的数据
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def compute_etag(payload):
+    """根据响应内容计算强 ETag（内容相同则 ETag 相同，与进程无关）"""
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+
+def conditional_response(payload, etag, max_age):
+    """
+    生成带缓存校验头的响应
+
+    - 请求头 If-None-Match 与 etag 匹配时返回 304，不带响应体
+    - 否则返回 (payload, 200, headers)，交给 flask_restful 序列化
+
+    Cache-Control 的 max-age 让浏览器在有效期内直接复用本地副本，
+    过期后再携带 If-None-Match 回来校验。
+    """
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'public, max-age={max_age}',
+    }
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    return payload, 200, headers
@@ -1,6 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from blocklist import TokenBlocklist
+from idempotency import IdempotencyStore
+from metrics import RequestMetrics
+from pooling import PoolMonitor
+from ratelimit import RateLimiter
+from routing import ReplicaRouter, RoutingSession
 migrate = Migrate()
 # 初始化SQLAlchemy对象
 """
@@ -13,7 +19,8 @@ SQLAlchemy 是一个ORM（对象关系映射）库：
 - 我们用Python的语言告诉它要做什么
 - 它帮我们翻译成数据库能理解的语言
 """
-db = SQLAlchemy()
+# 会话按读写路由：配置了从库时，只读接口读从库（见 routing.py）
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # 初始化Flask-RESTful API对象
 """
@@ -40,4 +47,21 @@ Flask-JWT-Extended 是一个扩展，用于处理JWT认证：
 - 它帮我们检查每个人的通行证
 """
 jwt = JWTManager()
-jwt_blacklist = set()
\ No newline at end of file
+
+# JWT黑名单：多进程共享、按令牌过期时间自动清除，详见 blocklist.py
+jwt_blacklist = TokenBlocklist()
+
+# 请求耗时与SQL统计，GET /metrics 输出，详见 metrics.py
+metrics = RequestMetrics()
+
+# 读写分离：注册从库绑定和读己之写的请求钩子，详见 routing.py
+replica_router = ReplicaRouter()
+
+# 连接设置与连接池监控（取连接等待时间、饱和度），详见 pooling.py
+pool_monitor = PoolMonitor()
+
+# 写接口的幂等键（Idempotency-Key 请求头），详见 idempotency.py
+idempotency = IdempotencyStore()
+
+# 按路由、按用户/IP 的令牌桶限流，详见 ratelimit.py
+rate_limiter = RateLimiter()
@@ -0,0 +1,223 @@
+"""
+idempotency.py - 写接口的幂等键（Idempotency-Key 请求头）
+
+移动端在网络不好时会重试 POST /api/employees、PUT /api/pending-changes/<id>/transfer|resign，
+每次重试都完整执行一遍写入，产生重复的员工或变动申请，只能人工清理。
+
+现在客户端为每个操作生成一个唯一的键（例如 UUID），重试时带上同一个键：
+- 第一次请求先在 idempotency_record 表中取得 (用户, 键)，执行完成后保存响应（状态码和响应体）
+- 之后用同一个键的请求直接返回保存的响应（带 Idempotent-Replayed: true 响应头），不访问业务表
+- 第一次请求还在处理中时，并发的重复请求返回 409（Retry-After: 1），稍后重试即可拿到保存的响应
+- 同一个键用于不同的请求（方法、路径或请求体不同）时返回 422
+- 5xx 响应和异常不保存（业务事务没有提交），释放这个键，重试时重新执行
+- 记录保留 IDEMPOTENCY_TTL_HOURS 小时，过期的记录每 IDEMPOTENCY_PURGE_INTERVAL 秒用一条 DELETE 批量清理，
+  也可以由 cron 执行 flask purge-idempotency-keys
+
+不带 Idempotency-Key 的请求行为不变。
+
+处理中的进程退出时，记录停留在"处理中"，IDEMPOTENCY_LOCK_TIMEOUT 秒后同一个键可以被接管重新执行。
+如果业务事务已经提交、保存响应之前进程退出，超时后的重试会再执行一次，这是保留的窗口。
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+import click
+from flask import Response, current_app, request
+from flask.cli import with_appcontext
+from flask_jwt_extended import get_jwt_identity
+from flask_restful.utils import unpack
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from representations import dumps
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+# 返回保存的响应时带上的响应头
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# 取得键的最大尝试次数（记录同时被清理或接管时重试）
+CLAIM_ATTEMPTS = 3
+
+
+def _utcnow():
+    # 精确到秒：MySQL 的 DATETIME 不保存微秒，保存完响应时按 created_at 核对仍是自己取得的记录
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def request_fingerprint():
+    """请求的摘要：方法、路径（含查询参数）和请求体"""
+    digest = hashlib.sha256()
+    for part in (request.method.encode('ascii'), request.full_path.encode('utf-8'), request.get_data()):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """幂等键的存储：idempotency_record 表，所有进程共享"""
+
+    def __init__(self):
+        self._db = None
+        self._table = None
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+        self.ttl = timedelta(hours=24)
+        self.lock_timeout = timedelta(seconds=60)
+        self.purge_interval = 3600
+
+    def init_app(self, app, db):
+        """
+        读取配置：
+        - IDEMPOTENCY_TTL_HOURS: 保存的响应保留时间（小时）
+        - IDEMPOTENCY_LOCK_TIMEOUT: 处理中的记录多久之后可以被接管（秒）
+        - IDEMPOTENCY_PURGE_INTERVAL: 批量清理过期记录的间隔（秒）
+        """
+        from modules.auth.models import IdempotencyRecord
+        self._db = db
+        self._table = IdempotencyRecord.__table__
+        self.ttl = timedelta(hours=app.config.get('IDEMPOTENCY_TTL_HOURS', 24))
+        self.lock_timeout = timedelta(seconds=app.config.get('IDEMPOTENCY_LOCK_TIMEOUT', 60))
+        self.purge_interval = app.config.get('IDEMPOTENCY_PURGE_INTERVAL', 3600)
+        self._last_purge = time.time()
+        app.extensions['idempotency'] = self
+
+    def _record(self, user_id, key):
+        return and_(self._table.c.user_id == user_id, self._table.c.key == key)
+
+    def claim(self, user_id, key, fingerprint):
+        """
+        为本次请求取得键，在独立的短事务中提交，返回 (claimed_at, existing)：
+        - 取得了键：claimed_at 为取得时间，existing 为 None，由本请求执行并保存响应
+        - 键已被使用：claimed_at 为 None，existing 为已有记录的 (fingerprint, response_status, response_body)，
+          response_status 为 None 表示第一次请求仍在处理中
+
+        已过期、或处理中超过 lock_timeout 的记录直接接管。
+        """
+        session = self._db.session
+        table = self._table
+        for _ in range(CLAIM_ATTEMPTS):
+            now = _utcnow()
+            values = {'fingerprint': fingerprint, 'response_status': None, 'response_body': None,
+                      'created_at': now, 'expires_at': now + self.ttl}
+            try:
+                session.execute(insert(table).values(user_id=user_id, key=key, **values))
+                session.commit()
+                return now, None
+            except IntegrityError:
+                session.rollback()
+
+            stale = or_(table.c.expires_at <= now,
+                        and_(table.c.response_status.is_(None), table.c.created_at <= now - self.lock_timeout))
+            taken = session.execute(update(table).where(self._record(user_id, key), stale).values(**values)).rowcount
+            if taken:
+                session.commit()
+                return now, None
+            existing = session.execute(
+                select(table.c.fingerprint, table.c.response_status, table.c.response_body)
+                .where(self._record(user_id, key))
+            ).one_or_none()
+            session.commit()
+            if existing is not None:
+                return None, tuple(existing)
+        # 记录反复被并发清理或接管，按"处理中"返回，客户端稍后重试
+        return None, (fingerprint, None, None)
+
+    def complete(self, user_id, key, claimed_at, status, body):
+        """保存第一次请求的响应（处理函数已提交业务事务）"""
+        session = self._db.session
+        session.rollback()  # 处理函数没有提交的修改丢弃，与请求结束时一样
+        session.execute(
+            update(self._table)
+            .where(self._record(user_id, key), self._table.c.created_at == claimed_at)
+            .values(response_status=status, response_body=body)
+        )
+        session.commit()
+
+    def release(self, user_id, key, claimed_at):
+        """放弃取得的键（请求失败），同一个键重试时重新执行"""
+        session = self._db.session
+        session.rollback()
+        session.execute(
+            delete(self._table)
+            .where(self._record(user_id, key), self._table.c.created_at == claimed_at,
+                   self._table.c.response_status.is_(None))
+        )
+        session.commit()
+
+    def purge(self, now=None):
+        """用一条 DELETE 批量删除过期的记录（按 expires_at 索引），返回删除的行数"""
+        session = self._db.session
+        deleted = session.execute(delete(self._table).where(self._table.c.expires_at <= (now or _utcnow()))).rowcount
+        session.commit()
+        return deleted
+
+    def purge_if_due(self):
+        """距上次清理超过 purge_interval 时清理一次（本进程内同一时间只有一个请求执行）"""
+        now = time.time()
+        with self._lock:
+            if now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+        self.purge()
+
+
+def _replay(existing, fingerprint):
+    stored_fingerprint, status, body = existing
+    if stored_fingerprint != fingerprint:
+        return {'message': f'{IDEMPOTENCY_KEY_HEADER} 已用于其他请求 '
+                           f'({IDEMPOTENCY_KEY_HEADER} was already used for a different request)'}, 422
+    if status is None:
+        return {'message': f'相同 {IDEMPOTENCY_KEY_HEADER} 的请求正在处理中，请稍后重试 '
+                           f'(A request with this {IDEMPOTENCY_KEY_HEADER} is still in progress)'}, 409, \
+            {'Retry-After': '1'}
+    return json.loads(body), status, {REPLAYED_HEADER: 'true'}
+
+
+def idempotent(func):
+    """
+    资源方法装饰器：支持 Idempotency-Key 请求头
+
+    放在 @jwt_required() 之下，键按当前用户区分。只保存响应的状态码和 JSON 响应体。
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        store = current_app.extensions.get('idempotency')
+        if key is None or store is None:
+            return func(*args, **kwargs)
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            return {'message': f'{IDEMPOTENCY_KEY_HEADER} 的长度必须在 1 到 {MAX_KEY_LENGTH} 之间 '
+                               f'({IDEMPOTENCY_KEY_HEADER} must be 1-{MAX_KEY_LENGTH} characters)'}, 400
+
+        user_id = get_jwt_identity()
+        fingerprint = request_fingerprint()
+        claimed_at, existing = store.claim(user_id, key, fingerprint)
+        if existing is not None:
+            return _replay(existing, fingerprint)
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            store.release(user_id, key, claimed_at)
+            raise
+        data, status, _ = unpack(result)
+        if isinstance(data, Response) or status >= 500:
+            store.release(user_id, key, claimed_at)
+        else:
+            store.complete(user_id, key, claimed_at, status, dumps(data).decode('utf-8'))
+        store.purge_if_due()
+        return result
+    return wrapper
+
+
+@click.command('purge-idempotency-keys')
+@with_appcontext
+def purge_idempotency_keys_command():
+    """批量删除过期的幂等键"""
+    deleted = current_app.extensions['idempotency'].purge()
+    click.echo(f'已删除 {deleted} 个过期的幂等键')
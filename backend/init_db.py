@@ -1,54 +1,261 @@
+"""
+init_db.py - 初始化数据库，并导入公司和项目目录
+
+用法（在 backend 目录下执行）:
+    python init_db.py                        # 导入 data/initial_data.json
+    python init_db.py /path/to/org.json      # 导入HR系统导出的组织架构文件
+
+文件格式与 data/initial_data.json 相同：{"companies": [{"name": ..., "projects": [{"name": ...}]}]}
+
+导入是幂等的（可以反复执行）：
+- 按名称与库中已有的公司、项目比对，只插入新增的公司和项目
+- 项目所属公司发生变化时更新项目的 company_id
+- 文件中没有的公司和项目保持不变（不删除）
+- 所有插入和更新在同一个事务中完成，中途出错则全部回滚
+
+JSON 文件是流式解析的：每次只解码一个公司（连同其项目），
+几百MB的导出文件也只占用与单个公司大小相当的内存。
+
+迁移引入之前用 db.create_all() 建好的旧数据库，需要先执行一次 flask db stamp 0001_initial_schema，
+否则这里的 upgrade() 会从第一个迁移开始重新建表而失败。
+"""
+
 import json
 import os
-from app import create_app
-from modules.company import Company, Project
-from extensions import db
+import re
+import sys
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.engine.url import make_url
 from sqlalchemy_utils import database_exists, create_database
-from sqlalchemy.engine.url import URL, make_url
-from sqlalchemy import create_engine
 
-app = create_app()
+from extensions import db
+from modules.company import Company, Project
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(__file__), 'data', 'initial_data.json')
+
+# 流式读取时每次读入的字符数
+READ_SIZE = 64 * 1024
+
+# 每批写入的公司数（新公司先批量插入取回ID，再批量写入它们的项目）
+BATCH_SIZE = 500
+
+_SEPARATORS = re.compile(r'[\s,]*')
+# 定位数组时，字符串之外需要处理的结构字符，以及字符串之内的引号和转义符
+_STRUCTURE = re.compile(r'[{}\[\]",]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+def _find_array(fp, key, read_size):
+    """
+    读到顶层对象中 "key" 的值（数组）的 [ 为止，返回缓冲区中 [ 之后尚未处理的文本
+
+    按结构字符（括号、逗号、引号）扫描，记录嵌套深度和是否在字符串中：只有顶层对象的键名才与 key 比较，
+    字符串值或嵌套对象中相同的文本不会被误认为数组。缓冲区只保留正在读取的键名。
+    """
+    buf = ''
+    pos = 0              # 下一个待扫描的位置
+    depth = 0            # 当前的嵌套深度，顶层对象内为 1
+    in_string = False
+    root_object = False  # 文件的顶层是对象
+    expect_key = False   # 顶层对象中下一个字符串是键名
+    key_start = None     # 正在读取的顶层键名在 buf 中的开始位置
+    matched = False      # 上一个顶层键名等于 key，等待它的值
+
+    while True:
+        match = (_STRING_SPECIAL if in_string else _STRUCTURE).search(buf, pos)
+        # 转义符在缓冲区末尾时，被转义的字符还没有读入
+        if match is None or (match.group() == '\\' and match.end() >= len(buf)):
+            chunk = fp.read(read_size)
+            if not chunk:
+                raise ValueError(f'文件中没有找到 "{key}" 数组 (Array "{key}" not found)')
+            pos = match.start() if match is not None else len(buf)
+            keep = pos if key_start is None else key_start
+            buf = buf[keep:] + chunk
+            pos -= keep
+            key_start = key_start - keep if key_start is not None else None
+            continue
+
+        char = match.group()
+        pos = match.end()
+        if in_string:
+            if char == '\\':
+                pos += 1
+                continue
+            in_string = False
+            if key_start is not None:
+                matched = json.loads(buf[key_start:pos]) == key
+                key_start = None
+                expect_key = False
+            continue
+
+        if matched:
+            if char != '[':
+                raise ValueError(f'"{key}" 不是数组 (Value of "{key}" is not an array)')
+            return buf[pos:]
+        if char == '"':
+            in_string = True
+            if depth == 1 and expect_key:
+                key_start = match.start()
+        elif char in '{[':
+            if depth == 0 and char == '{':
+                root_object = expect_key = True
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                raise ValueError(f'文件中没有找到 "{key}" 数组 (Array "{key}" not found)')
+        elif depth == 1 and root_object:
+            expect_key = True
+
+
+def iter_json_array(fp, key, read_size=READ_SIZE):
+    """
+    流式读取 JSON 文件中顶层对象的 "key": [...] 数组的元素，逐个返回
+
+    不把整个文件读入内存：缓冲区只保留尚未解码的部分，内存占用与单个元素的大小相当。
+    元素跨越多次读取时，未解码部分的长度每翻一倍才重新尝试解码一次，
+    单个很大的元素总的解码工作量也与它的大小成正比，而不是每读一块就从元素开头重新解码。
+    """
+    decoder = json.JSONDecoder()
+    buf = _find_array(fp, key, read_size)
+    pos = 0
+    eof = False
+    retry_at = 0  # 未解码部分达到这个长度之前不重新尝试解码
+    while True:
+        pos = _SEPARATORS.match(buf, pos).end()
+        if pos < len(buf) and buf[pos] == ']':
+            return
+        if pos < len(buf) and (eof or len(buf) - pos >= retry_at):
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                retry_at = 2 * (len(buf) - pos)
+            else:
+                # 元素恰好在缓冲区末尾结束时，数字等可能被截断，需要再读一些确认
+                if end < len(buf) or eof:
+                    yield item
+                    pos = end
+                    retry_at = 0
+                    continue
+        elif pos >= len(buf) and eof:
+            raise ValueError(f'"{key}" 数组没有结束 (Unterminated array "{key}")')
+
+        chunk = fp.read(read_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def upsert_org(conn, companies):
+    """
+    把公司/项目树幂等地写入数据库，返回 {'companies_created', 'projects_created', 'projects_updated'}
+
+    参数:
+    - conn: 数据库连接（由调用方开启并提交事务）
+    - companies: 可迭代的公司字典，每个公司带 projects 列表
+
+    先一次性读出已有公司和项目的名称 -> ID 映射（内存占用取决于库中的公司、项目数，与文件大小无关），
+    再按批比对文件中的数据：
+    - 新公司批量插入后按名称取回ID
+    - 新项目批量插入，所属公司变化的项目批量更新
+    同名公司/项目在文件中出现多次时，以最后一次为准。
+    """
+    company_table = Company.__table__
+    project_table = Project.__table__
+    company_ids = dict(conn.execute(select(company_table.c.name, company_table.c.id)).all())
+    projects = {name: (project_id, company_id) for project_id, name, company_id in conn.execute(
+        select(project_table.c.id, project_table.c.name, project_table.c.company_id)
+    )}
+    stats = {'companies_created': 0, 'projects_created': 0, 'projects_updated': 0}
+
+    for batch in _batches(companies, BATCH_SIZE):
+        # 1. 插入新公司，取回ID
+        new_names = list(dict.fromkeys(c['name'] for c in batch if c['name'] not in company_ids))
+        if new_names:
+            conn.execute(company_table.insert(), [{'name': name} for name in new_names])
+            company_ids.update(conn.execute(
+                select(company_table.c.name, company_table.c.id).where(company_table.c.name.in_(new_names))
+            ).all())
+            stats['companies_created'] += len(new_names)
+
+        # 2. 比对项目：新项目插入，所属公司变化的项目更新
+        inserts = {}
+        updates = {}
+        for company in batch:
+            company_id = company_ids[company['name']]
+            for project in company.get('projects', []):
+                name = project['name']
+                if name in inserts or name not in projects:
+                    inserts[name] = company_id
+                elif projects[name][1] != company_id:
+                    updates[projects[name][0]] = company_id
+                    projects[name] = (projects[name][0], company_id)
+        if inserts:
+            conn.execute(project_table.insert(), [
+                {'name': name, 'company_id': company_id} for name, company_id in inserts.items()
+            ])
+            projects.update((name, (project_id, company_id)) for project_id, name, company_id in conn.execute(
+                select(project_table.c.id, project_table.c.name, project_table.c.company_id)
+                .where(project_table.c.name.in_(list(inserts)))
+            ))
+            stats['projects_created'] += len(inserts)
+        if updates:
+            conn.execute(
+                update(project_table).where(project_table.c.id == bindparam('project_id'))
+                .values(company_id=bindparam('new_company_id')),
+                [{'project_id': project_id, 'new_company_id': company_id} for project_id, company_id in updates.items()],
+            )
+            stats['projects_updated'] += len(updates)
+    return stats
+
+
+def load_org_file(path=DEFAULT_DATA_PATH):
+    """在一个事务中流式导入组织架构文件，返回 upsert_org 的统计"""
+    from modules.company.resources import catalog_cache
+
+    with open(path, 'r', encoding='utf-8') as fp, db.engine.begin() as conn:
+        stats = upsert_org(conn, iter_json_array(fp, 'companies'))
+    catalog_cache.invalidate()
+    return stats
+
+
+def ensure_database(app):
+    """数据库不存在时先创建数据库，再执行迁移建表（与 flask db upgrade 相同）"""
+    from flask_migrate import upgrade
 
-with app.app_context():
-    # 获取当前的数据库 URL
-    print('当前数据库 URL：')
-    print(app.config['SQLALCHEMY_DATABASE_URI'])
     url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
-    
-    # 提取数据库名称并将其从 URL 中移除
-    database_name = url.database
-    url = url.set(database=None)
-
-    # 使用不含数据库名称的 URL 创建引擎
-    engine = create_engine(url)
-   
-    # 检查数据库是否存在，如果不存在则创建它
-    if not database_exists(engine.url):
-        create_database(engine.url)
-        print(f"数据库 '{database_name}' 已创建。")
-
-    # 将数据库名称还原
-    url = url.set(database=database_name)
-    app.config['SQLALCHEMY_DATABASE_URI'] = str(url)
-   
-    # 更新 SQLAlchemy 对象的配置
-    db.engine.dispose()  # 释放现有连接
-    db.get_engine(app, bind=None)  # 更新引擎配置
-   
-    # 创建所有表
-    db.create_all()
-
-    # 初始化数据
-    data_path = os.path.join(os.path.dirname(__file__), 'data', 'initial_data.json')
-    with open(data_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-   
-    for company_data in data['companies']:
-        company = Company(name=company_data['name'])
-        db.session.add(company)
-        db.session.commit()
-       
-        for project_data in company_data['projects']:
-            project = Project(name=project_data['name'], company_id=company.id)
-            db.session.add(project)
-            db.session.commit()
\ No newline at end of file
+    if url.database and not database_exists(url):
+        create_database(url)
+        print(f"数据库 '{url.database}' 已创建。")
+    upgrade()
+
+
+def main(path=DEFAULT_DATA_PATH):
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        print('当前数据库 URL：')
+        print(app.config['SQLALCHEMY_DATABASE_URI'])
+        ensure_database(app)
+        stats = load_org_file(path)
+        print(f"新增公司 {stats['companies_created']} 个，新增项目 {stats['projects_created']} 个，"
+              f"更新项目 {stats['projects_updated']} 个")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
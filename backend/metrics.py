@@ -0,0 +1,215 @@
+"""
+metrics.py - 请求耗时与 SQL 统计，Prometheus 文本格式输出
+
+按接口（URL 规则，如 /api/pending-changes/<int:id>/approve）统计：
+- http_requests_total: 请求数（按方法和状态码）
+- http_request_duration_seconds: 请求耗时直方图
+- http_request_sql_statements_total: 执行的 SQL 语句条数
+- http_request_sql_seconds_total: SQL 执行总耗时
+- http_request_serialization_seconds_total: JSON 响应编码总耗时（见 representations.py）
+
+GET /metrics 返回 Prometheus 文本格式。统计数据保存在进程内，
+多进程部署时每个进程各自统计，由 Prometheus 分别抓取后汇总。
+
+慢请求日志：请求耗时超过 SLOW_REQUEST_THRESHOLD_MS 时，输出一行 JSON 日志，
+包含耗时最长的 SLOW_REQUEST_TOP_N 条 SQL，方便定位慢在哪里。
+"""
+
+import json
+import threading
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 请求耗时直方图的桶边界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 慢请求日志中每条 SQL 最多保留的字符数
+MAX_STATEMENT_LENGTH = 500
+
+
+class _EndpointStats:
+    """单个接口的累计统计"""
+
+    def __init__(self):
+        self.requests = {}  # (method, status) -> 次数
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.duration_sum = 0.0
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.serialization_seconds = 0.0
+
+
+class RequestMetrics:
+    """
+    请求指标收集器，用法与其他 Flask 扩展一致：
+
+        metrics = RequestMetrics()
+        metrics.init_app(app)
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._collectors = []
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+
+    def register_collector(self, collector):
+        """
+        注册额外的指标来源（如连接池状态）
+
+        collector() 返回 Prometheus 文本格式的行列表，在每次抓取 /metrics 时调用。
+        同一个 collector 只登记一次（多次 create_app 时不会重复输出）。
+        """
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def reset(self):
+        """清空所有统计（测试用）"""
+        with self._lock:
+            self._stats.clear()
+
+    # ---------- 请求钩子 ----------
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_seconds = 0.0
+        g.metrics_serialization_seconds = 0.0
+        g.metrics_statements = []
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, _EndpointStats())
+            key = (request.method, response.status_code)
+            stats.requests[key] = stats.requests.get(key, 0) + 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[i] += 1
+            stats.count += 1
+            stats.duration_sum += duration
+            stats.sql_statements += g.metrics_sql_count
+            stats.sql_seconds += g.metrics_sql_seconds
+            stats.serialization_seconds += g.metrics_serialization_seconds
+
+        threshold = current_app.config.get('SLOW_REQUEST_THRESHOLD_MS')
+        if threshold is not None and duration * 1000 >= threshold:
+            self._log_slow_request(endpoint, response.status_code, duration)
+        return response
+
+    def _log_slow_request(self, endpoint, status, duration):
+        top_n = current_app.config.get('SLOW_REQUEST_TOP_N', 5)
+        slowest = sorted(g.metrics_statements, key=lambda item: item[0], reverse=True)[:top_n]
+        current_app.logger.warning(json.dumps({
+            'event': 'slow_request',
+            'method': request.method,
+            'endpoint': endpoint,
+            'path': request.path,
+            'status': status,
+            'duration_ms': round(duration * 1000, 2),
+            'sql_count': g.metrics_sql_count,
+            'sql_ms': round(g.metrics_sql_seconds * 1000, 2),
+            'serialization_ms': round(g.metrics_serialization_seconds * 1000, 2),
+            'top_statements': [
+                {'ms': round(seconds * 1000, 2), 'sql': statement[:MAX_STATEMENT_LENGTH]}
+                for seconds, statement in slowest
+            ],
+        }, ensure_ascii=False))
+
+    # ---------- 数据记录（由 SQL 事件和 JSON 编码调用） ----------
+
+    @staticmethod
+    def record_statement(statement, seconds):
+        if has_request_context() and 'metrics_started' in g:
+            g.metrics_sql_count += 1
+            g.metrics_sql_seconds += seconds
+            g.metrics_statements.append((seconds, statement))
+
+    @staticmethod
+    def record_serialization(seconds):
+        if has_request_context() and 'metrics_started' in g:
+            g.metrics_serialization_seconds += seconds
+
+    # ---------- 输出 ----------
+
+    def render(self):
+        """生成 Prometheus 文本格式（text/plain; version=0.0.4）"""
+        with self._lock:
+            snapshot = list(self._stats.items())
+            lines = [
+                '# HELP http_requests_total Total HTTP requests.',
+                '# TYPE http_requests_total counter',
+            ]
+            for endpoint, stats in snapshot:
+                for (method, status), count in sorted(stats.requests.items()):
+                    lines.append(f'http_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP http_request_duration_seconds HTTP request latency.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for endpoint, stats in snapshot:
+                label = f'endpoint="{_escape(endpoint)}"'
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+                lines.append(f'http_request_duration_seconds_sum{{{label}}} {stats.duration_sum:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{label}}} {stats.count}')
+
+            for name, help_text, attr in (
+                ('http_request_sql_statements_total', 'SQL statements executed while handling requests.', 'sql_statements'),
+                ('http_request_sql_seconds_total', 'Time spent executing SQL while handling requests.', 'sql_seconds'),
+                ('http_request_serialization_seconds_total', 'Time spent encoding JSON responses.', 'serialization_seconds'),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for endpoint, stats in snapshot:
+                    value = getattr(stats, attr)
+                    value = value if isinstance(value, int) else f'{value:.6f}'
+                    lines.append(f'{name}{{endpoint="{_escape(endpoint)}"}} {value}')
+
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+    def _metrics_view(self):
+        return Response(self.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+# ---------- SQLAlchemy 事件：统计每条 SQL 的耗时 ----------
+# 监听 Engine 类而不是某个具体的 engine，所有数据库连接（包括多个绑定）都会被统计
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['metrics_query_started'].pop()
+    RequestMetrics.record_statement(statement, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # 执行出错时 after_cursor_execute 不会触发，这里弹出对应的开始时间
+    if context.connection is not None:
+        started = context.connection.info.get('metrics_query_started')
+        if started:
+            started.pop()
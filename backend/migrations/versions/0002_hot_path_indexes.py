@@ -0,0 +1,38 @@
+"""hot path indexes
+
+为热点查询的过滤条件和外键添加复合索引：
+- employee(status, id): 在岗名单的 keyset 分页
+- employee(company_id, status) / employee(project_id, status): 按公司/项目过滤在岗名单
+- change_request(status, id): 待确认名单的 keyset 分页
+- change_request(employee_id, status): 员工待确认变动的冲突检查
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 15:52:40.116302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hot_path_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_employee_status_id', 'employee', ['status', 'id'], unique=False)
+    op.create_index('ix_employee_company_id_status', 'employee', ['company_id', 'status'], unique=False)
+    op.create_index('ix_employee_project_id_status', 'employee', ['project_id', 'status'], unique=False)
+    op.create_index('ix_change_request_status_id', 'change_request', ['status', 'id'], unique=False)
+    op.create_index('ix_change_request_employee_id_status', 'change_request', ['employee_id', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_change_request_employee_id_status', table_name='change_request')
+    op.drop_index('ix_change_request_status_id', table_name='change_request')
+    op.drop_index('ix_employee_project_id_status', table_name='employee')
+    op.drop_index('ix_employee_company_id_status', table_name='employee')
+    op.drop_index('ix_employee_status_id', table_name='employee')
@@ -0,0 +1,37 @@
+"""revoked token blocklist
+
+多进程共享的JWT黑名单表，见 blocklist.py
+
+Revision ID: 0003_revoked_token
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-18 16:40:12.502917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_revoked_token'
+down_revision = '0002_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revoked_token',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(length=64), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('jti')
+    )
+    op.create_index('ix_revoked_token_created_at', 'revoked_token', ['created_at'], unique=False)
+    op.create_index('ix_revoked_token_expires_at', 'revoked_token', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_revoked_token_expires_at', table_name='revoked_token')
+    op.drop_index('ix_revoked_token_created_at', table_name='revoked_token')
+    op.drop_table('revoked_token')
@@ -0,0 +1,119 @@
+"""assignment intervals
+
+任职区间表：员工在各公司/项目的任职区间 [valid_from, valid_to)，用于查询项目某天的在岗名单。
+创建后根据已确认的变动记录回填历史区间：
+- 第一条变动之前的区间（原公司/项目）开始日期未知，记为 1900-01-01
+- 没有已确认变动、当前有项目且未离职的员工，从 efffective_date 开始一个进行中的区间
+- 进行中的区间 valid_to 为 9999-12-31（见 modules/employee/models.py 的 OPEN_END）
+
+Revision ID: 0004_assignment
+Revises: 0003_revoked_token
+Create Date: 2026-10-18 17:55:31.674301
+
+"""
+from datetime import date
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_assignment'
+down_revision = '0003_revoked_token'
+branch_labels = None
+depends_on = None
+
+ASSIGNMENT_START = date(1900, 1, 1)
+OPEN_END = date(9999, 12, 31)
+BATCH_SIZE = 10000
+
+
+def upgrade():
+    op.create_table('assignment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('valid_from', sa.Date(), nullable=False),
+    sa.Column('valid_to', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+    sa.ForeignKeyConstraint(['employee_id'], ['employee.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_assignment_employee_id_valid_to', 'assignment', ['employee_id', 'valid_to'], unique=False)
+    op.create_index('ix_assignment_project_id_valid_to', 'assignment', ['project_id', 'valid_to', 'valid_from'], unique=False)
+    _backfill()
+
+
+def downgrade():
+    op.drop_index('ix_assignment_project_id_valid_to', table_name='assignment')
+    op.drop_index('ix_assignment_employee_id_valid_to', table_name='assignment')
+    op.drop_table('assignment')
+
+
+def _backfill():
+    """按员工依次回放已确认的变动，生成任职区间（流式读取，分批写入）"""
+    bind = op.get_bind()
+    employee = sa.table(
+        'employee', sa.column('id', sa.Integer), sa.column('company_id', sa.Integer),
+        sa.column('project_id', sa.Integer), sa.column('status', sa.String), sa.column('efffective_date', sa.Date),
+    )
+    change = sa.table(
+        'change_request', sa.column('id', sa.Integer), sa.column('type', sa.String),
+        sa.column('employee_id', sa.Integer), sa.column('status', sa.String),
+        sa.column('from_company_id', sa.Integer), sa.column('from_project_id', sa.Integer),
+        sa.column('to_company_id', sa.Integer), sa.column('to_project_id', sa.Integer),
+        sa.column('effective_date', sa.Date),
+    )
+    assignment = sa.table(
+        'assignment', sa.column('employee_id', sa.Integer), sa.column('company_id', sa.Integer),
+        sa.column('project_id', sa.Integer), sa.column('valid_from', sa.Date), sa.column('valid_to', sa.Date),
+    )
+
+    rows = []
+
+    def add(employee_id, company_id, project_id, valid_from, valid_to=OPEN_END):
+        rows.append({'employee_id': employee_id, 'company_id': company_id, 'project_id': project_id,
+                     'valid_from': valid_from, 'valid_to': valid_to})
+        if len(rows) >= BATCH_SIZE:
+            bind.execute(assignment.insert(), rows)
+            rows.clear()
+
+    # 1. 有已确认变动的员工：按生效日期回放
+    changes = bind.execute(
+        sa.select(change.c.employee_id, change.c.type, change.c.from_company_id, change.c.from_project_id,
+                  change.c.to_company_id, change.c.to_project_id, change.c.effective_date)
+        .where(change.c.status == '已确认')
+        .where(change.c.type.in_(['调岗', '离职']))
+        .where(change.c.effective_date.isnot(None))
+        .order_by(change.c.employee_id, change.c.effective_date, change.c.id)
+    )
+    replayed = set()
+    for employee_id, group in groupby(changes, key=lambda row: row.employee_id):
+        replayed.add(employee_id)
+        current = None  # (company_id, project_id, valid_from)
+        for index, row in enumerate(group):
+            if index == 0 and row.from_project_id is not None:
+                current = (row.from_company_id, row.from_project_id, ASSIGNMENT_START)
+            if current is not None:
+                add(employee_id, *current, valid_to=row.effective_date)
+                current = None
+            if row.type == '调岗':
+                current = (row.to_company_id, row.to_project_id, row.effective_date)
+        if current is not None:
+            add(employee_id, *current)
+
+    # 2. 没有已确认变动的在职员工：当前项目即为进行中的区间
+    employees = bind.execute(
+        sa.select(employee.c.id, employee.c.company_id, employee.c.project_id, employee.c.efffective_date)
+        .where(employee.c.project_id.isnot(None))
+        .where(employee.c.status != '离职')
+    )
+    for employee_id, company_id, project_id, efffective_date in employees:
+        if employee_id not in replayed:
+            add(employee_id, company_id, project_id, efffective_date or ASSIGNMENT_START)
+
+    if rows:
+        bind.execute(assignment.insert(), rows)
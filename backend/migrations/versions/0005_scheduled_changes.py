@@ -0,0 +1,27 @@
+"""scheduled changes
+
+生效日期在未来的变动确认后进入'待生效'状态，由 flask apply-due-changes 到期应用。
+- change_request(status, effective_date): 定时任务按状态和生效日期查询到期的变动
+
+Revision ID: 0005_scheduled_changes
+Revises: 0004_assignment
+Create Date: 2026-10-18 19:05:33.218406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_scheduled_changes'
+down_revision = '0004_assignment'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_change_request_status_effective_date', 'change_request', ['status', 'effective_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_change_request_status_effective_date', table_name='change_request')
@@ -0,0 +1,64 @@
+"""employee name grams
+
+员工姓名的 n-gram 索引表，支持按姓名前缀/包含搜索（见 modules/employee/search.py）。
+- employee_name_gram(gram, employee_id): 按 gram 查找员工
+- employee_name_gram(employee_id): 员工改名时删除旧的 gram
+创建后为已有员工回填（分批写入，回填完成后再建索引）。
+
+Revision ID: 0006_employee_name_gram
+Revises: 0005_scheduled_changes
+Create Date: 2026-10-18 20:12:47.530918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_employee_name_gram'
+down_revision = '0005_scheduled_changes'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+
+def upgrade():
+    op.create_table('employee_name_gram',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('gram', sa.String(length=8), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['employee_id'], ['employee.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _backfill()
+    op.create_index('ix_employee_name_gram_employee_id', 'employee_name_gram', ['employee_id'], unique=False)
+    op.create_index('ix_employee_name_gram_gram_employee_id', 'employee_name_gram', ['gram', 'employee_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_employee_name_gram_gram_employee_id', table_name='employee_name_gram')
+    op.drop_index('ix_employee_name_gram_employee_id', table_name='employee_name_gram')
+    op.drop_table('employee_name_gram')
+
+
+def _name_grams(name):
+    """与 modules/employee/search.py 的 name_grams 相同：去掉首尾空白、转小写后的单字和相邻两字"""
+    text = (name or '').strip().lower()
+    return sorted(set(text) | {text[i:i + 2] for i in range(len(text) - 1)})
+
+
+def _backfill():
+    """为已有员工生成 gram（先写数据再建索引）"""
+    bind = op.get_bind()
+    employee = sa.table('employee', sa.column('id', sa.Integer), sa.column('name', sa.String))
+    gram = sa.table('employee_name_gram', sa.column('gram', sa.String), sa.column('employee_id', sa.Integer))
+
+    rows = []
+    for employee_id, name in bind.execute(sa.select(employee.c.id, employee.c.name).order_by(employee.c.id)).all():
+        rows.extend({'gram': g, 'employee_id': employee_id} for g in _name_grams(name))
+        if len(rows) >= BATCH_SIZE:
+            bind.execute(gram.insert(), rows)
+            rows = []
+    if rows:
+        bind.execute(gram.insert(), rows)
@@ -0,0 +1,44 @@
+"""employee hire date
+
+员工入职日期 hire_date：插入时取 efffective_date，之后不再改变（efffective_date 会随调岗/离职更新），
+用于统计每月入职人数。
+
+回填：没有已应用变动（已确认的调岗/离职）的员工，efffective_date 仍是入职日期，直接复制；
+有已应用变动的员工，原始入职日期已被覆盖，hire_date 保持为空（不计入入职统计）。
+
+Revision ID: 0007_employee_hire_date
+Revises: 0006_employee_name_gram
+Create Date: 2026-10-18 20:48:09.117624
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_employee_hire_date'
+down_revision = '0006_employee_name_gram'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employee', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('hire_date', sa.Date(), nullable=True))
+
+    employee = sa.table('employee', sa.column('id', sa.Integer), sa.column('efffective_date', sa.Date),
+                        sa.column('hire_date', sa.Date))
+    change = sa.table('change_request', sa.column('employee_id', sa.Integer), sa.column('status', sa.String),
+                      sa.column('type', sa.String))
+    applied = (
+        sa.select(change.c.employee_id)
+        .where(change.c.employee_id == employee.c.id)
+        .where(change.c.status == '已确认')
+        .where(change.c.type.in_(['调岗', '离职']))
+    )
+    op.execute(employee.update().where(~sa.exists(applied)).values(hire_date=employee.c.efffective_date))
+
+
+def downgrade():
+    with op.batch_alter_table('employee', schema=None) as batch_op:
+        batch_op.drop_column('hire_date')
@@ -0,0 +1,39 @@
+"""change event
+
+变动事件表，供待确认变动的 SSE 推送和 Last-Event-ID 续传使用（见 modules/change/feed.py）。
+- change_event.id: 事件ID，单调递增（SQLite 上使用 AUTOINCREMENT，清理事件后ID也不会回退）
+- change_event(created_at): 定期清理过期事件
+已有的变动不回填事件，订阅从迁移之后的写入开始。
+
+Revision ID: 0008_change_event
+Revises: 0007_employee_hire_date
+Create Date: 2026-10-18 21:36:02.417253
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_change_event'
+down_revision = '0007_employee_hire_date'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('change_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['change_id'], ['change_request.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_change_event_created_at'), 'change_event', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_change_event_created_at'), table_name='change_event')
+    op.drop_table('change_event')
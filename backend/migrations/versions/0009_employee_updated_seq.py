@@ -0,0 +1,45 @@
+"""employee updated seq
+
+员工行版本号，供在岗名单的增量同步使用（见 modules/employee/sync.py）。
+- employee.updated_seq: 插入和修改员工时写入所在事务的版本号
+- employee_sync_seq: 版本号计数器，只有 id=1 一行
+- employee(updated_seq, id): 增量同步按版本号范围查询并分页
+
+已有的员工版本号为 0，计数器从 0 开始：客户端先完整拉取一次名单（sync_seq 为 0），
+之后的修改版本号都大于 0，增量同步不会漏掉。
+
+Revision ID: 0009_employee_updated_seq
+Revises: 0008_change_event
+Create Date: 2026-10-18 22:27:41.538026
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_employee_updated_seq'
+down_revision = '0008_change_event'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    sync_seq = op.create_table('employee_sync_seq',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(sync_seq, [{'id': 1, 'value': 0}])
+
+    with op.batch_alter_table('employee', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_seq', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_employee_updated_seq_id', ['updated_seq', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('employee', schema=None) as batch_op:
+        batch_op.drop_index('ix_employee_updated_seq_id')
+        batch_op.drop_column('updated_seq')
+
+    op.drop_table('employee_sync_seq')
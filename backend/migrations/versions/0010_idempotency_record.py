@@ -0,0 +1,40 @@
+"""idempotency record
+
+写接口的幂等键表，保存 Idempotency-Key 第一次请求的响应，见 idempotency.py
+- 主键 (user_id, key): 同一用户的同一个键只执行一次
+- idempotency_record(expires_at): 批量清理过期记录
+
+Revision ID: 0010_idempotency_record
+Revises: 0009_employee_updated_seq
+Create Date: 2026-10-18 23:05:17.940362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_idempotency_record'
+down_revision = '0009_employee_updated_seq'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_record',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('response_status', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'key')
+    )
+    op.create_index('ix_idempotency_record_expires_at', 'idempotency_record', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_record_expires_at', table_name='idempotency_record')
+    op.drop_table('idempotency_record')
@@ -0,0 +1,34 @@
+"""rate limit bucket
+
+多进程共享的限流令牌桶表（RATELIMIT_STORAGE = 'database' 时使用），见 ratelimit.py
+- rate_limit_bucket(updated_at): 清理空闲的令牌桶
+
+Revision ID: 0011_rate_limit_bucket
+Revises: 0010_idempotency_record
+Create Date: 2026-10-18 23:41:52.306118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_rate_limit_bucket'
+down_revision = '0010_idempotency_record'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_bucket',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('tokens', sa.Double(), nullable=False),
+    sa.Column('updated_at', sa.Double(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_rate_limit_bucket_updated_at', 'rate_limit_bucket', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_rate_limit_bucket_updated_at', table_name='rate_limit_bucket')
+    op.drop_table('rate_limit_bucket')
@@ -0,0 +1,36 @@
+"""user password hash
+
+user.password 改存 werkzeug 的加盐哈希（scrypt 哈希约 160 个字符），长度放宽到 255，见 modules/auth/passwords.py。
+已有的明文密码不在迁移中转换（迁移拿不到配置的线程池和代价，逐行计算 scrypt 也很慢），
+由用户下次登录成功时透明地改存哈希。
+
+Revision ID: 0012_user_password_hash
+Revises: 0011_rate_limit_bucket
+Create Date: 2026-10-18 23:58:26.714093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012_user_password_hash'
+down_revision = '0011_rate_limit_bucket'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+               existing_type=sa.String(length=128),
+               type_=sa.String(length=255),
+               existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=128),
+               existing_nullable=False)
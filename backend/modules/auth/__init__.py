@@ -1,10 +1,16 @@
-from .models import User
+from .models import User, RevokedToken, IdempotencyRecord, RateLimitBucket
+from .passwords import PasswordHasherBusy, password_hasher
 from .schemas import UserSchema
 from .resources import LoginResource, RegisterResource, LogoutResource, UserMeResource
 from .routes import init_auth_routes
 
 __all__ = [
     'User',
+    'RevokedToken',
+    'IdempotencyRecord',
+    'RateLimitBucket',
+    'PasswordHasherBusy',
+    'password_hasher',
     'UserSchema',
     'LoginResource',
     'RegisterResource',
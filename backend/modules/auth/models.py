@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from flask_login import UserMixin
 from extensions import db
@@ -6,7 +6,60 @@ from extensions import db
 class User(UserMixin, db.Model):
     id = Column(db.Integer, primary_key=True)
     username = Column(db.String(64), unique=True, nullable=False)
-    password = Column(db.String(128), nullable=False)
+    password = Column(db.String(255), nullable=False)  # 加盐哈希，见 passwords.py
     # 关系
     employees = relationship('Employee', backref='creator', lazy=True)
-    change_requests = relationship('ChangeRequest', backref='creator', lazy=True)
\ No newline at end of file
+    change_requests = relationship('ChangeRequest', backref='creator', lazy=True)
+
+
+class RevokedToken(db.Model):
+    """
+    已吊销（登出）的JWT令牌，供多个进程共享黑名单，见 blocklist.py
+
+    - jti: 令牌唯一ID
+    - expires_at: 令牌过期时间（UTC），过期后记录可以被清理
+    - id: 自增主键，各进程按 id 增量同步（不依赖各进程的时钟）
+    - created_at: 吊销时间（UTC）
+    """
+    __tablename__ = 'revoked_token'
+
+    id = Column(db.Integer, primary_key=True)
+    jti = Column(db.String(64), unique=True, nullable=False)
+    expires_at = Column(DateTime, index=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+
+
+class IdempotencyRecord(db.Model):
+    """
+    幂等键（Idempotency-Key 请求头）及第一次请求的响应，见 idempotency.py
+
+    - (user_id, key): 同一用户的同一个键只执行一次
+    - fingerprint: 请求的摘要（方法、路径、请求体），同一个键用于不同的请求时拒绝
+    - response_status / response_body: 第一次请求的响应，为空表示请求仍在处理中
+    - created_at: 取得这个键的时间（UTC），处理中的记录超时后可以被接管
+    - expires_at: 过期时间（UTC），过期后记录被批量清理
+    """
+    __tablename__ = 'idempotency_record'
+
+    user_id = Column(db.Integer, ForeignKey('user.id'), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    response_status = Column(db.Integer)
+    response_body = Column(db.Text)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class RateLimitBucket(db.Model):
+    """
+    多进程共享的限流令牌桶（RATELIMIT_STORAGE = 'database' 时使用），见 ratelimit.py
+
+    - key: 路由和身份（用户ID或IP）
+    - tokens: 上次更新时桶中的令牌数
+    - updated_at: 上次更新的 Unix 时间戳，据此计算补充的令牌；空闲足够久的桶被清理
+    """
+    __tablename__ = 'rate_limit_bucket'
+
+    key = Column(String(255), primary_key=True)
+    tokens = Column(db.Double, nullable=False)
+    updated_at = Column(db.Double, nullable=False, index=True)
@@ -0,0 +1,116 @@
+"""
+密码哈希
+
+原来密码以明文保存，登录时直接比较字符串。现在保存 werkzeug 生成的加盐哈希（scrypt 或 PBKDF2），
+方法和代价由 PASSWORD_HASH_METHOD 配置，如 'scrypt:32768:8:1'、'pbkdf2:sha256:600000'。
+
+哈希计算是故意做慢的 CPU 密集操作（默认 scrypt 每次几十毫秒），在请求线程里直接算，
+一波登录请求就能占满所有 CPU，其他接口跟着变慢。这里交给一个有界线程池：
+- 最多 PASSWORD_HASH_WORKERS 个哈希同时计算（hashlib 计算时释放 GIL，线程即可并行，不需要进程池）
+- 排队等待的超过 PASSWORD_HASH_MAX_PENDING 个时直接拒绝（PasswordHasherBusy，接口返回 503），
+  等待超过 PASSWORD_HASH_TIMEOUT 秒同样拒绝，登录高峰不会让所有 worker 都卡在排队上
+
+旧数据迁移（登录成功时透明完成）：
+- 库中仍是明文的密码（没有哈希方法前缀）按常量时间比较，登录成功后改存哈希
+- 哈希的方法或代价与当前配置不同（例如调高了代价）时，登录成功后按当前配置重新计算
+
+基准测试见 benchmarks/bench_login.py。
+"""
+
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+# werkzeug 哈希的方法前缀，库中的密码不以这些开头时是旧的明文密码
+HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+
+class PasswordHasherBusy(Exception):
+    """哈希线程池已满或等待超时"""
+
+
+def is_hashed(stored):
+    """库中保存的是哈希（方法$盐$摘要）而不是旧的明文密码"""
+    return stored.startswith(HASH_PREFIXES) and stored.count('$') == 2
+
+
+class PasswordHasher:
+    """在有界线程池中计算和核对密码哈希，每个进程一个"""
+
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.timeout = 10
+        self._executor = None
+        self._slots = None
+        self._dummy = None
+
+    def init_app(self, app):
+        """
+        读取配置：
+        - PASSWORD_HASH_METHOD: werkzeug 的哈希方法和代价
+        - PASSWORD_HASH_WORKERS: 同时计算哈希的线程数
+        - PASSWORD_HASH_MAX_PENDING: 排队等待计算的最大请求数
+        - PASSWORD_HASH_TIMEOUT: 等待哈希结果的最长时间（秒）
+        """
+        self.shutdown()
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self.method = app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + app.config.get('PASSWORD_HASH_MAX_PENDING', 32))
+        self._dummy = None
+        app.extensions['password_hasher'] = self
+
+    def shutdown(self):
+        """关闭线程池（已提交的计算会继续完成）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run(self, func, *args):
+        executor, slots = self._executor, self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = executor.submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy()
+
+    def _dummy_hash(self):
+        # 按当前配置计算的一个哈希：核对不存在的用户，以及取得当前配置规范化后的方法前缀
+        if self._dummy is None:
+            self._dummy = self._run(generate_password_hash, '', self.method)
+        return self._dummy
+
+    def hash(self, password):
+        """按当前配置计算密码哈希"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored, password):
+        """
+        核对密码，返回 (是否正确, 是否需要按当前配置重新计算哈希)
+
+        stored 为 None（用户不存在）时同样计算一次哈希，响应时间不暴露用户名是否存在。
+        """
+        if stored is None:
+            self._run(check_password_hash, self._dummy_hash(), password)
+            return False, False
+        if not is_hashed(stored):
+            return hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8')), True
+        if not self._run(check_password_hash, stored, password):
+            return False, False
+        return True, stored.split('$', 1)[0] != self._dummy_hash().split('$', 1)[0]
+
+
+# 每个进程一个，在 create_app 中 init_app
+password_hasher = PasswordHasher()
@@ -1,7 +1,10 @@
+from flask import current_app
 from flask_restful import Resource, reqparse
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity,get_jwt
 from .models import User
+from .passwords import PasswordHasherBusy, password_hasher
 from extensions import db, jwt_blacklist
+from routing import replica_read
 from .schemas import UserSchema
 
 """
@@ -44,9 +47,9 @@ class LoginResource(Resource):
            - 使用 reqparse 解析请求中的 `username` 和 `password` 参数
            - 如果缺少必需字段会自动返回错误
         """
-        print("LoginResource POST method called")
         args = parser.parse_args()
-        print(f"Parsed args: {args}")
+        # 调试日志：只记录用户名，不记录密码
+        current_app.logger.debug('%s: username=%s', type(self).__name__, args['username'])
         # 查询用户
         """
         2. 查询用户：
@@ -57,9 +60,16 @@ class LoginResource(Resource):
         # 验证密码
         """
         3. 验证密码：
-           - 检查用户是否存在并且密码是否匹配
+           - 在哈希线程池中核对密码哈希（见 passwords.py），线程池已满时返回 503
+           - 旧的明文密码或按旧代价计算的哈希，核对通过后按当前配置重新计算并保存
         """
-        if user and user.password == args['password']:
+        try:
+            valid, needs_rehash = password_hasher.verify(user.password if user else None, args['password'])
+        except PasswordHasherBusy:
+            return _busy_response()
+        if valid:
+            if needs_rehash:
+                _rehash(user, args['password'])
             
             # 生成JWT token
             """
@@ -107,6 +117,20 @@ class LoginResource(Resource):
         else:
             return {'message': '无效的凭据 (Invalid credentials)'}, 401
 
+def _busy_response():
+    return {'message': '密码校验请求过多，请稍后重试 (Too many password checks in progress, please retry later)'}, 503, \
+        {'Retry-After': '1'}
+
+
+def _rehash(user, password):
+    """登录成功后把旧的明文密码或按旧代价计算的哈希换成当前配置的哈希；线程池繁忙时留到下次登录"""
+    try:
+        user.password = password_hasher.hash(password)
+    except PasswordHasherBusy:
+        return
+    db.session.commit()
+
+
 class RegisterResource(Resource):
     """
     用户注册资源
@@ -138,9 +162,9 @@ class RegisterResource(Resource):
            - 检查并提取请求中的用户名和密码
            - 如果缺少必需字段会自动返回错误
         """
-        print("LoginResource POST method called")
         args = parser.parse_args()
-        print(f"Parsed args: {args}")
+        # 调试日志：只记录用户名，不记录密码
+        current_app.logger.debug('%s: username=%s', type(self).__name__, args['username'])
         try:
             # 检查用户名是否已存在
             """
@@ -163,7 +187,7 @@ class RegisterResource(Resource):
             """
             user = User(
                 username=args['username'],
-                password=args['password']  # 注意：实际应用中应该加密存储
+                password=password_hasher.hash(args['password'])  # 只保存加盐哈希（见 passwords.py）
             )
             
             # 保存到数据库
@@ -200,6 +224,8 @@ class RegisterResource(Resource):
                 }
             }, 201
             
+        except PasswordHasherBusy:
+            return _busy_response()
         except Exception as e:
             """
             错误处理：
@@ -246,8 +272,9 @@ class RegisterResource(Resource):
 class LogoutResource(Resource):
     @jwt_required()
     def post(self):
-        jti = get_jwt()['jti']
-        jwt_blacklist.add(jti)
+        claims = get_jwt()
+        # 记录令牌的过期时间，过期后黑名单条目自动清除
+        jwt_blacklist.add(claims['jti'], claims.get('exp'))
         return {'success': True, 'message': 'Logged out successfully'}, 200
     
 
@@ -259,6 +286,7 @@ class UserMeResource(Resource):
 # 获取当前用户的详细信息
 # 暂未使用
     @jwt_required()
+    @replica_read
     def get(self):
         user_id = get_jwt_identity()
         user = User.query.get(user_id)
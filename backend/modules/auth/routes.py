@@ -1,5 +1,6 @@
-from modules.auth.resources import LoginResource, RegisterResource, LogoutResource
+from modules.auth.resources import LoginResource, RegisterResource, LogoutResource, UserMeResource
 def init_auth_routes(api):
     api.add_resource(LoginResource, '/api/auth/login')
     api.add_resource(RegisterResource, '/api/auth/register')
     api.add_resource(LogoutResource, '/api/auth/logout')
+    api.add_resource(UserMeResource, '/api/users/me')
@@ -1,7 +1,9 @@
-from .models import ChangeRequest
-from .resources import PendingChangesResource, EmployeeTransferResource, EmployeeResignResource, ApproveChangeResource, RejectChangeResource
+from .models import ChangeEvent, ChangeRequest
+from .resources import PendingChangesResource, PendingChangeEventsResource, PendingChangeEventsTokenResource, EmployeeTransferResource, EmployeeResignResource, ApproveChangeResource, RejectChangeResource, BatchApproveChangesResource, BatchRejectChangesResource
 from .schemas import ChangeSchema
 from .routes import init_change_routes
+from .feed import change_feed
+from .commands import apply_due_changes_command
 
 
-__all__ = ["ChangeSchema", "ChangeRequest", "PendingChangesResource", "EmployeeTransferResource", "EmployeeResignResource", "ApproveChangeResource", "RejectChangeResource", "init_change_routes"]
+__all__ = ["ChangeSchema", "ChangeRequest", "ChangeEvent", "PendingChangesResource", "PendingChangeEventsResource", "PendingChangeEventsTokenResource", "EmployeeTransferResource", "EmployeeResignResource", "ApproveChangeResource", "RejectChangeResource", "BatchApproveChangesResource", "BatchRejectChangesResource", "init_change_routes", "apply_due_changes_command", "change_feed"]
@@ -0,0 +1,57 @@
+"""
+变动申请相关的命令行命令
+
+flask apply-due-changes：应用生效日期已到的'待生效'变动。
+由 cron / systemd timer 定期执行（例如每天凌晨一次），多个实例同时执行也是安全的。
+"""
+
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from extensions import db
+from .services import ChangeConflictError, apply_due_changes
+
+# 与其他 worker 冲突时的最大重试次数
+MAX_RETRIES = 3
+
+
+def run_due_changes(today=None, batch_size=None):
+    """
+    按批应用所有到期的变动，每批一个事务，返回应用的变动总数
+
+    某一批与其他 worker 冲突（ChangeConflictError）时回滚并重试，重试时会看到对方已提交的结果。
+    """
+    batch_size = batch_size or current_app.config['DUE_CHANGES_BATCH_SIZE']
+    total = 0
+    retries = 0
+    while True:
+        try:
+            applied = apply_due_changes(today, limit=batch_size)
+            db.session.commit()
+        except ChangeConflictError:
+            db.session.rollback()
+            retries += 1
+            if retries > MAX_RETRIES:
+                raise
+            continue
+        total += len(applied)
+        if len(applied) < batch_size:
+            return total
+
+
+@click.command('apply-due-changes')
+@click.option('--date', 'today', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='按该日期判断是否到期（默认今天），格式 YYYY-MM-DD')
+@click.option('--batch-size', type=click.IntRange(min=1), help='每个事务应用的变动条数（默认取配置 DUE_CHANGES_BATCH_SIZE）')
+@with_appcontext
+def apply_due_changes_command(today, batch_size):
+    """应用生效日期已到的'待生效'变动"""
+    today = today.date() if isinstance(today, datetime) else today
+    try:
+        total = run_due_changes(today, batch_size)
+    except ChangeConflictError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'已应用 {total} 条到期变动')
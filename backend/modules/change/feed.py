@@ -0,0 +1,334 @@
+"""
+待确认变动的事件推送（Server-Sent Events）
+
+待确认名单页面原来要反复拉取整个 /api/pending-changes 才能发现新提交或已处理的申请，
+审批人多、页面一直开着时，是大量重复的整表读取。现在改为推送：
+
+- 提交调岗/离职申请、确认、拒绝时，在同一事务中向 change_event 表写入一行（services.record_change_events），
+  自增 id 即事件ID
+- 每个进程只有一个推送线程（ChangeFeed）：查询 change_event 表中新增的事件，一次查询的结果分发给本进程所有订阅者。
+  本进程的写入提交后立即唤醒推送线程；其他进程的写入靠每 CHANGE_FEED_POLL_INTERVAL 秒一次的轮询发现
+- 订阅者（GET /api/pending-changes/events）只从自己的队列读取，不访问数据库；
+  断线重连时浏览器带上 Last-Event-ID，先从 change_event 表补发之后的事件
+
+连接占用的资源是有界的：
+- 每个订阅者的队列最多缓存 CHANGE_FEED_QUEUE_SIZE 条消息。客户端读得太慢（或已停止读取）时不再为它缓存，
+  发送 reset 后断开，客户端重新拉取名单再订阅
+- 每个连接最长 CHANGE_FEED_MAX_STREAM_SECONDS 秒，之后结束，客户端带 Last-Event-ID 重连；
+  每个进程最多 CHANGE_FEED_MAX_SUBSCRIBERS 个连接，超过时返回 503。几个一直开着的页面不会占满所有处理线程
+- 浏览器的 EventSource 不能设置请求头，令牌只能放在 URL 中，而 URL 会出现在访问日志和代理日志里。
+  因此 URL 中只接受专用的事件流令牌（create_stream_token，有效期 CHANGE_FEED_TOKEN_SECONDS 秒，
+  只能用于事件流接口），不接受访问令牌
+
+事件格式:
+    id: 42
+    event: created | approved | rejected | reset
+    data: {"id": 变动ID, "status": 新状态, ...}
+
+created 事件的 data 是完整的变动（与待确认名单中的条目相同），approved / rejected 只有 id 和 status。
+客户端落后太多（超过 CHANGE_FEED_BACKLOG_LIMIT 条，或需要的事件已被清理）时收到 reset，应重新拉取名单。
+
+事件ID按分配顺序递增，但并发事务的提交顺序可能不同（后分配ID的先提交）。
+推送线程记住被跳过的ID，在 GAP_TIMEOUT_SECONDS 内继续查询它们；回滚留下的空洞到期后放弃。
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import request
+from flask_jwt_extended import create_access_token
+from sqlalchemy import delete, event, func, or_, select
+from sqlalchemy.orm import Session
+
+from extensions import db
+from representations import dumps
+from .models import ChangeEvent, ChangeRequest
+from .schemas import ChangeSchema
+from .services import APPROVED, CHANGE_EVENTS_KEY, PENDING, REJECTED, SCHEDULED, change_load_options
+
+logger = logging.getLogger(__name__)
+
+# 变动状态对应的事件名称
+EVENT_NAMES = {PENDING: 'created', APPROVED: 'approved', SCHEDULED: 'approved', REJECTED: 'rejected'}
+
+# 推送线程每次最多读取的事件数
+POLL_BATCH_SIZE = 500
+# 被跳过的事件ID（可能是尚未提交的事务）继续查询的时间（秒）
+GAP_TIMEOUT_SECONDS = 10
+# 一次跳过的ID超过这个数量时不再逐个跟踪（通常是数据库重启后自增值跳跃）
+MAX_TRACKED_GAP = 100
+# 清理过期事件的间隔（秒）
+PRUNE_INTERVAL_SECONDS = 3600
+# 建议浏览器断线后重连的等待时间（毫秒）
+RETRY_MS = 3000
+# 事件流接口的路由，以及只能用于该接口的事件流令牌的 scope 声明
+EVENTS_RULE = '/api/pending-changes/events'
+STREAM_TOKEN_SCOPE = 'change_feed'
+
+change_schema = ChangeSchema()
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def format_event(event_id, name, data):
+    """编码为一条 SSE 消息（字节串）"""
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (event_id, name.encode('ascii'), dumps(data))
+
+
+def latest_event_id():
+    """当前最新的事件ID，没有事件时为 0"""
+    return db.session.execute(select(func.max(ChangeEvent.id))).scalar() or 0
+
+
+def fetch_events(after_id, limit, extra_ids=()):
+    """
+    读取 id > after_id 以及 extra_ids 中的事件，按 id 排序，返回 [(事件ID, SSE 消息)]
+
+    created 事件需要完整的变动信息，用一次查询（预加载员工、公司、项目名称）取出。
+    """
+    condition = ChangeEvent.id > after_id
+    if extra_ids:
+        condition = or_(condition, ChangeEvent.id.in_(extra_ids))
+    rows = db.session.execute(
+        select(ChangeEvent.id, ChangeEvent.change_id, ChangeEvent.status)
+        .where(condition)
+        .order_by(ChangeEvent.id)
+        .limit(limit)
+    ).all()
+
+    created_ids = {change_id for _, change_id, status in rows if status == PENDING}
+    changes = {}
+    if created_ids:
+        changes = {change.id: change for change in
+                   ChangeRequest.query.options(*change_load_options()).filter(ChangeRequest.id.in_(created_ids))}
+
+    messages = []
+    for event_id, change_id, status in rows:
+        if status == PENDING and change_id in changes:
+            # 变动此后可能已被处理，事件中的状态仍为提交时的'待确认'，后续的事件会带来新状态
+            data = {**change_schema.dump(changes[change_id]), 'status': PENDING}
+        else:
+            data = {'id': change_id, 'status': status}
+        messages.append((event_id, format_event(event_id, EVENT_NAMES[status], data)))
+    return messages
+
+
+def create_stream_token(identity, session_exp):
+    """
+    签发事件流令牌：只能用于 EVENTS_RULE，有效期 CHANGE_FEED_TOKEN_SECONDS 秒，
+    session_exp 为访问令牌的过期时间，事件流连接不会持续到访问令牌过期之后
+    """
+    return create_access_token(identity=identity, expires_delta=timedelta(seconds=change_feed.token_seconds),
+                               additional_claims={'scope': STREAM_TOKEN_SCOPE, 'session_exp': session_exp})
+
+
+def token_scope_allowed(jwt_payload):
+    """事件流令牌只能用于事件流接口（JWTManager.token_verification_loader）"""
+    if jwt_payload.get('scope') != STREAM_TOKEN_SCOPE:
+        return True
+    return request.url_rule is not None and request.url_rule.rule == EVENTS_RULE
+
+
+class Subscriber:
+    """一个事件流连接：有界的消息队列；队列满时记下当时的最新事件ID，连接发送 reset 后结束"""
+
+    def __init__(self, queue_size):
+        self.queue = queue.Queue(queue_size)
+        self.reset_id = None
+
+
+class ChangeFeed:
+    """
+    每个进程一个的事件分发器：一个后台线程查询新事件，分发给所有订阅者的队列
+
+    没有订阅者时线程退出，有新的订阅者时重新启动。
+    """
+
+    def __init__(self):
+        self._app = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._last_id = 0
+        self._gaps = {}  # 被跳过的事件ID -> 发现时间
+        self._last_prune = None
+        self.poll_interval = 1
+        self.heartbeat = 15
+        self.backlog_limit = 1000
+        self.retention = timedelta(hours=24)
+        self.queue_size = 1000
+        self.max_subscribers = 16
+        self.max_stream_seconds = 300
+        self.token_seconds = 60
+
+    def init_app(self, app):
+        """
+        读取配置：
+        - CHANGE_FEED_POLL_INTERVAL: 轮询间隔（秒），即其他进程写入的事件的最大推送延迟
+        - CHANGE_FEED_HEARTBEAT: 没有事件时发送心跳的间隔（秒）
+        - CHANGE_FEED_BACKLOG_LIMIT: 断线重连时最多补发的事件数
+        - CHANGE_FEED_RETENTION_HOURS: 事件保留时间（小时）
+        - CHANGE_FEED_QUEUE_SIZE: 每个订阅者最多缓存的消息数
+        - CHANGE_FEED_MAX_SUBSCRIBERS: 每个进程最多的事件流连接数
+        - CHANGE_FEED_MAX_STREAM_SECONDS: 每个连接最长持续的时间（秒）
+        - CHANGE_FEED_TOKEN_SECONDS: 事件流令牌的有效期（秒）
+        """
+        self.stop()
+        self._app = app
+        self.poll_interval = app.config.get('CHANGE_FEED_POLL_INTERVAL', 1)
+        self.heartbeat = app.config.get('CHANGE_FEED_HEARTBEAT', 15)
+        self.backlog_limit = app.config.get('CHANGE_FEED_BACKLOG_LIMIT', 1000)
+        self.retention = timedelta(hours=app.config.get('CHANGE_FEED_RETENTION_HOURS', 24))
+        self.queue_size = app.config.get('CHANGE_FEED_QUEUE_SIZE', 1000)
+        self.max_subscribers = app.config.get('CHANGE_FEED_MAX_SUBSCRIBERS', 16)
+        self.max_stream_seconds = app.config.get('CHANGE_FEED_MAX_STREAM_SECONDS', 300)
+        self.token_seconds = app.config.get('CHANGE_FEED_TOKEN_SECONDS', 60)
+        app.extensions['change_feed'] = self
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """注册订阅者，返回 Subscriber；本进程的连接数已达上限时返回 None（需要在应用上下文中调用）"""
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                # 从当前最新的事件之后开始分发，更早的事件由订阅者按 Last-Event-ID 自行补发
+                self._last_id = latest_event_id()
+                self._gaps.clear()
+                self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def notify(self):
+        """唤醒推送线程立即查询（本进程写入的事件提交后调用）"""
+        self._wake.set()
+
+    def stop(self):
+        """移除所有订阅者并等待推送线程退出"""
+        with self._lock:
+            self._subscribers.clear()
+            thread = self._thread
+        if thread is not None:
+            self._wake.set()
+            thread.join()
+
+    def backlog(self, last_event_id):
+        """
+        断线重连：返回 last_event_id 之后的事件 [(事件ID, SSE 消息)]
+
+        需要的事件已被清理，或者落后超过 backlog_limit 条时，只返回一条 reset 事件（ID 为当前最新的事件ID）。
+        """
+        oldest = db.session.execute(select(func.min(ChangeEvent.id))).scalar()
+        messages = fetch_events(last_event_id, self.backlog_limit + 1)
+        if (oldest is not None and last_event_id < oldest - 1) or len(messages) > self.backlog_limit:
+            latest = latest_event_id()
+            return [(latest, format_event(latest, 'reset', {}))]
+        return messages
+
+    def stream(self, subscriber, backlog, deadline):
+        """
+        SSE 响应体：先发送补发的事件，再逐条发送推送线程分发来的事件
+
+        没有事件时每 heartbeat 秒发送一行注释，防止代理断开空闲连接；
+        到 deadline（Unix 时间戳）时结束，客户端带 Last-Event-ID 重新连接。
+        队列溢出时发送 reset 后结束。订阅者在响应关闭时由调用方取消注册（Response.call_on_close）。
+        """
+        sent = {event_id for event_id, _ in backlog}
+        yield b'retry: %d\n\n' % RETRY_MS
+        for _, message in backlog:
+            yield message
+        while True:
+            if subscriber.reset_id is not None:
+                yield format_event(subscriber.reset_id, 'reset', {})
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            try:
+                event_id, message = subscriber.queue.get(timeout=min(self.heartbeat, remaining))
+            except queue.Empty:
+                yield b': keepalive\n\n'
+                continue
+            # 订阅之后、补发之前提交的事件会同时出现在补发列表和队列中
+            if event_id not in sent:
+                yield message
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                with self._app.app_context():
+                    self.poll()
+            except Exception:
+                logger.exception('推送变动事件时出错 (Error publishing change events)')
+
+    def poll(self):
+        """查询一次新事件并分发给所有订阅者（在推送线程中调用）"""
+        now = time.monotonic()
+        self._gaps = {event_id: seen for event_id, seen in self._gaps.items() if now - seen < GAP_TIMEOUT_SECONDS}
+        messages = fetch_events(self._last_id, POLL_BATCH_SIZE, sorted(self._gaps))
+        for event_id, _ in messages:
+            self._gaps.pop(event_id, None)
+            if event_id > self._last_id:
+                if event_id - self._last_id <= MAX_TRACKED_GAP:
+                    self._gaps.update((skipped, now) for skipped in range(self._last_id + 1, event_id))
+                self._last_id = event_id
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            for message in messages:
+                try:
+                    subscriber.queue.put_nowait(message)
+                except queue.Full:
+                    # 客户端读得太慢，不再为它缓存：连接发送 reset 后结束，客户端重新拉取名单
+                    subscriber.reset_id = self._last_id
+                    self.unsubscribe(subscriber)
+                    break
+
+        if len(messages) == POLL_BATCH_SIZE:
+            self._wake.set()  # 还有没读完的事件
+        if self._last_prune is None or now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self._last_prune = now
+            self.prune()
+
+    def prune(self):
+        """删除超过保留时间的事件"""
+        db.session.execute(delete(ChangeEvent).where(ChangeEvent.created_at < _utcnow() - self.retention))
+        db.session.commit()
+
+
+# 每个进程一个，在 create_app 中 init_app
+change_feed = ChangeFeed()
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_change_feed(session):
+    if session.info.pop(CHANGE_EVENTS_KEY, False):
+        change_feed.notify()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_change_events(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(CHANGE_EVENTS_KEY, None)
@@ -1,5 +1,5 @@
 from extensions import db
-from sqlalchemy import Column, Integer, String, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime
 from sqlalchemy.orm import relationship
 
 class ChangeRequest(db.Model):
@@ -20,6 +20,32 @@ class ChangeRequest(db.Model):
     to_company = relationship("Company", foreign_keys=[to_company_id])
     from_project = relationship("Project", foreign_keys=[from_project_id])
     to_project = relationship("Project", foreign_keys=[to_project_id])
+
+    # 复合索引，与热点查询的访问路径一一对应：
+    # - (status, id): 待确认名单按状态过滤并按 id 做 keyset 分页
+    # - (employee_id, status): 查询某员工是否已有待确认的变动（冲突检查）
+    # - (status, effective_date): 定时任务查询生效日期已到的'待生效'变动
+    __table_args__ = (
+        db.Index('ix_change_request_status_id', 'status', 'id'),
+        db.Index('ix_change_request_employee_id_status', 'employee_id', 'status'),
+        db.Index('ix_change_request_status_effective_date', 'status', 'effective_date'),
+    )
+
+
+class ChangeEvent(db.Model):
+    """
+    变动事件：变动申请提交、确认、拒绝时各写入一行，与变动的状态修改在同一事务中
+
+    id 单调递增，即推送给客户端的事件ID（SSE 的 id 字段），断线重连时按 Last-Event-ID 补发之后的事件。
+    只保留最近一段时间（CHANGE_FEED_RETENTION_HOURS），见 feed.py。
+    """
+    id = Column(Integer, primary_key=True)
+    change_id = Column(Integer, ForeignKey('change_request.id'), nullable=False)
+    status = Column(String(16), nullable=False)  # 变动的新状态：待确认（提交）/ 已确认 / 待生效 / 已拒绝
+    created_at = Column(DateTime, nullable=False, index=True)
+
+    # SQLite 默认会复用已删除的最大 rowid，清理事件后ID可能回退；AUTOINCREMENT 保证ID只增不减
+    __table_args__ = {'sqlite_autoincrement': True}
     
     
 
@@ -1,11 +1,21 @@
+from flask import Response, current_app, request
 from flask_restful import Resource, reqparse
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, get_jwt_request_location
 from .models import ChangeRequest
 from modules.employee import Employee
 # from modules.company import Company, Project
 from extensions import db
 from .schemas import ChangeSchema
+from .feed import RETRY_MS, STREAM_TOKEN_SCOPE, change_feed, create_stream_token, latest_event_id
+from .services import (
+    ALREADY_PROCESSED, DEFERRED, NOT_FOUND, PENDING, ChangeConflictError,
+    approve_change, approve_changes, change_load_options, record_change_events, reject_change, reject_changes,
+)
 from datetime import datetime
+import time
+from idempotency import idempotent
+from pagination import DEFAULT_PAGE_SIZE, TOTAL_COUNT_HEADER, boolean, keyset_page, page_size
+from routing import replica_read
 
 # 创建 ChangeSchema 实例，用于序列化和反序列化 ChangeRequest 对象
 change_schema = ChangeSchema()
@@ -21,26 +31,129 @@ parser.add_argument('from_project_id', type=int)
 parser.add_argument('to_project_id', type=int)
 parser.add_argument('effective_date', required=True, type=lambda x: datetime.strptime(x, '%Y-%m-%d').date())
 
+# 待确认变动名单的查询参数（均来自 URL 查询字符串）
+pending_parser = reqparse.RequestParser()
+pending_parser.add_argument('cursor', location='args')
+pending_parser.add_argument('limit', type=page_size, default=DEFAULT_PAGE_SIZE, location='args')
+pending_parser.add_argument('type', choices=('调岗', '离职'), location='args',
+                            help='类型只能是调岗或离职 (Type must be 调岗 or 离职)')
+pending_parser.add_argument('date_from', type=lambda x: datetime.strptime(x, '%Y-%m-%d').date(), location='args')
+pending_parser.add_argument('date_to', type=lambda x: datetime.strptime(x, '%Y-%m-%d').date(), location='args')
+pending_parser.add_argument('with_total', type=boolean, default=False, location='args')
+
+
 class PendingChangesResource(Resource):
     """
     PendingChangesResource 类，用于处理获取待确认变动名单的请求
 
-        处理 GET 请求，返回待确认变动名单
+        处理 GET 请求，分页返回待确认变动名单
+
+        查询参数:
+        - cursor: 上一页返回的 next_cursor，不传表示第一页
+        - limit: 每页条数，默认 50，最大 200
+        - type: 变动类型（调岗/离职）
+        - date_from / date_to: 生效日期范围（含两端），格式 YYYY-MM-DD
+        - with_total: 为 true 时在 X-Total-Count 响应头中返回符合条件的总数
 
         工作流程:
         1. 使用 JWT 认证确保请求合法
-        2. 查询状态为 '待确认' 的变动请求
-        3. 使用 ChangeSchema 将查询结果序列化为 JSON 格式
-        4. 返回序列化数据和 200 状态码
+        2. 查询状态为 '待确认' 的变动请求，并预加载员工、公司、项目名称
+        3. 按 id 做 keyset 分页，只读取一页数据
+        4. 使用 ChangeSchema 将查询结果序列化为 JSON 格式
+        5. 返回序列化数据、下一页游标和 200 状态码
+
+        响应中的 last_event_id 是读取名单前最新的变动事件ID，
+        客户端用它订阅事件流（/api/pending-changes/events?last_event_id=...），不会漏掉读取名单期间的变动。
     """
     @jwt_required()
+    @replica_read
     def get(self):
+        args = pending_parser.parse_args()
         try:
-            changes = ChangeRequest.query.filter_by(status='待确认').all()
-            return {'changes': changes_schema.dump(changes)}, 200
+            last_event_id = latest_event_id()
+            query = ChangeRequest.query.options(*change_load_options()).filter(ChangeRequest.status == PENDING)
+            if args['type']:
+                query = query.filter(ChangeRequest.type == args['type'])
+            if args['date_from']:
+                query = query.filter(ChangeRequest.effective_date >= args['date_from'])
+            if args['date_to']:
+                query = query.filter(ChangeRequest.effective_date <= args['date_to'])
+
+            headers = {}
+            if args['with_total']:
+                headers[TOTAL_COUNT_HEADER] = str(query.order_by(None).count())
+
+            changes, next_cursor = keyset_page(query, ChangeRequest.id, args['cursor'], args['limit'])
+            return {'changes': changes_schema.dump(changes), 'next_cursor': next_cursor,
+                    'last_event_id': last_event_id}, 200, headers
+        except ValueError as e:
+            return {'message': str(e)}, 400
         except Exception as e:
             return {'message': f'获取待确认变动名单时出错: {str(e)}'}, 500
- 
+
+
+class PendingChangeEventsResource(Resource):
+    """
+    待确认变动的事件流（Server-Sent Events），见 feed.py
+
+        处理 GET 请求，返回 text/event-stream 长连接：有变动提交（created）、确认（approved）、
+        拒绝（rejected）时推送一条事件，页面据此增删名单条目，不必反复拉取整个名单。
+
+        认证: 与其他接口相同的 Authorization 请求头；浏览器的 EventSource 不能设置请求头，
+        改用查询参数 ?jwt=<事件流令牌>（POST /api/pending-changes/events/token 获取）。
+        URL 会出现在访问日志中，查询参数不接受访问令牌。
+
+        连接最长 CHANGE_FEED_MAX_STREAM_SECONDS 秒（且不超过访问令牌的有效期），之后结束，
+        客户端获取新的事件流令牌并带 last_event_id 重连。本进程的连接数已达上限时返回 503。
+
+        续传: 请求头 Last-Event-ID（浏览器自动重连时携带）或查询参数 last_event_id，
+        先补发该ID之后的事件；都不传时只推送订阅之后的事件。
+    """
+    @jwt_required(locations=['headers', 'query_string'])
+    def get(self):
+        claims = get_jwt()
+        if get_jwt_request_location() == 'query_string' and claims.get('scope') != STREAM_TOKEN_SCOPE:
+            return {'message': '查询参数中只接受事件流令牌 (Only stream tokens are accepted in the query string)'}, 401
+
+        raw_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        try:
+            last_event_id = int(raw_id) if raw_id else None
+        except ValueError:
+            return {'message': 'Last-Event-ID 必须是整数 (Last-Event-ID must be an integer)'}, 400
+
+        subscriber = change_feed.subscribe()
+        if subscriber is None:
+            return {'message': '事件流连接数已达上限，请稍后重试 (Too many event streams, please retry later)'}, 503, \
+                {'Retry-After': str(RETRY_MS // 1000)}
+        try:
+            backlog = change_feed.backlog(last_event_id) if last_event_id is not None else []
+        except Exception as e:
+            change_feed.unsubscribe(subscriber)
+            return {'message': f'获取变动事件时出错 (Error retrieving change events): {str(e)}'}, 500
+
+        # 事件流令牌的有效期很短，连接按它记录的访问令牌过期时间结束
+        session_exp = claims['session_exp'] if 'session_exp' in claims else claims.get('exp')
+        deadline = min(time.time() + change_feed.max_stream_seconds, session_exp or float('inf'))
+        response = Response(change_feed.stream(subscriber, backlog, deadline), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        response.call_on_close(lambda: change_feed.unsubscribe(subscriber))
+        return response
+
+
+class PendingChangeEventsTokenResource(Resource):
+    """
+    事件流令牌
+
+        处理 POST 请求（Authorization 请求头认证），返回一个短期令牌，只能用于
+        GET /api/pending-changes/events?jwt=<令牌>，有效期 CHANGE_FEED_TOKEN_SECONDS 秒。
+    """
+    @jwt_required()
+    def post(self):
+        claims = get_jwt()
+        token = create_stream_token(get_jwt_identity(), claims.get('exp'))
+        return {'token': token, 'expires_in': change_feed.token_seconds}, 200
+
+
 class EmployeeTransferResource(Resource):
     """
     员工调岗资源类（Employee Transfer Resource Class）
@@ -53,6 +166,7 @@ class EmployeeTransferResource(Resource):
     """
 
     @jwt_required()  # JWT令牌（token）验证装饰器（decorator）
+    @idempotent  # 带 Idempotency-Key 的重试返回第一次的响应，不重复提交（见 idempotency.py）
     def put(self, id):
         """
         处理PUT请求，创建员工调岗申请
@@ -116,8 +230,10 @@ class EmployeeTransferResource(Resource):
                 creator_id=user_id  # 添加创建者ID
             )
             
-            # 5. 保存到数据库
+            # 5. 保存到数据库，同时写入变动事件（推送给正在查看待确认名单的审批人）
             db.session.add(change)
+            db.session.flush()
+            record_change_events([change.id], PENDING)
             db.session.commit()
             
             # 6. 返回成功响应
@@ -148,6 +264,7 @@ class EmployeeResignResource(Resource):
     """
 
     @jwt_required()
+    @idempotent
     def put(self, id):
         """
         处理PUT请求，创建员工离职申请
@@ -198,8 +315,10 @@ class EmployeeResignResource(Resource):
                 creator_id=user_id  # 添加创建者ID
             )
             
-            # 5. 保存到数据库
+            # 5. 保存到数据库，同时写入变动事件
             db.session.add(change)
+            db.session.flush()
+            record_change_events([change.id], PENDING)
             db.session.commit()
             
             # 6. 返回成功响应
@@ -228,44 +347,37 @@ class ApproveChangeResource(Resource):
 
         返回:
         - 成功：{'success': True, 'message': '变更请求已批准 (Change request approved)'}, 200
+        - 成功（生效日期在未来）：{'success': True, 'scheduled': True, 'message': ...}, 200
         - 失败：{'message': '未找到变更请求 (Change request not found)'}, 404
         - 失败：{'message': '变更请求已处理 (Change request already processed)'}, 400
 
         工作流程:
         1. 使用 JWT 认证确保请求合法
-        2. 查询指定 ID 的变动请求
-        3. 如果变动请求不存在，返回 404 错误
-        4. 如果变动请求状态不是 '待确认'，返回 400 错误
-        5. 更新变动请求状态为 '已确认'
-        6. 根据变动类型更新员工信息
-        7. 提交数据库事务
-        8. 返回成功响应
+        2. 带条件的 UPDATE：仅当变动仍为 '待确认' 时改为 '已确认'（生效日期在未来时改为 '待生效'）
+        3. 改为 '已确认' 时，在同一事务中根据变动类型更新员工信息，并维护任职区间表
+        4. 没有更新成功时，变动不存在返回 404，已被处理（包括同时到达的另一个确认/拒绝请求）返回 400
+        5. 提交数据库事务并返回
+
+        状态判断和修改在同一条语句中完成，两个审批人同时点击时只有一个请求生效，见 services.approve_change。
         """
-        change = ChangeRequest.query.get(id)
-        if not change:
+        try:
+            outcome = approve_change(id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f'确认变动申请时出错: {str(e)}'}, 500
+
+        if outcome == NOT_FOUND:
             return {'message': '未找到变更请求 (Change request not found)'}, 404
-        if change.status != '待确认':
+        if outcome == ALREADY_PROCESSED:
             return {'message': '变更请求已处理 (Change request already processed)'}, 400
-        
-        # 更新变动请求状态为已确认
-        change.status = '已确认'
-        
-        # 更新员工信息
-        employee = Employee.query.get(change.employee_id)
-        if change.type == '调岗':
-            employee.company_id = change.to_company_id
-            employee.project_id = change.to_project_id
-            employee.efffective_date = change.effective_date  # 更新 efffective_date 为 effective_date
-            # 添加状态更新逻辑
-            if employee.status == '待岗':
-                employee.status = '在岗'
-        elif change.type == '离职':
-            employee.status = '离职'
-            employee.efffective_date = change.effective_date  # 更新 efffective_date 为 effective_date
-        
-        # 提交数据库事务
-        db.session.commit()
-        
+        if outcome == DEFERRED:
+            # 生效日期未到：只记录为待生效，员工信息保持不变
+            return {
+                'success': True,
+                'scheduled': True,
+                'message': '变更请求已批准，将在生效日期应用 (Change request approved, scheduled for its effective date)'
+            }, 200
         return {'success': True, 'message': '变更请求已批准 (Change request approved)'}, 200
 
 class RejectChangeResource(Resource):
@@ -290,23 +402,104 @@ class RejectChangeResource(Resource):
 
         工作流程:
         1. 使用 JWT 认证确保请求合法
-        2. 查询指定 ID 的变动请求
-        3. 如果变动请求不存在，返回 404 错误
-        4. 如果变动请求状态不是 '待确认'，返回 400 错误
-        5. 更新变动请求状态为 '已拒绝'
-        6. 提交数据库事务
-        7. 返回成功响应
+        2. 带条件的 UPDATE：仅当变动仍为 '待确认' 时改为 '已拒绝'
+        3. 没有更新成功时，变动不存在返回 404，已被处理返回 400
+        4. 提交数据库事务并返回
         """
-        change = ChangeRequest.query.get(id)
-        if not change:
+        try:
+            outcome = reject_change(id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f'拒绝变动申请时出错: {str(e)}'}, 500
+
+        if outcome == NOT_FOUND:
             return {'message': '未找到变更请求 (Change request not found)'}, 404
-        if change.status != '待确认':
+        if outcome == ALREADY_PROCESSED:
             return {'message': '变更请求已处理 (Change request already processed)'}, 400
-        
-        # 更新变动请求状态为已拒绝
-        change.status = '已拒绝'
-        
-        # 提交数据库事务
-        db.session.commit()
-        
-        return {'success': True, 'message': '变更请求已拒绝 (Change request rejected)'}, 200
\ No newline at end of file
+        return {'success': True, 'message': '变更请求已拒绝 (Change request rejected)'}, 200
+
+
+def _parse_change_ids():
+    """
+    从 JSON 请求体 {"ids": [1, 2, 3]} 中读取变动ID列表（去重并保持顺序）
+
+    格式不合法时抛出 ValueError。
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids:
+        raise ValueError('ids 必须是非空数组 (ids must be a non-empty array)')
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ValueError('ids 只能包含整数 (ids must contain integers only)')
+    max_ids = current_app.config['BATCH_CHANGE_MAX_IDS']
+    if len(ids) > max_ids:
+        raise ValueError(f'单次最多处理{max_ids}条变动 (At most {max_ids} ids per request)')
+    return list(dict.fromkeys(ids))
+
+
+def _batch_result(ids, outcomes):
+    """按请求中的ID顺序整理每条变动的处理结果"""
+    results = [{'id': change_id, 'outcome': outcomes[change_id]} for change_id in ids]
+    applied = sum(1 for r in results if r['outcome'] == 'applied')
+    scheduled = sum(1 for r in results if r['outcome'] == 'scheduled')
+    return {'success': True, 'applied': applied, 'scheduled': scheduled, 'results': results}
+
+
+class BatchApproveChangesResource(Resource):
+    """
+    批量确认变动申请（月底集中审批几百条调岗）
+
+    请求体: {"ids": [1, 2, 3]}
+
+    所有'待确认'的变动在同一个事务中用集合 UPDATE 改为'已确认'并应用到员工表，
+    生效日期在未来的变动改为'待生效'，到期后由 flask apply-due-changes 应用。
+    每个ID返回处理结果：applied（已应用）、scheduled（待生效）、already_processed（已处理过）、not_found（不存在）。
+    """
+    @jwt_required()
+    def put(self):
+        try:
+            ids = _parse_change_ids()
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        try:
+            outcomes = approve_changes(ids)
+            db.session.commit()
+        except ChangeConflictError as e:
+            db.session.rollback()
+            return {'message': str(e)}, 409
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f'批量确认变动申请时出错: {str(e)}'}, 500
+
+        return _batch_result(ids, outcomes), 200
+
+
+class BatchRejectChangesResource(Resource):
+    """
+    批量拒绝变动申请
+
+    请求体: {"ids": [1, 2, 3]}
+
+    所有'待确认'的变动在同一个事务中用一条 UPDATE 改为'已拒绝'，
+    每个ID返回处理结果：applied（已拒绝）、already_processed（已处理过）、not_found（不存在）。
+    """
+    @jwt_required()
+    def put(self):
+        try:
+            ids = _parse_change_ids()
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        try:
+            outcomes = reject_changes(ids)
+            db.session.commit()
+        except ChangeConflictError as e:
+            db.session.rollback()
+            return {'message': str(e)}, 409
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f'批量拒绝变动申请时出错: {str(e)}'}, 500
+
+        return _batch_result(ids, outcomes), 200
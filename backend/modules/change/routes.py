@@ -1,8 +1,13 @@
-from .resources import PendingChangesResource, ApproveChangeResource, RejectChangeResource, EmployeeTransferResource, EmployeeResignResource
+from .feed import EVENTS_RULE
+from .resources import PendingChangesResource, PendingChangeEventsResource, PendingChangeEventsTokenResource, ApproveChangeResource, RejectChangeResource, EmployeeTransferResource, EmployeeResignResource, BatchApproveChangesResource, BatchRejectChangesResource
 def init_change_routes(api):
     api.add_resource(EmployeeTransferResource, '/api/pending-changes/<int:id>/transfer')
     api.add_resource(EmployeeResignResource, '/api/pending-changes/<int:id>/resign')
     api.add_resource(PendingChangesResource, '/api/pending-changes')
+    api.add_resource(PendingChangeEventsResource, EVENTS_RULE)
+    api.add_resource(PendingChangeEventsTokenResource, '/api/pending-changes/events/token')
     api.add_resource(ApproveChangeResource, '/api/pending-changes/<int:id>/approve')
     api.add_resource(RejectChangeResource, '/api/pending-changes/<int:id>/reject')
+    api.add_resource(BatchApproveChangesResource, '/api/pending-changes/approve')
+    api.add_resource(BatchRejectChangesResource, '/api/pending-changes/reject')
     
\ No newline at end of file
@@ -20,7 +20,7 @@ class ChangeSchema(Schema):
     - to_project_id: 目标项目ID
     - to_project_name: 目标项目名称（通过关系获取）
     - effective_date: 生效日期
-    - status: 状态（待确认/已确认/已拒绝）
+    - status: 状态（待确认/待生效/已确认/已拒绝）
     - creator_id: 创建者ID
     """
     
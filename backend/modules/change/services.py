@@ -0,0 +1,389 @@
+"""
+变动申请的批量处理逻辑
+
+审批接口（单条/批量）共用这里的函数，全部以集合方式（set-based）执行：
+- 一条 UPDATE 把所有符合条件的变动请求改为新状态
+- 一条 UPDATE 把所有调岗变动应用到员工表，一条 UPDATE 应用所有离职变动
+- 任职区间表（assignment）同样用固定条数的 UPDATE / INSERT ... SELECT 维护
+
+生效日期在未来的变动确认后进入'待生效'状态，暂不修改员工表，
+到期后由 flask apply-due-changes（见 commands.py）按批应用。
+
+无论一次处理多少条变动，语句条数都是固定的。函数只负责执行语句，
+由调用方（resource）负责提交或回滚事务。
+
+提交、确认、拒绝时同时写入变动事件（change_event），供 SSE 推送和断线续传使用，见 feed.py。
+
+这些语句带有多层子查询，每次重新构造语句对象的开销比在数据库中执行它们还大，
+所以只构造一次（变动ID等通过绑定参数传入），之后直接复用编译缓存。
+"""
+
+from datetime import date, datetime, timezone
+from functools import cache
+
+from sqlalchemy import Date, bindparam, case, func, insert, literal, or_, select, update
+from sqlalchemy.orm import joinedload
+from extensions import db
+from modules.employee import Assignment, Employee, OPEN_END, transaction_seq
+from .models import ChangeEvent, ChangeRequest
+
+# 变动请求状态
+PENDING = '待确认'
+APPROVED = '已确认'
+REJECTED = '已拒绝'
+SCHEDULED = '待生效'  # 已确认，但生效日期未到，尚未应用到员工表
+
+# 批量处理中每个ID的处理结果
+APPLIED = 'applied'
+DEFERRED = 'scheduled'
+ALREADY_PROCESSED = 'already_processed'
+NOT_FOUND = 'not_found'
+
+
+# session.info 中记录"本事务写入了变动事件"的键，提交后通知本进程的推送线程（见 feed.py）
+CHANGE_EVENTS_KEY = '_change_events_recorded'
+
+
+class ChangeConflictError(Exception):
+    """处理过程中有变动请求被其他请求抢先处理（状态已不是'待确认'）"""
+
+
+def change_load_options():
+    """
+    ChangeSchema 需要员工姓名、原/目标公司名、原/目标项目名，
+    对应 ChangeRequest 上的五个懒加载关系，逐行访问会产生最多 5N 条额外查询。
+    这里用 joinedload 把五个关系在同一条 SQL 中 LEFT JOIN 出来（公司、项目表各自使用别名），
+    无论返回多少条变动都只有一次查询。
+    """
+    return (
+        joinedload(ChangeRequest.employee),
+        joinedload(ChangeRequest.from_company),
+        joinedload(ChangeRequest.to_company),
+        joinedload(ChangeRequest.from_project),
+        joinedload(ChangeRequest.to_project),
+    )
+
+
+def record_change_events(change_ids, status):
+    """为一批变动写入状态变为 status 的事件（一次 executemany），与状态修改在同一事务中提交"""
+    if not change_ids:
+        return
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.session.execute(insert(ChangeEvent), [
+        {'change_id': change_id, 'status': status, 'created_at': now} for change_id in change_ids
+    ])
+    db.session.info[CHANGE_EVENTS_KEY] = True
+
+
+def _classify(change_ids):
+    """
+    查询变动请求的当前状态，并加行锁（支持的数据库上为 SELECT ... FOR UPDATE）
+
+    返回:
+    - pending: 仍处于'待确认'的变动 {ID: 生效日期}（按传入顺序）
+    - outcomes: 其余ID的处理结果（已处理 / 不存在）
+    """
+    rows = db.session.execute(
+        select(ChangeRequest.id, ChangeRequest.status, ChangeRequest.effective_date)
+        .where(ChangeRequest.id.in_(change_ids))
+        .with_for_update()
+    ).all()
+    found = {change_id: (status, effective_date) for change_id, status, effective_date in rows}
+
+    pending = {}
+    outcomes = {}
+    for change_id in change_ids:
+        if change_id not in found:
+            outcomes[change_id] = NOT_FOUND
+        elif found[change_id][0] != PENDING:
+            outcomes[change_id] = ALREADY_PROCESSED
+        else:
+            pending[change_id] = found[change_id][1]
+    return pending, outcomes
+
+
+@cache
+def _transition_statement():
+    table = ChangeRequest.__table__
+    return (
+        update(table)
+        .where(table.c.id.in_(bindparam('change_ids', expanding=True)))
+        .where(table.c.status == bindparam('from_status'))
+        .values(status=bindparam('new_status'))
+    )
+
+
+def _transition(change_ids, new_status, from_status=PENDING):
+    """
+    带条件的状态更新：只有仍为 from_status（默认'待确认'）的行才会被更新
+
+    受影响行数与预期不一致说明有并发请求抢先处理了其中某些变动，抛出 ChangeConflictError。
+    """
+    if not change_ids:
+        return
+    result = db.session.execute(_transition_statement(), {
+        'change_ids': list(change_ids), 'from_status': from_status, 'new_status': new_status,
+    })
+    if result.rowcount != len(change_ids):
+        raise ChangeConflictError('变更请求已被其他操作处理 (Change requests were processed concurrently)')
+
+
+def apply_employee_changes(change_ids):
+    """
+    把一批变动应用到员工表
+
+    - 调岗：更新公司、项目、生效日期，待岗员工改为在岗
+    - 离职：状态改为离职，更新生效日期
+
+    同一员工在一批中有多条同类变动时，以ID最大的一条为准；先应用调岗再应用离职。
+    被修改的员工行记为本事务的版本号（updated_seq），客户端增量同步时能取到。
+    """
+    if not change_ids:
+        return
+    params = {'change_ids': list(change_ids), 'seq': transaction_seq(db.session)}
+    for statement in _employee_statements():
+        db.session.execute(statement, params)
+
+
+@cache
+def _employee_statements():
+    employee = Employee.__table__
+    change = ChangeRequest.__table__
+    change_ids = bindparam('change_ids', expanding=True)
+
+    def latest(column, change_type):
+        # 相关子查询：取该员工在本批变动中指定类型的最新一条的某个字段
+        return (
+            select(column)
+            .where(change.c.employee_id == employee.c.id)
+            .where(change.c.id.in_(change_ids))
+            .where(change.c.type == change_type)
+            .order_by(change.c.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+
+    def targets(change_type):
+        return select(change.c.employee_id).where(change.c.id.in_(change_ids)).where(change.c.type == change_type)
+
+    return (
+        update(employee)
+        .where(employee.c.id.in_(targets('调岗')))
+        .values(
+            company_id=latest(change.c.to_company_id, '调岗'),
+            project_id=latest(change.c.to_project_id, '调岗'),
+            efffective_date=latest(change.c.effective_date, '调岗'),
+            status=case((employee.c.status == '待岗', '在岗'), else_=employee.c.status),
+            updated_seq=bindparam('seq'),
+        ),
+        update(employee)
+        .where(employee.c.id.in_(targets('离职')))
+        .values(
+            status='离职',
+            efffective_date=latest(change.c.effective_date, '离职'),
+            updated_seq=bindparam('seq'),
+        ),
+    )
+
+
+def record_assignments(change_ids):
+    """
+    根据一批确认的变动维护任职区间表（assignment）
+
+    - 调岗：关闭员工当前的区间（valid_to = 生效日期），开启目标公司/项目的新区间
+    - 离职：关闭员工当前的区间
+
+    生效日期早于员工当前区间的 valid_from 时（补录的变动，或晚于后一条变动才到期应用的待生效变动），
+    按 valid_from 处理：当前区间关闭为空区间，新区间从 valid_from 开始，不会出现 valid_to < valid_from 的区间。
+
+    与 apply_employee_changes 一致：同一员工在一批中有多条同类变动时以ID最大的一条为准，先调岗再离职。
+    """
+    if not change_ids:
+        return
+    for statement in _assignment_statements():
+        db.session.execute(statement, {'change_ids': list(change_ids)})
+
+
+@cache
+def _assignment_statements():
+    assignment = Assignment.__table__
+    change = ChangeRequest.__table__
+    change_ids = bindparam('change_ids', expanding=True)
+
+    def latest_ids(change_type):
+        # 本批中每个员工指定类型的最新一条变动
+        return (
+            select(func.max(change.c.id))
+            .where(change.c.id.in_(change_ids))
+            .where(change.c.type == change_type)
+            .group_by(change.c.employee_id)
+        )
+
+    def close_open_assignments(change_type):
+        latest = latest_ids(change_type)
+        effective_date = (
+            select(change.c.effective_date)
+            .where(change.c.id.in_(latest))
+            .where(change.c.employee_id == assignment.c.employee_id)
+            .scalar_subquery()
+        )
+        return (
+            update(assignment)
+            .where(assignment.c.valid_to == OPEN_END)
+            .where(assignment.c.employee_id.in_(select(change.c.employee_id).where(change.c.id.in_(latest))))
+            .values(valid_to=case(
+                (effective_date < assignment.c.valid_from, assignment.c.valid_from), else_=effective_date
+            ))
+        )
+
+    # 员工最近一个区间的开始日期（即刚关闭的当前区间），新区间不早于它
+    previous = assignment.alias('previous')
+    latest_start = (
+        select(func.max(previous.c.valid_from))
+        .where(previous.c.employee_id == change.c.employee_id)
+        .scalar_subquery()
+    )
+    return (
+        close_open_assignments('调岗'),
+        insert(assignment).from_select(
+            ['employee_id', 'company_id', 'project_id', 'valid_from', 'valid_to'],
+            select(change.c.employee_id, change.c.to_company_id, change.c.to_project_id,
+                   case((change.c.effective_date < latest_start, latest_start), else_=change.c.effective_date),
+                   literal(OPEN_END, Date))
+            .where(change.c.id.in_(latest_ids('调岗'))),
+        ),
+        close_open_assignments('离职'),
+    )
+
+
+def _apply(change_ids):
+    """把一批变动应用到员工表和任职区间表"""
+    apply_employee_changes(change_ids)
+    record_assignments(change_ids)
+
+
+def approve_changes(change_ids, today=None):
+    """
+    批量确认变动请求
+
+    - 生效日期已到（<= today，默认今天）的变动改为'已确认'，并立即应用到员工表
+    - 生效日期在未来的变动改为'待生效'，由 apply_due_changes 到期后应用
+
+    返回 {变动ID: 处理结果}，处理结果为 applied / scheduled / already_processed / not_found。
+    """
+    today = today or date.today()
+    pending, outcomes = _classify(change_ids)
+    due_ids = [i for i, effective_date in pending.items() if effective_date is None or effective_date <= today]
+    scheduled_ids = [i for i, effective_date in pending.items() if effective_date is not None and effective_date > today]
+    _transition(due_ids, APPROVED)
+    _transition(scheduled_ids, SCHEDULED)
+    _apply(due_ids)
+    record_change_events(due_ids, APPROVED)
+    record_change_events(scheduled_ids, SCHEDULED)
+    outcomes.update((change_id, APPLIED) for change_id in due_ids)
+    outcomes.update((change_id, DEFERRED) for change_id in scheduled_ids)
+    return outcomes
+
+
+def reject_changes(change_ids):
+    """
+    批量拒绝变动请求
+
+    返回 {变动ID: 处理结果}，处理结果为 applied / already_processed / not_found。
+    """
+    pending, outcomes = _classify(change_ids)
+    _transition(list(pending), REJECTED)
+    record_change_events(list(pending), REJECTED)
+    outcomes.update((change_id, APPLIED) for change_id in pending)
+    return outcomes
+
+
+@cache
+def _guarded_statements():
+    """
+    单条审批用的带条件 UPDATE：UPDATE ... WHERE id = ? AND status = '待确认' [AND 生效日期条件]
+
+    判断状态和修改状态在同一条语句中完成，两个请求同时处理同一条变动时只有一个能更新成功。
+    """
+    table = ChangeRequest.__table__
+    pending = (
+        update(table)
+        .where(table.c.id == bindparam('change_id'))
+        .where(table.c.status == PENDING)
+    )
+    today = bindparam('today', type_=Date)
+    return {
+        APPROVED: pending.where(or_(table.c.effective_date.is_(None), table.c.effective_date <= today))
+                         .values(status=APPROVED),
+        SCHEDULED: pending.where(table.c.effective_date > today).values(status=SCHEDULED),
+        REJECTED: pending.values(status=REJECTED),
+    }
+
+
+def _guarded_update(change_id, new_status, today=None):
+    """执行带条件的 UPDATE，返回是否更新成功（受影响行数为 1）"""
+    result = db.session.execute(_guarded_statements()[new_status], {'change_id': change_id, 'today': today})
+    return result.rowcount == 1
+
+
+def _missing_or_processed(change_id):
+    """条件更新失败后区分原因：变动不存在（not_found）或已被处理（already_processed）"""
+    exists = db.session.execute(select(ChangeRequest.id).where(ChangeRequest.id == change_id)).first()
+    return ALREADY_PROCESSED if exists else NOT_FOUND
+
+
+def approve_change(change_id, today=None):
+    """
+    确认单条变动请求，返回处理结果 applied / scheduled / already_processed / not_found
+
+    不先查询再判断状态（读-改-写之间会被并发请求插入），而是直接执行带条件的 UPDATE，
+    由受影响行数决定结果：
+    - 生效日期已到：改为'已确认'，并在同一事务中应用到员工表和任职区间表
+    - 生效日期在未来：改为'待生效'
+    - 都没有更新成功时才查询一次，区分不存在和已处理
+    """
+    today = today or date.today()
+    if _guarded_update(change_id, APPROVED, today):
+        _apply([change_id])
+        record_change_events([change_id], APPROVED)
+        return APPLIED
+    if _guarded_update(change_id, SCHEDULED, today):
+        record_change_events([change_id], SCHEDULED)
+        return DEFERRED
+    return _missing_or_processed(change_id)
+
+
+def reject_change(change_id):
+    """拒绝单条变动请求，返回处理结果 applied / already_processed / not_found（同样是带条件的 UPDATE）"""
+    if _guarded_update(change_id, REJECTED):
+        record_change_events([change_id], REJECTED)
+        return APPLIED
+    return _missing_or_processed(change_id)
+
+
+def apply_due_changes(today=None, limit=None):
+    """
+    应用已到期的'待生效'变动（生效日期 <= today，默认今天），返回本次应用的变动ID列表
+
+    - 一条 SELECT 通过 (status, effective_date) 索引取出到期的变动（最多 limit 条），
+      支持的数据库上加 FOR UPDATE SKIP LOCKED，多个 worker 并发执行时各自取到不相交的行
+    - 带条件的 UPDATE 把它们改为'已确认'；不支持行锁的数据库（SQLite）上如果与其他 worker 取到了同一批，
+      受影响行数不一致，抛出 ChangeConflictError，由调用方回滚后重试，不会重复应用
+    - 与确认接口相同，用固定条数的集合语句应用到员工表和任职区间表
+
+    由调用方负责提交或回滚事务。
+    """
+    today = today or date.today()
+    query = (
+        select(ChangeRequest.id)
+        .where(ChangeRequest.status == SCHEDULED)
+        .where(ChangeRequest.effective_date <= today)
+        .order_by(ChangeRequest.effective_date, ChangeRequest.id)
+        .with_for_update(skip_locked=True)
+    )
+    if limit:
+        query = query.limit(limit)
+    due_ids = list(db.session.execute(query).scalars())
+    _transition(due_ids, APPROVED, from_status=SCHEDULED)
+    _apply(due_ids)
+    return due_ids
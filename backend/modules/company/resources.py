@@ -1,25 +1,53 @@
+from flask import current_app
 from flask_restful import Resource
 from .models import Company, Project
 from .schemas import CompanySchema, ProjectSchema
+from cache import VersionedCache, compute_etag, conditional_response, invalidate_on_commit
 
 company_schema = CompanySchema(many=True)
 project_schema = ProjectSchema(many=True)
 
+# 公司和项目目录几乎不变，但调岗弹窗每次打开都会请求。
+# 目录数据缓存在进程内：Company / Project 有写入并提交后版本号 +1，缓存自动失效；
+# ttl 兜底其他进程写入的情况。
+# 缓存的加载读主库（不加 @replica_read）：提交后版本号立即 +1，如果此时从库还没追上，
+# 从库读到的旧数据会以新版本号缓存整个 ttl，所有客户端都读不到刚提交的修改。
+catalog_cache = VersionedCache('catalog', ttl=300)
+invalidate_on_commit(catalog_cache, Company, Project)
+
+
+def _load_companies():
+    payload = {'companies': company_schema.dump(Company.query.order_by(Company.id).all())}
+    return payload, compute_etag(payload)
+
+
+class _CompanyNotFound(Exception):
+    """公司不存在：loader 抛出异常，结果不写入缓存"""
+
+
+def _load_company_projects(company_id):
+    # 不存在的公司不缓存，否则任意请求不存在的ID就能让缓存无限增长
+    company = Company.query.get(company_id)
+    if not company:
+        raise _CompanyNotFound(company_id)
+    payload = {'projects': project_schema.dump(company.projects)}
+    return payload, compute_etag(payload)
+
+
 class CompaniesResource(Resource):
     def get(self):
         try:
-            companies = Company.query.all()
-            return {'companies': company_schema.dump(companies)}, 200
+            payload, etag = catalog_cache.get_or_load('companies', _load_companies)
+            return conditional_response(payload, etag, current_app.config['CATALOG_CACHE_MAX_AGE'])
         except Exception as e:
             return {'message': f'获取公司列表时出错 (Error retrieving company list): {str(e)}'}, 500
 
 class CompanyProjectsResource(Resource):
     def get(self, id):
         try:
-            company = Company.query.get(id)
-            if not company:
-                return {'message': '未找到公司 (Company not found)'}, 404
-            projects = company.projects
-            return {'projects': project_schema.dump(projects)}, 200
+            payload, etag = catalog_cache.get_or_load(('projects', id), lambda: _load_company_projects(id))
+            return conditional_response(payload, etag, current_app.config['CATALOG_CACHE_MAX_AGE'])
+        except _CompanyNotFound:
+            return {'message': '未找到公司 (Company not found)'}, 404
         except Exception as e:
-            return {'message': f'获取项目列表时出错 (Error retrieving project list): {str(e)}'}, 500
\ No newline at end of file
+            return {'message': f'获取项目列表时出错 (Error retrieving project list): {str(e)}'}, 500
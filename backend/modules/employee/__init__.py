@@ -1,5 +1,7 @@
-from .models import Employee
-from .schemas import EmployeeSchema
-from .resources import AddEmployeeResource, ActiveEmployeesResource
+from .models import Employee, Assignment, EmployeeNameGram, EmployeeSyncSeq, OPEN_END
+from .schemas import EmployeeSchema, RosterEntrySchema
+from .resources import AddEmployeeResource, ActiveEmployeesResource, BulkEmployeesResource, EmployeeSearchResource, ProjectRosterResource
+from .search import index_employee_names, name_grams
+from .sync import current_seq, transaction_seq
 from .routes import init_employee_routes
-__all__ = ["Employee", "EmployeeSchema", "AddEmployeeResource", "ActiveEmployeesResource", "init_employee_routes"]
\ No newline at end of file
+__all__ = ["Employee", "Assignment", "EmployeeNameGram", "EmployeeSyncSeq", "OPEN_END", "EmployeeSchema", "RosterEntrySchema", "AddEmployeeResource", "ActiveEmployeesResource", "BulkEmployeesResource", "EmployeeSearchResource", "ProjectRosterResource", "index_employee_names", "name_grams", "current_seq", "transaction_seq", "init_employee_routes"]
\ No newline at end of file
@@ -1,7 +1,14 @@
 from extensions import db
-from sqlalchemy import Column, Integer, String, ForeignKey, Date
+from datetime import date
+from sqlalchemy import DDL, Column, Integer, String, ForeignKey, Date, event
 from sqlalchemy.orm import relationship
 
+
+def _default_hire_date(context):
+    # 插入时未指定入职日期则取生效日期（新员工的生效日期就是入职日期）
+    return context.get_current_parameters().get('efffective_date')
+
+
 class Employee(db.Model):
     """
     Employee模型类，表示员工信息
@@ -10,8 +17,10 @@ class Employee(db.Model):
     - id: 员工ID，主键
     - name: 员工姓名
     - position: 员工职位
-    - efffective_date: 生效日期（到岗公司时间）
+    - efffective_date: 生效日期（到岗公司时间），调岗/离职时更新为变动的生效日期
+    - hire_date: 入职日期，插入时取 efffective_date，之后不再改变（统计每月入职人数用）
     - status: 员工状态（在岗、待岗、离职）
+    - updated_seq: 行版本号，插入和每次修改时取新的全局序号（见 sync.py），客户端按它增量同步在岗名单
     - company_id: 所属公司ID，外键
     - project_id: 所属项目ID，外键
     - creator_id: 创建者ID，外键
@@ -29,9 +38,15 @@ class Employee(db.Model):
     
     # 定义入职日期列，日期类型
     efffective_date = Column(db.Date)
+
+    # 定义入职日期列，日期类型，插入后不再修改（efffective_date 会随调岗/离职更新）
+    hire_date = Column(db.Date, default=_default_hire_date)
     
     # 定义员工状态列，字符串类型，默认值为'待岗'
     status = Column(db.String(16), default='待岗')
+
+    # 定义行版本号列：全局递增的序号，插入和修改时由 sync.py 写入（flask seed 写入的行为 0）
+    updated_seq = Column(db.Integer, nullable=False, server_default='0')
     
     # 定义公司ID列，外键（foreign key），关联到公司表的ID列
     company_id = Column(db.Integer, db.ForeignKey('company.id'))
@@ -49,6 +64,18 @@ class Employee(db.Model):
     # 定义关系，用于访问关联的Project对象
     # back_populates参数用于双向关系，指向Project模型中的employees属性
     project = relationship("Project", back_populates="employees")
+
+    # 复合索引，与热点查询的访问路径一一对应：
+    # - (status, id): 在岗名单按状态过滤并按 id 做 keyset 分页
+    # - (company_id, status) / (project_id, status): 按公司/项目过滤在岗名单
+    # - (updated_seq, id): 增量同步按版本号范围查询并分页
+    __table_args__ = (
+        db.Index('ix_employee_status_id', 'status', 'id'),
+        db.Index('ix_employee_updated_seq_id', 'updated_seq', 'id'),
+        db.Index('ix_employee_company_id_status', 'company_id', 'status'),
+        db.Index('ix_employee_project_id_status', 'project_id', 'status'),
+    )
+
     
 """
     关系（Relationship）说明：
@@ -92,4 +119,78 @@ class Employee(db.Model):
         # }
 
 
-    """
\ No newline at end of file
+    """
+
+
+# 仍在进行中的任职区间的结束日期（用一个很远的日期代替 NULL，
+# 这样"某天在岗"的判断是纯范围条件 valid_to > 日期，可以直接走索引）
+OPEN_END = date(9999, 12, 31)
+
+
+class Assignment(db.Model):
+    """
+    Assignment模型类，表示员工在某个公司/项目的一段任职区间
+
+    区间为左闭右开 [valid_from, valid_to)：
+    - valid_from: 到岗日期
+    - valid_to: 离开日期（调岗/离职的生效日期），仍在岗时为 OPEN_END
+
+    变动被确认时维护（见 modules/change/services.py 的 record_assignments）：
+    调岗关闭当前区间并开启新区间，离职只关闭当前区间。
+    """
+    id = Column(db.Integer, primary_key=True)
+    employee_id = Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+    company_id = Column(db.Integer, db.ForeignKey('company.id'))
+    project_id = Column(db.Integer, db.ForeignKey('project.id'))
+    valid_from = Column(db.Date, nullable=False)
+    valid_to = Column(db.Date, nullable=False, default=OPEN_END)
+
+    employee = relationship('Employee')
+
+    # - (project_id, valid_to, valid_from): 项目某天的在岗名单，
+    #   project_id 等值 + valid_to 范围定位，valid_from 在索引内过滤
+    # - (employee_id, valid_to): 查找并关闭员工当前的区间
+    __table_args__ = (
+        db.Index('ix_assignment_project_id_valid_to', 'project_id', 'valid_to', 'valid_from'),
+        db.Index('ix_assignment_employee_id_valid_to', 'employee_id', 'valid_to'),
+    )
+
+
+class EmployeeSyncSeq(db.Model):
+    """
+    EmployeeSyncSeq模型类，员工行版本号的计数器（只有 id=1 一行）
+
+    写员工的事务先把计数器 +1，取得的值作为本事务写入的所有员工行的 updated_seq（见 sync.py）。
+    计数器行的写锁持有到事务提交，所以版本号的顺序就是提交顺序：
+    客户端读到的最大版本号为 S 时，版本号 <= S 的修改都已经提交，不会漏掉。
+    """
+    __tablename__ = 'employee_sync_seq'
+    id = Column(db.Integer, primary_key=True)
+    value = Column(db.Integer, nullable=False)
+
+
+# db.create_all() 建表后写入计数器的初始行（迁移中同样写入）
+event.listen(EmployeeSyncSeq.__table__, 'after_create',
+             DDL('INSERT INTO employee_sync_seq (id, value) VALUES (1, 0)'))
+
+
+class EmployeeNameGram(db.Model):
+    """
+    EmployeeNameGram模型类，员工姓名的 n-gram 索引（姓名搜索用，见 search.py）
+
+    每个员工的姓名拆成单字和相邻两字，各存一行，例如"王小明"：王、小、明、王小、小明。
+    按关键词搜索时先用 gram 索引找出包含关键词所有 gram 的员工，再核对姓名，
+    不需要对员工表做 LIKE '%关键词%' 全表扫描。
+
+    由 search.py 中的 ORM 事件在员工插入/改名时维护；批量导入和 flask seed 直接写入。
+    """
+    id = Column(db.Integer, primary_key=True)
+    gram = Column(db.String(8), nullable=False)
+    employee_id = Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+
+    # - (gram, employee_id): 按 gram 查找员工，覆盖索引，不需要回表
+    # - (employee_id): 员工改名时删除旧的 gram
+    __table_args__ = (
+        db.Index('ix_employee_name_gram_gram_employee_id', 'gram', 'employee_id'),
+        db.Index('ix_employee_name_gram_employee_id', 'employee_id'),
+    )
@@ -1,34 +1,188 @@
-from flask import request # 用于debug log
-from flask_restful import Resource, reqparse
+import csv
+import io
+from itertools import islice
+from flask import current_app, request
+from flask_restful import Resource, inputs, reqparse
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from .models import Employee
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from .models import Assignment, Employee
+from .search import MAX_QUERY_LENGTH, index_employee_names, normalize_name, search_employees
+from .sync import current_seq, sync_page, transaction_seq
 from modules.company import Company,Project
 from extensions import db
-from .schemas import EmployeeSchema
-from datetime import datetime  # 修正datetime导入
+from .schemas import EmployeeSchema, RosterEntrySchema
+from datetime import date, datetime  # 修正datetime导入
+from werkzeug.exceptions import RequestEntityTooLarge
+from idempotency import idempotent
+from pagination import (DEFAULT_PAGE_SIZE, TOTAL_COUNT_HEADER, boolean, decode_ranked_cursor, decode_seq_cursor,
+                        encode_ranked_cursor, encode_seq_cursor, keyset_page, page_size)
+from routing import replica_read
 
 employee_schema = EmployeeSchema()
 employees_schema = EmployeeSchema(many=True)
+roster_schema = RosterEntrySchema(many=True)
+
+# 在岗名单包含的员工状态
+ACTIVE_STATUSES = ('在岗', '待岗')
+
+# EmployeeSchema 序列化时需要公司名和项目名（company_name / project_name）。
+# company、project 默认是懒加载关系，逐个员工访问会额外触发 2N 条 SELECT（N+1 问题），
+# 这里用 joinedload 在查询员工的同一条 SQL 里 LEFT JOIN 出公司和项目，
+# 无论返回多少员工都只有一次查询。
+# （写成函数而不是模块级常量：构造 loader 选项会触发 mapper 配置，
+#  而导入本模块时 ChangeRequest 等模型可能还没有注册。）
+def employee_load_options():
+    return joinedload(Employee.company), joinedload(Employee.project)
+
+
+# 在岗员工列表的查询参数（均来自 URL 查询字符串）
+active_parser = reqparse.RequestParser()
+active_parser.add_argument('cursor', location='args')
+active_parser.add_argument('limit', type=page_size, default=DEFAULT_PAGE_SIZE, location='args')
+active_parser.add_argument('company_id', type=int, location='args')
+active_parser.add_argument('project_id', type=int, location='args')
+active_parser.add_argument('status', choices=ACTIVE_STATUSES, location='args',
+                           help='状态只能是在岗或待岗 (Status must be 在岗 or 待岗)')
+active_parser.add_argument('position', location='args')
+active_parser.add_argument('with_total', type=boolean, default=False, location='args')
+active_parser.add_argument('since', type=inputs.natural, location='args',
+                           help='since 必须是非负整数 (since must be a non-negative integer)')
 
 
 class ActiveEmployeesResource(Resource):
     """
-        处理GET请求，返回在岗和待岗员工列表
+        处理GET请求，分页返回在岗和待岗员工列表
+
+        查询参数:
+        - cursor: 上一页返回的 next_cursor，不传表示第一页
+        - limit: 每页条数，默认 50，最大 200
+        - company_id / project_id / status / position: 过滤条件
+        - with_total: 为 true 时在 X-Total-Count 响应头中返回符合条件的总数
+        - since: 增量同步，只返回版本号大于 since 的员工（见 sync.py）
 
         工作流程:
         1. 使用JWT认证确保请求合法
-        2. 查询状态为'在岗'或'待岗'的员工
-        3. 使用EmployeeSchema将查询结果序列化为JSON格式
-        4. 返回序列化数据和200状态码
+        2. 按过滤条件构造查询，状态限定为'在岗'或'待岗'
+        3. 按 id 做 keyset 分页，只读取一页数据
+        4. 使用EmployeeSchema将查询结果序列化为JSON格式
+        5. 返回序列化数据、下一页游标和200状态码
+
+        每个响应都带有 sync_seq（读取名单前已提交的最大版本号）。客户端取完所有页后，
+        以第一页的 sync_seq 作为下次请求的 since：响应中的 employees 是新增或修改过的员工，
+        removed 是离开名单（离职或不再符合过滤条件）的员工ID，按 (版本号, id) 分页。
     """
     @jwt_required()
+    @replica_read
     def get(self):
+        args = active_parser.parse_args()
         try:
-            employees = Employee.query.filter(Employee.status.in_(['在岗', '待岗'])).all()
-            return {'employees': employees_schema.dump(employees)}, 200
+            sync_seq = current_seq(db.session)
+            if args['since'] is not None:
+                return self._changes_since(args, sync_seq), 200
+
+            query = _filter_active(Employee.query.options(*employee_load_options()), args)
+
+            headers = {}
+            if args['with_total']:
+                headers[TOTAL_COUNT_HEADER] = str(query.order_by(None).count())
+
+            employees, next_cursor = keyset_page(query, Employee.id, args['cursor'], args['limit'])
+            return {'employees': employees_schema.dump(employees), 'next_cursor': next_cursor,
+                    'sync_seq': sync_seq}, 200, headers
+        except ValueError as e:
+            return {'message': str(e)}, 400
         except Exception as e:
             return {'message': f'获取在岗员工列表时出错 (Error retrieving active employees list): {str(e)}'}, 500
 
+    @staticmethod
+    def _changes_since(args, sync_seq):
+        """增量同步：版本号大于 since 的员工，仍在名单中的返回完整数据，离开名单的只返回ID"""
+        cursor = decode_seq_cursor(args['cursor']) if args['cursor'] else None
+
+        def matches(employee):
+            if employee.status not in ((args['status'],) if args['status'] else ACTIVE_STATUSES):
+                return False
+            return ((args['company_id'] is None or employee.company_id == args['company_id'])
+                    and (args['project_id'] is None or employee.project_id == args['project_id'])
+                    and (not args['position'] or employee.position == args['position']))
+
+        changed, removed, next_key = sync_page(Employee.query.options(*employee_load_options()), matches,
+                                               args['since'], cursor, args['limit'])
+        return {
+            'employees': employees_schema.dump(changed),
+            'removed': removed,
+            'next_cursor': encode_seq_cursor(*next_key) if next_key else None,
+            'sync_seq': sync_seq,
+        }
+
+
+def _filter_active(query, args):
+    """按在岗名单的查询参数（状态、公司、项目、职位）过滤"""
+    if args['status']:
+        query = query.filter(Employee.status == args['status'])
+    else:
+        query = query.filter(Employee.status.in_(ACTIVE_STATUSES))
+    if args['company_id'] is not None:
+        query = query.filter(Employee.company_id == args['company_id'])
+    if args['project_id'] is not None:
+        query = query.filter(Employee.project_id == args['project_id'])
+    if args['position']:
+        query = query.filter(Employee.position == args['position'])
+    return query
+
+
+def _search_query(value):
+    """reqparse 的 type 函数：校验搜索关键词非空且不超过 MAX_QUERY_LENGTH 个字符"""
+    text = normalize_name(value)
+    if not text:
+        raise ValueError('搜索关键词不能为空 (Search query must not be empty)')
+    if len(text) > MAX_QUERY_LENGTH:
+        raise ValueError(f'搜索关键词不能超过{MAX_QUERY_LENGTH}个字符 '
+                         f'(Search query must be at most {MAX_QUERY_LENGTH} characters)')
+    return text
+
+
+# 员工搜索的查询参数
+search_parser = reqparse.RequestParser()
+search_parser.add_argument('q', type=_search_query, required=True, location='args',
+                           help='搜索关键词无效 (Invalid search query): {error_msg}')
+search_parser.add_argument('cursor', location='args')
+search_parser.add_argument('limit', type=page_size, default=DEFAULT_PAGE_SIZE, location='args')
+search_parser.add_argument('active', type=boolean, default=False, location='args')
+
+
+class EmployeeSearchResource(Resource):
+    """
+        处理GET请求，按姓名搜索员工（前缀和包含匹配，适用于 2~4 个字的中文姓名）
+
+        查询参数:
+        - q: 搜索关键词（必填）
+        - cursor: 上一页返回的 next_cursor，不传表示第一页
+        - limit: 每页条数，默认 50，最大 200
+        - active: 为 true 时只搜索在岗和待岗员工
+
+        结果按 完全匹配 > 前缀匹配 > 包含 排序，同一档按 id 排序。
+        基于姓名的 n-gram 索引表查找候选员工（见 search.py），不对员工表做 LIKE 全表扫描。
+    """
+    @jwt_required()
+    @replica_read
+    def get(self):
+        args = search_parser.parse_args()
+        try:
+            cursor = decode_ranked_cursor(args['cursor']) if args['cursor'] else None
+            query = Employee.query.options(*employee_load_options())
+            if args['active']:
+                query = query.filter(Employee.status.in_(ACTIVE_STATUSES))
+            employees, next_key = search_employees(query, args['q'], cursor, args['limit'])
+            next_cursor = encode_ranked_cursor(*next_key) if next_key else None
+            return {'employees': employees_schema.dump(employees), 'next_cursor': next_cursor}, 200
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        except Exception as e:
+            return {'message': f'搜索员工时出错 (Error searching employees): {str(e)}'}, 500
+
+
 parser = reqparse.RequestParser()
 parser.add_argument('name', required=True, help='Name is required.')
 parser.add_argument('position', required=True, help='Position is required.')
@@ -37,20 +191,15 @@ parser.add_argument('efffective_date', required=True, help='Hire date is require
 
 class AddEmployeeResource(Resource):
     @jwt_required()
+    @idempotent
     def post(self):
         try:
-            # 打印请求数据
-            print("Request data:", request.get_json())
-            
             args = parser.parse_args()
             
-            # 打印解析后的参数
-            print(f"Parsed args: {args}")
-            
             user_id = get_jwt_identity()
             
-            # 打印用户ID
-            print(f"User ID: {user_id}")
+            # 调试日志（耗时和SQL统计见 /metrics 和慢请求日志）
+            current_app.logger.debug('添加员工: user_id=%s args=%s', user_id, dict(args))
             
             # 创建新员工对象
             employee = Employee(
@@ -64,12 +213,210 @@ class AddEmployeeResource(Resource):
             # 将新员工对象添加到数据库会话
             db.session.add(employee)
             db.session.commit()
+
+            # 提交后对象已过期，带上关系预加载重新读取一次，序列化时不再触发懒加载
+            employee = Employee.query.options(*employee_load_options()).filter_by(id=employee.id).one()
             
             # 返回新员工对象的序列化数据，结构与GET /api/active-employees一致
             return {'employee': employee_schema.dump(employee)}, 201
         
         except Exception as e:
-            # 打印错误信息
-            print(f"Error: {str(e)}")
+            # 记录错误信息
+            current_app.logger.exception('添加员工时出错')
             # 返回错误响应
-            return {'message': f'添加员工时出错 (Error adding employee): {str(e)}'}, 500
\ No newline at end of file
+            return {'message': f'添加员工时出错 (Error adding employee): {str(e)}'}, 500
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _validate_employee_row(row):
+    """
+    校验批量导入的一行员工数据
+
+    返回:
+    - (values, None): 校验通过，values 为可直接插入 employee 表的字段字典
+    - (None, message): 校验失败的原因
+    """
+    if not isinstance(row, dict):
+        return None, '每一行必须是对象 (Each row must be an object)'
+
+    def text(key):
+        value = row.get(key)
+        return '' if value is None else str(value).strip()
+
+    name = text('name')
+    position = text('position')
+    raw_date = text('efffective_date')
+
+    if not name:
+        return None, 'Name is required.'
+    if len(name) > 64:
+        return None, '姓名不能超过64个字符 (Name must be at most 64 characters)'
+    if not position:
+        return None, 'Position is required.'
+    if len(position) > 64:
+        return None, '职位不能超过64个字符 (Position must be at most 64 characters)'
+    if not raw_date:
+        return None, 'Hire date is required.'
+    try:
+        efffective_date = _parse_date(raw_date)
+    except ValueError:
+        return None, '日期格式应为YYYY-MM-DD (Date must be YYYY-MM-DD)'
+
+    return {'name': name, 'position': position, 'efffective_date': efffective_date}, None
+
+
+def _insert_employees(rows):
+    """
+    批量插入员工行，返回新员工的 (id, name) 列表
+
+    支持 executemany + RETURNING 的数据库（SQLite、PostgreSQL、MariaDB）一次往返写入所有行；
+    其他数据库（MySQL）逐行插入以取得自增 id。
+    """
+    table = Employee.__table__
+    if db.session.get_bind().dialect.insert_executemany_returning:
+        return db.session.execute(table.insert().returning(table.c.id, table.c.name), rows).all()
+    return [(db.session.execute(table.insert(), row).inserted_primary_key[0], row['name']) for row in rows]
+
+
+def _read_csv_rows(text, max_rows):
+    """读取 CSV 的行，最多读 max_rows + 1 行（多出的一行用于判断是否超过上限）"""
+    return list(islice(csv.DictReader(io.StringIO(text)), max_rows + 1))
+
+
+def _read_bulk_rows(max_rows):
+    """
+    从请求中读取待导入的行，支持三种格式：
+    - JSON 数组，或 {"employees": [...]}
+    - multipart/form-data 上传的 CSV 文件（字段名 file）
+    - 请求体直接是 CSV（Content-Type: text/csv）
+
+    CSV 第一行为表头：name,position,efffective_date
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        return _read_csv_rows(upload.read().decode('utf-8-sig'), max_rows)
+    if request.mimetype == 'text/csv':
+        return _read_csv_rows(request.get_data().decode('utf-8-sig'), max_rows)
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('employees')
+    if not isinstance(data, list):
+        raise ValueError('请求体应为员工数组或CSV文件 (Body must be a JSON array or a CSV file)')
+    return data
+
+
+class BulkEmployeesResource(Resource):
+    """
+    批量添加员工（新项目启动时一次入职几百人）
+
+    工作流程:
+    1. 读取 JSON 数组或 CSV 文件中的所有行
+    2. 逐行校验，收集每一行的错误
+    3. 校验通过的行用一条 INSERT 语句批量写入（executemany），整批只提交一次
+    4. 返回成功条数和每一行的错误
+
+    请求体超过 BULK_EMPLOYEE_MAX_BYTES 或行数超过 BULK_EMPLOYEE_MAX_ROWS 时返回 413，
+    CSV 最多只读取上限加一行，不会把超大的文件全部解析到内存中。
+
+    查询参数:
+    - strict: 为 true 时只要有一行出错就整批不写入，返回 400
+    """
+    @jwt_required()
+    def post(self):
+        # 解析请求体之前先检查大小：声明了 Content-Length 的直接比较，
+        # 分块传输（没有 Content-Length）的由 max_content_length 在读取时截断
+        max_bytes = current_app.config['BULK_EMPLOYEE_MAX_BYTES']
+        too_large = ({'message': f'请求体不能超过{max_bytes}字节 (Request body must not exceed {max_bytes} bytes)'},
+                     413)
+        if request.content_length is not None and request.content_length > max_bytes:
+            return too_large
+        request.max_content_length = max_bytes
+
+        max_rows = current_app.config['BULK_EMPLOYEE_MAX_ROWS']
+        try:
+            rows = _read_bulk_rows(max_rows)
+        except RequestEntityTooLarge:
+            return too_large
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return {'message': f'无法解析导入数据 (Cannot parse import data): {str(e)}'}, 400
+
+        if len(rows) > max_rows:
+            return {'message': f'单次最多导入{max_rows}行 (At most {max_rows} rows per request)'}, 413
+
+        try:
+            strict = boolean(request.args.get('strict', False))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        user_id = get_jwt_identity()
+        valid_rows = []
+        errors = []
+        # 行号从 1 开始，对应 JSON 数组的第几个元素 / CSV 表头之后的第几行
+        for row_number, row in enumerate(rows, start=1):
+            values, message = _validate_employee_row(row)
+            if message:
+                errors.append({'row': row_number, 'message': message})
+            else:
+                values.update(status='待岗', creator_id=user_id)
+                valid_rows.append(values)
+
+        if errors and strict:
+            return {'success': False, 'created': 0, 'errors': errors}, 400
+        if not valid_rows:
+            return {'success': False, 'created': 0, 'errors': errors}, 400
+
+        try:
+            # 绕过了 ORM，版本号（见 sync.py）和姓名搜索索引（见 search.py）在同一事务中直接写入
+            seq = transaction_seq(db.session)
+            for values in valid_rows:
+                values['updated_seq'] = seq
+            index_employee_names(db.session, _insert_employees(valid_rows))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f'批量添加员工时出错 (Error adding employees in bulk): {str(e)}'}, 500
+
+        return {'success': True, 'created': len(valid_rows), 'errors': errors}, 201
+
+
+# 项目在岗名单的查询参数
+roster_parser = reqparse.RequestParser()
+roster_parser.add_argument('as_of', type=_parse_date, location='args',
+                           help='日期格式应为YYYY-MM-DD (Date must be YYYY-MM-DD)')
+
+
+class ProjectRosterResource(Resource):
+    """
+    查询某个项目在某一天的在岗名单（"X 项目在 D 日有哪些人？"）
+
+    查询参数:
+    - as_of: 日期，格式 YYYY-MM-DD，默认今天
+
+    基于任职区间表（assignment）：区间 [valid_from, valid_to) 包含 as_of 的记录即为当天在岗，
+    由索引 (project_id, valid_to, valid_from) 支持，一次范围查询得到结果，不需要回放变动记录。
+    """
+    @jwt_required()
+    @replica_read
+    def get(self, id):
+        args = roster_parser.parse_args()
+        as_of = args['as_of'] or date.today()
+        try:
+            rows = db.session.execute(
+                select(Assignment.employee_id, Employee.name, Employee.position,
+                       Assignment.company_id, Assignment.valid_from, Assignment.valid_to)
+                .join(Employee, Employee.id == Assignment.employee_id)
+                .where(Assignment.project_id == id)
+                .where(Assignment.valid_to > as_of)
+                .where(Assignment.valid_from <= as_of)
+                .order_by(Assignment.employee_id)
+            ).all()
+            # 名单为空时才区分"项目不存在"和"当天没有人"
+            if not rows and db.session.get(Project, id) is None:
+                return {'message': '未找到项目 (Project not found)'}, 404
+            return {'project_id': id, 'as_of': as_of.isoformat(), 'employees': roster_schema.dump(rows)}, 200
+        except Exception as e:
+            return {'message': f'获取项目在岗名单时出错 (Error retrieving project roster): {str(e)}'}, 500
@@ -1,5 +1,8 @@
-from .resources import ActiveEmployeesResource, AddEmployeeResource
+from .resources import ActiveEmployeesResource, AddEmployeeResource, BulkEmployeesResource, EmployeeSearchResource, ProjectRosterResource
 
 def init_employee_routes(api):    
     api.add_resource(ActiveEmployeesResource, '/api/active-employees')
     api.add_resource(AddEmployeeResource, '/api/employees')
+    api.add_resource(BulkEmployeesResource, '/api/employees/bulk')
+    api.add_resource(EmployeeSearchResource, '/api/employees/search')
+    api.add_resource(ProjectRosterResource, '/api/projects/<int:id>/roster')
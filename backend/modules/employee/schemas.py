@@ -1,4 +1,5 @@
 from marshmallow import Schema, fields
+from .models import OPEN_END
 
 class EmployeeSchema(Schema):
     """
@@ -10,6 +11,7 @@ class EmployeeSchema(Schema):
     - position: 员工职位
     - efffective_date: 入职日期
     - status: 员工状态
+    - updated_seq: 行版本号（增量同步用）
     - company_id: 所属公司ID
     - company_name: 所属公司名称（通过get_company_name方法获取）
     - project_id: 所属项目ID
@@ -21,6 +23,7 @@ class EmployeeSchema(Schema):
     position = fields.Str()
     efffective_date = fields.Date()
     status = fields.Str()
+    updated_seq = fields.Int(dump_only=True)
     company_id = fields.Int()
     company_name = fields.Method("get_company_name")
     project_id = fields.Int()
@@ -41,4 +44,31 @@ class EmployeeSchema(Schema):
         :param obj: Employee对象
         :return: 项目名称
         """
-        return obj.project.name if obj.project else None
\ No newline at end of file
+        return obj.project.name if obj.project else None
+
+class RosterEntrySchema(Schema):
+    """
+    RosterEntrySchema类，用于序列化项目某天在岗名单中的一行（任职区间 + 员工信息）
+
+    字段:
+    - employee_id: 员工ID
+    - name: 员工姓名
+    - position: 员工职位
+    - company_id: 任职区间所属公司ID
+    - valid_from: 到岗日期
+    - valid_to: 离开日期，仍在岗时为 null
+    """
+    employee_id = fields.Int()
+    name = fields.Str()
+    position = fields.Str()
+    company_id = fields.Int()
+    valid_from = fields.Date()
+    valid_to = fields.Method("get_valid_to")
+
+    def get_valid_to(self, obj):
+        """
+        获取离开日期，仍在进行中的区间（OPEN_END）返回 None
+        :param obj: 查询结果行
+        :return: 日期字符串或 None
+        """
+        return None if obj.valid_to == OPEN_END else obj.valid_to.isoformat()
@@ -0,0 +1,123 @@
+"""
+员工姓名搜索（n-gram 索引）
+
+中文姓名通常只有 2~4 个字，没有分词可言，B 树索引也只能支持前缀匹配。
+这里维护一张 n-gram 辅助表（employee_name_gram）：每个姓名拆成单字和相邻两字。
+
+搜索关键词 q 时：
+1. 取 q 的 gram（单字关键词取它本身，两字及以上取所有相邻两字）
+2. 在 (gram, employee_id) 索引上找出包含全部 gram 的员工 —— 候选集很小
+3. 只对候选员工核对姓名是否包含 q（相邻两字都出现不代表整个关键词连续出现）
+4. 按 完全匹配 > 前缀匹配 > 包含 排序，同一档按 id 排序，做 keyset 分页
+
+这张表对 MySQL / PostgreSQL / SQLite 都适用，不依赖某种数据库的全文索引。
+
+索引的维护：
+- ORM 插入、修改姓名、删除员工时由下面注册的 mapper 事件同步维护（与员工写入在同一事务）
+- 批量导入（BulkEmployeesResource）和 flask seed 绕过 ORM，直接调用 index_employee_names / name_grams
+"""
+
+from sqlalchemy import and_, case, delete, event, func, insert, inspect, or_, select
+from .models import Employee, EmployeeNameGram
+
+# 搜索关键词的最大长度（与姓名列长度一致）
+MAX_QUERY_LENGTH = 64
+
+# 排序档位
+EXACT = 0
+PREFIX = 1
+CONTAINS = 2
+
+
+def normalize_name(name):
+    """去掉首尾空白并转为小写（英文名不区分大小写）"""
+    return (name or '').strip().lower()
+
+
+def name_grams(name):
+    """姓名的所有单字和相邻两字（去重）"""
+    text = normalize_name(name)
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def query_grams(query):
+    """搜索关键词需要匹配的 gram：单字关键词为它本身，否则为所有相邻两字"""
+    text = normalize_name(query)
+    if len(text) == 1:
+        return {text}
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def index_employee_names(connection, employees):
+    """为 (employee_id, name) 列表写入 gram 行（一次 executemany）"""
+    rows = [{'employee_id': employee_id, 'gram': gram}
+            for employee_id, name in employees for gram in sorted(name_grams(name))]
+    if rows:
+        connection.execute(insert(EmployeeNameGram), rows)
+
+
+def unindex_employee(connection, employee_id):
+    """删除员工的所有 gram 行"""
+    connection.execute(delete(EmployeeNameGram).where(EmployeeNameGram.employee_id == employee_id))
+
+
+@event.listens_for(Employee, 'after_insert')
+def _index_inserted_employee(mapper, connection, target):
+    index_employee_names(connection, [(target.id, target.name)])
+
+
+@event.listens_for(Employee, 'after_update')
+def _reindex_renamed_employee(mapper, connection, target):
+    if inspect(target).attrs.name.history.has_changes():
+        unindex_employee(connection, target.id)
+        index_employee_names(connection, [(target.id, target.name)])
+
+
+@event.listens_for(Employee, 'before_delete')
+def _unindex_deleted_employee(mapper, connection, target):
+    unindex_employee(connection, target.id)
+
+
+def rank_expression(query):
+    """排序档位：完全匹配 0，前缀匹配 1，其余（包含）2"""
+    text = normalize_name(query)
+    return case(
+        (func.lower(Employee.name) == text, EXACT),
+        (Employee.name.istartswith(text, autoescape=True), PREFIX),
+        else_=CONTAINS,
+    )
+
+
+def search_employees(base_query, query, cursor=None, limit=50):
+    """
+    在 base_query（Employee 查询，可带过滤条件和加载选项）中按姓名搜索
+
+    参数:
+    - query: 搜索关键词（已校验非空）
+    - cursor: 上一页最后一条的 (档位, id)，None 表示第一页
+    - limit: 每页条数
+
+    返回:
+    - (employees, next_key): 当前页员工列表和下一页的 (档位, id)，没有下一页时为 None
+    """
+    text = normalize_name(query)
+    grams = sorted(query_grams(text))
+    candidates = select(EmployeeNameGram.employee_id).where(EmployeeNameGram.gram.in_(grams))
+    if len(grams) > 1:
+        candidates = candidates.group_by(EmployeeNameGram.employee_id).having(func.count() == len(grams))
+
+    rank = rank_expression(text)
+    search = (base_query
+              .filter(Employee.id.in_(candidates))
+              .filter(Employee.name.icontains(text, autoescape=True))
+              .add_columns(rank.label('rank')))
+    if cursor:
+        last_rank, last_id = cursor
+        search = search.filter(or_(rank > last_rank, and_(rank == last_rank, Employee.id > last_id)))
+    rows = search.order_by(rank, Employee.id).limit(limit + 1).all()
+
+    next_key = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_key = (rows[-1].rank, rows[-1][0].id)
+    return [row[0] for row in rows], next_key
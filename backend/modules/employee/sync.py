@@ -0,0 +1,96 @@
+"""
+在岗名单的增量同步（行版本号）
+
+客户端原来在每次操作后都重新下载整个在岗名单，而通常只有一两行变了。
+现在每个员工行带一个版本号 updated_seq：
+
+- 计数器表 employee_sync_seq 只有一行。写员工的事务第一次需要版本号时把计数器 +1，
+  本事务写入（插入或修改）的所有员工行都记为这个值
+- 计数器行的写锁一直持有到事务提交，写员工的事务按版本号顺序依次提交：
+  读到计数器为 S 时，版本号 <= S 的修改都已提交。客户端下次带上 since=S，
+  只取 updated_seq > S 的行，不会漏掉正在提交的事务
+- 离开在岗名单的员工（离职、或不再符合过滤条件）以 removed（墓碑）返回，客户端从本地副本中删除
+
+版本号的写入：
+- ORM 插入、修改员工时由下面注册的 mapper 事件写入
+- 绕过 ORM 的语句（批量导入、确认变动的集合 UPDATE）调用 transaction_seq 取得版本号，自己写入
+"""
+
+from sqlalchemy import and_, event, or_, select, update
+from sqlalchemy.orm import Session, object_session
+from .models import Employee, EmployeeSyncSeq
+
+# session.info 中缓存本事务版本号的键
+_SEQ_KEY = '_employee_sync_seq'
+
+
+def transaction_seq(session, connection=None):
+    """
+    本事务写入员工行使用的版本号：第一次调用时把计数器 +1 并读出，之后返回同一个值
+
+    connection: 在 flush 过程中（mapper 事件）调用时传入当前连接
+    """
+    seq = session.info.get(_SEQ_KEY)
+    if seq is None:
+        connection = connection or session.connection()
+        table = EmployeeSyncSeq.__table__
+        connection.execute(update(table).where(table.c.id == 1).values(value=table.c.value + 1))
+        seq = connection.execute(select(table.c.value).where(table.c.id == 1)).scalar_one()
+        session.info[_SEQ_KEY] = seq
+    return seq
+
+
+def current_seq(session):
+    """已提交的最大版本号（计数器的当前值），客户端下次同步时作为 since 传回"""
+    table = EmployeeSyncSeq.__table__
+    return session.execute(select(table.c.value).where(table.c.id == 1)).scalar() or 0
+
+
+@event.listens_for(Employee, 'before_insert')
+def _stamp_inserted_employee(mapper, connection, target):
+    target.updated_seq = transaction_seq(object_session(target), connection)
+
+
+@event.listens_for(Employee, 'before_update')
+def _stamp_updated_employee(mapper, connection, target):
+    session = object_session(target)
+    if session.is_modified(target, include_collections=False):
+        target.updated_seq = transaction_seq(session, connection)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _forget_transaction_seq(session, transaction):
+    # 事务或 SAVEPOINT 结束后丢弃缓存的版本号：回滚时计数器的修改一起撤销，
+    # 提交后下一个事务需要新的版本号。多取一次只会让版本号跳过一个值，不影响正确性
+    # （flush 内部的子事务结束时不丢弃，同一事务的多次 flush 共用一个版本号）
+    if transaction.parent is None or transaction.nested:
+        session.info.pop(_SEQ_KEY, None)
+
+
+def sync_page(base_query, matches, since, cursor=None, limit=50):
+    """
+    增量同步：返回 updated_seq > since 的员工，按 (updated_seq, id) 分页
+
+    参数:
+    - base_query: Employee 查询（可带加载选项），不要加在岗/过滤条件，
+      否则离开名单的员工查不出来，无法返回墓碑
+    - matches(employee): 员工当前是否在客户端的名单中（在岗且符合过滤条件）
+    - cursor: 上一页最后一条的 (updated_seq, id)，None 表示第一页
+
+    返回:
+    - (changed, removed, next_key): 需要新增或更新的员工、需要删除的员工ID、下一页的 (updated_seq, id)
+    """
+    query = base_query.filter(Employee.updated_seq > since)
+    if cursor:
+        last_seq, last_id = cursor
+        query = query.filter(or_(Employee.updated_seq > last_seq,
+                                 and_(Employee.updated_seq == last_seq, Employee.id > last_id)))
+    rows = query.order_by(Employee.updated_seq, Employee.id).limit(limit + 1).all()
+
+    next_key = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_key = (rows[-1].updated_seq, rows[-1].id)
+    changed = [employee for employee in rows if matches(employee)]
+    removed = [employee.id for employee in rows if not matches(employee)]
+    return changed, removed, next_key
@@ -0,0 +1,3 @@
+from .resources import HeadcountResource, headcount_cache
+from .routes import init_stats_routes
+__all__ = ['HeadcountResource', 'headcount_cache', 'init_stats_routes']
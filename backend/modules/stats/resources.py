@@ -0,0 +1,27 @@
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from cache import VersionedCache, invalidate_on_commit
+from modules.change import ChangeRequest
+from modules.employee import Employee
+from .services import compute_headcount
+
+# 人数统计需要扫描整张员工表和变动表，结果缓存在进程内：
+# 员工或变动有写入并提交后（添加员工、批量导入、审批变动、到期应用变动）版本号 +1，下次请求重新计算；
+# ttl 兜底其他进程写入的情况。仪表盘反复刷新时只读缓存，不再扫表。
+# 与公司目录相同，缓存的加载读主库，不读可能落后的从库（见 modules/company/resources.py）。
+headcount_cache = VersionedCache('headcount', ttl=60)
+invalidate_on_commit(headcount_cache, Employee, ChangeRequest)
+
+
+class HeadcountResource(Resource):
+    """
+        处理GET请求，返回人数统计：按公司、项目、状态的人数，以及每月入职和离职人数
+
+        统计由数据库 GROUP BY 计算（见 services.py），结果缓存到下一次相关写入提交为止。
+    """
+    @jwt_required()
+    def get(self):
+        try:
+            return headcount_cache.get_or_load('headcount', compute_headcount), 200
+        except Exception as e:
+            return {'message': f'获取人数统计时出错 (Error retrieving headcount statistics): {str(e)}'}, 500
@@ -0,0 +1,4 @@
+from .resources import HeadcountResource
+
+def init_stats_routes(api):
+    api.add_resource(HeadcountResource, '/api/stats/headcount')
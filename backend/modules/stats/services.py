@@ -0,0 +1,87 @@
+"""
+人数统计的聚合查询
+
+全部在数据库中用 GROUP BY 完成，返回的是聚合后的几百行，而不是几十万行员工明细：
+- 按 公司、项目、状态 统计员工人数（一条 GROUP BY）
+- 按月统计入职人数（employee.hire_date）和离职人数（已确认/待生效的离职变动的生效日期）
+
+这些查询需要扫描整张员工表/变动表，结果由 resources.py 中的 headcount_cache 缓存，
+员工或变动有写入并提交后才重新计算。
+"""
+
+from sqlalchemy import extract, func, select
+from extensions import db
+from modules.change import ChangeRequest
+from modules.company import Company, Project
+from modules.employee import Employee
+
+# 计入离职人数的变动状态：已确认（已生效）和待生效（已确认、生效日期在未来）
+LEAVER_STATUSES = ('已确认', '待生效')
+
+
+def _headcount_rows():
+    """(company_id, company_name, project_id, project_name, 项目所属公司, status, 人数)"""
+    return db.session.execute(
+        select(Employee.company_id, Company.name, Employee.project_id, Project.name, Project.company_id,
+               Employee.status, func.count())
+        .outerjoin(Company, Company.id == Employee.company_id)
+        .outerjoin(Project, Project.id == Employee.project_id)
+        .group_by(Employee.company_id, Company.name, Employee.project_id, Project.name, Project.company_id,
+                  Employee.status)
+        .order_by(Employee.company_id, Employee.project_id, Employee.status)
+    ).all()
+
+
+def _monthly_counts(date_column, *conditions):
+    """{(年, 月): 人数}，按 date_column 所在月份分组"""
+    year = extract('year', date_column)
+    month = extract('month', date_column)
+    rows = db.session.execute(
+        select(year, month, func.count())
+        .where(date_column.isnot(None), *conditions)
+        .group_by(year, month)
+    ).all()
+    return {(int(y), int(m)): count for y, m, count in rows}
+
+
+def _add(groups, key, fields, status, count):
+    group = groups.get(key)
+    if group is None:
+        group = groups[key] = dict(fields, total=0, by_status={})
+    group['by_status'][status] = group['by_status'].get(status, 0) + count
+    group['total'] += count
+
+
+def compute_headcount():
+    """
+    计算人数统计，返回可直接序列化为 JSON 的字典
+
+    - total / by_status: 全部员工人数及按状态的人数
+    - by_company / by_project: 按公司、项目的人数（含按状态细分），未分配公司/项目的员工 id 为 null
+    - monthly: 每月入职人数（joiners）和离职人数（leavers），按月份升序
+    """
+    by_status = {}
+    companies = {}
+    projects = {}
+    for company_id, company_name, project_id, project_name, project_company_id, status, count in _headcount_rows():
+        by_status[status] = by_status.get(status, 0) + count
+        _add(companies, company_id, {'company_id': company_id, 'company_name': company_name}, status, count)
+        _add(projects, project_id, {'project_id': project_id, 'project_name': project_name,
+                                    'company_id': project_company_id}, status, count)
+
+    joiners = _monthly_counts(Employee.hire_date)
+    leavers = _monthly_counts(ChangeRequest.effective_date, ChangeRequest.type == '离职',
+                              ChangeRequest.status.in_(LEAVER_STATUSES))
+    monthly = [
+        {'month': f'{year:04d}-{month:02d}', 'joiners': joiners.get((year, month), 0),
+         'leavers': leavers.get((year, month), 0)}
+        for year, month in sorted(joiners.keys() | leavers.keys())
+    ]
+
+    return {
+        'total': sum(by_status.values()),
+        'by_status': by_status,
+        'by_company': list(companies.values()),
+        'by_project': list(projects.values()),
+        'monthly': monthly,
+    }
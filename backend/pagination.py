@@ -0,0 +1,123 @@
+"""
+pagination.py - 游标（keyset）分页工具
+
+列表接口不再一次性返回整张表，而是按主键 id 升序分页：
+- 客户端第一次请求不带 cursor，服务端返回第一页和 next_cursor
+- 客户端带上 next_cursor 请求下一页，服务端执行 WHERE id > 上一页最后一个id
+- next_cursor 为 null 表示已经是最后一页
+
+与 OFFSET 分页相比，keyset 分页每一页都只需沿主键索引扫描 limit+1 行，
+翻到第几页都不会变慢，也不会因为中途插入新数据而出现重复或遗漏。
+
+游标对客户端是"不透明"的字符串（base64编码的JSON），客户端只需原样回传，
+这样以后调整排序键时不会破坏前端代码。
+"""
+
+import base64
+import binascii
+import json
+
+# 默认每页条数和允许的最大条数
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# 总数响应头（仅在请求参数 with_total=true 时返回，因为 COUNT 需要额外扫描）
+TOTAL_COUNT_HEADER = 'X-Total-Count'
+
+
+def _encode(payload):
+    data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _decode(cursor, *keys):
+    """解析游标中的整数字段 keys，格式不合法时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [payload[key] for key in keys]
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise ValueError('无效的游标 (Invalid cursor)')
+    if any(not isinstance(value, int) or isinstance(value, bool) for value in values):
+        raise ValueError('无效的游标 (Invalid cursor)')
+    return values
+
+
+def encode_cursor(last_id):
+    """将上一页最后一条记录的 id 编码为不透明游标"""
+    return _encode({'id': last_id})
+
+
+def decode_cursor(cursor):
+    """
+    解析游标，返回上一页最后一条记录的 id
+
+    游标格式不合法时抛出 ValueError，由调用方转换为 400 响应。
+    """
+    return _decode(cursor, 'id')[0]
+
+
+def encode_ranked_cursor(rank, last_id):
+    """按 (排序档位, id) 分页的游标，如搜索结果"""
+    return _encode({'rank': rank, 'id': last_id})
+
+
+def decode_ranked_cursor(cursor):
+    """解析 encode_ranked_cursor 生成的游标，返回 (rank, id)；格式不合法时抛出 ValueError"""
+    return tuple(_decode(cursor, 'rank', 'id'))
+
+
+def encode_seq_cursor(seq, last_id):
+    """按 (版本号, id) 分页的游标，如在岗名单的增量同步"""
+    return _encode({'seq': seq, 'id': last_id})
+
+
+def decode_seq_cursor(cursor):
+    """解析 encode_seq_cursor 生成的游标，返回 (seq, id)；格式不合法时抛出 ValueError"""
+    return tuple(_decode(cursor, 'seq', 'id'))
+
+
+def page_size(value):
+    """reqparse 的 type 函数：校验每页条数在 1 ~ MAX_PAGE_SIZE 之间"""
+    size = int(value)
+    if size < 1 or size > MAX_PAGE_SIZE:
+        raise ValueError(f'limit 必须在 1 到 {MAX_PAGE_SIZE} 之间 (limit must be between 1 and {MAX_PAGE_SIZE})')
+    return size
+
+
+def boolean(value):
+    """reqparse 的 type 函数：解析 true/false、1/0 等布尔参数"""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'yes', 'on'):
+        return True
+    if text in ('0', 'false', 'no', 'off', ''):
+        return False
+    raise ValueError('无效的布尔值 (Invalid boolean value)')
+
+
+def keyset_page(query, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    对 query 执行 keyset 分页
+
+    参数:
+    - query: 已经加好过滤条件的 SQLAlchemy 查询
+    - id_column: 排序/分页键（唯一的整数列），如 Employee.id
+    - cursor: 客户端传回的游标，None 表示第一页
+    - limit: 每页条数
+
+    返回:
+    - (items, next_cursor): 当前页的记录列表和下一页游标（没有下一页时为 None）
+
+    多取一条（limit + 1）用来判断是否还有下一页，避免额外的 COUNT 查询。
+    """
+    if cursor:
+        query = query.filter(id_column > decode_cursor(cursor))
+    rows = query.order_by(id_column.asc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], id_column.key))
+    return rows, next_cursor
@@ -0,0 +1,140 @@
+"""
+pooling.py - 数据库引擎调优与连接池监控
+
+1. 连接时执行的设置（按数据库类型）：
+   - SQLite: SQLITE_PRAGMAS 中的 PRAGMA（如 journal_mode=WAL、synchronous=NORMAL、busy_timeout）
+   - MySQL / PostgreSQL: STATEMENT_TIMEOUT_MS 语句超时
+     （MySQL 为 max_execution_time，只对 SELECT 生效；PostgreSQL 为 statement_timeout）
+2. 连接池监控：TimedQueuePool 记录每次取连接的等待时间和超时次数，
+   /metrics 输出等待时间直方图、已借出连接数和饱和度（已借出 / (pool_size + max_overflow)），
+   用来对照 worker 数量调整连接池大小：饱和度长期接近 1 或等待时间明显上升，说明连接池偏小。
+
+连接池大小等参数通过 SQLALCHEMY_ENGINE_OPTIONS 配置，见 config.py 中的各环境配置。
+"""
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# 取连接等待时间直方图的桶（秒）
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class TimedQueuePool(QueuePool):
+    """记录取连接等待时间的 QueuePool（用法与 QueuePool 相同，通过 poolclass 指定）"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.timeouts = 0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            self._record_wait(time.perf_counter() - started)
+
+    def _record_wait(self, seconds):
+        with self._stats_lock:
+            self.wait_count += 1
+            self.wait_sum += seconds
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[i] += 1
+
+    def capacity(self):
+        """最多可同时借出的连接数；max_overflow 为 -1（不限）时返回 None"""
+        return None if self._max_overflow < 0 else self.size() + self._max_overflow
+
+
+def configure_engine(engine, config):
+    """按配置为引擎注册连接时执行的设置"""
+    dialect = engine.dialect.name
+    pragmas = config.get('SQLITE_PRAGMAS') or {}
+    timeout_ms = config.get('STATEMENT_TIMEOUT_MS')
+
+    if dialect == 'sqlite' and pragmas:
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+            cursor.close()
+
+    elif dialect in ('mysql', 'mariadb', 'postgresql') and timeout_ms:
+        statement = (f'SET SESSION max_execution_time = {int(timeout_ms)}' if dialect != 'postgresql'
+                     else f'SET statement_timeout = {int(timeout_ms)}')
+
+        @event.listens_for(engine, 'connect')
+        def set_statement_timeout(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(statement)
+            cursor.close()
+
+
+class PoolMonitor:
+    """
+    为应用的所有引擎（主库和从库）注册连接设置，并把连接池状态加入 /metrics
+
+    在 db.init_app 和 replica_router.init_app 之后调用 init_app。
+    """
+
+    def init_app(self, app, db, metrics):
+        with app.app_context():
+            engines = self._engines(app, db)
+        for engine in engines.values():
+            configure_engine(engine, app.config)
+        app.extensions['pool_engines'] = engines
+        metrics.register_collector(self._collect)
+
+    @staticmethod
+    def _engines(app, db):
+        engines = {'primary' if key is None else key: engine for key, engine in db.engines.items()}
+        for i, engine in enumerate(app.extensions.get('replica_engines', [])):
+            engines[f'replica_{i}'] = engine
+        return engines
+
+    @staticmethod
+    def _collect():
+        from flask import current_app
+
+        pools = [(name, engine.pool) for name, engine in current_app.extensions.get('pool_engines', {}).items()
+                 if isinstance(engine.pool, TimedQueuePool)]
+        if not pools:
+            return []
+
+        lines = []
+        for metric, kind, help_text, value in (
+            ('db_pool_size', 'gauge', 'Configured pool size.', lambda p: p.size()),
+            ('db_pool_checked_out', 'gauge', 'Connections currently checked out.', lambda p: p.checkedout()),
+            ('db_pool_saturation_ratio', 'gauge', 'Checked out connections / (pool_size + max_overflow).',
+             lambda p: f'{p.checkedout() / p.capacity():.4f}' if p.capacity() else 0),
+            ('db_pool_checkout_timeouts_total', 'counter', 'Checkouts that failed waiting for a connection.',
+             lambda p: p.timeouts),
+        ):
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+            lines += [f'{metric}{{pool="{name}"}} {value(pool)}' for name, pool in pools]
+
+        lines += [
+            '# HELP db_pool_checkout_wait_seconds Time spent waiting for a pooled connection.',
+            '# TYPE db_pool_checkout_wait_seconds histogram',
+        ]
+        for name, pool in pools:
+            with pool._stats_lock:
+                buckets, count, total = list(pool.wait_buckets), pool.wait_count, pool.wait_sum
+            for bound, bucket in zip(WAIT_BUCKETS, buckets):
+                lines.append(f'db_pool_checkout_wait_seconds_bucket{{pool="{name}",le="{bound}"}} {bucket}')
+            lines.append(f'db_pool_checkout_wait_seconds_bucket{{pool="{name}",le="+Inf"}} {count}')
+            lines.append(f'db_pool_checkout_wait_seconds_sum{{pool="{name}"}} {total:.6f}')
+            lines.append(f'db_pool_checkout_wait_seconds_count{{pool="{name}"}} {count}')
+        return lines
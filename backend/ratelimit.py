@@ -0,0 +1,237 @@
+"""
+ratelimit.py - 按路由、按用户/IP 的令牌桶限流
+
+原来没有任何限流：一个出错的脚本反复请求 /api/auth/login 或 /api/active-employees，
+就能占满所有 worker，其他用户的请求全部排队。
+
+现在按 RATELIMIT_RULES 为路由配置令牌桶：
+- 每个 (路由, 身份) 一个桶，容量为 limit，每 period 秒补满（每秒补充 limit / period 个令牌），
+  允许短时间内连续请求 limit 次，之后按平均速率放行
+- 身份：登录后的接口按 JWT 中的用户ID；注册等按客户端 IP（规则中 'key': 'ip'）；
+  'ip_username' 按客户端 IP + 请求体中的用户名；没有带有效令牌的请求也按 IP
+- 一个路由可以配置多个桶，按顺序取令牌，任何一个没有令牌就返回 429（后面的桶不再扣减）。
+  登录先按 IP：一个脚本轮换用户名也只有这一个配额，用户名桶的数量也就受它限制；
+  再按 IP + 用户名：同一 IP 对单个账号的尝试次数更少
+- 客户端 IP 取 request.remote_addr，部署在反向代理之后时需要配置 TRUSTED_PROXY_HOPS（见 app.py 的 ProxyFix），
+  否则所有请求都是代理的 IP
+- 桶里没有令牌时直接返回 429 和 Retry-After（需要等待的秒数），不进入处理函数
+- 没有配置规则的路由只多一次字典查找
+
+令牌桶的存储（RATELIMIT_STORAGE）：
+- 'memory'（默认）: 每个进程各自计数，一次加锁的字典操作，不访问数据库；
+  N 个进程时同一身份最多能得到 N 倍的配额
+- 'database': rate_limit_bucket 表，所有进程共享，计数准确；每个受限的请求多一条 UPDATE
+"""
+
+import math
+import threading
+import time
+
+from flask import current_app, request
+from flask_jwt_extended import decode_token
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from representations import output_json
+
+# 清理空闲令牌桶的间隔（秒）
+PRUNE_INTERVAL_SECONDS = 60
+# 规则中 key 的取值
+KEY_TYPES = ('user', 'ip', 'ip_username')
+# 桶名中用户名的最大长度（rate_limit_bucket.key 为 255 个字符）
+MAX_USERNAME_LENGTH = 150
+
+
+def _refill(tokens, elapsed, rate, capacity):
+    return min(capacity, tokens + max(elapsed, 0) * rate)
+
+
+class MemoryBucketStore:
+    """进程内的令牌桶：{桶: (令牌数, 更新时间)}"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+        self._idle_seconds = 0
+
+    def take(self, key, rate, capacity, now=None):
+        """从桶中取一个令牌：成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, now - updated, rate, capacity)
+            self._idle_seconds = max(self._idle_seconds, capacity / rate)
+            if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+                self._prune(now)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def _prune(self, now):
+        # 空闲时间足以补满的桶与不存在的桶等价，删除后内存不会随访问过的IP数无限增长
+        self._last_prune = now
+        idle = [key for key, (_, updated) in self._buckets.items() if now - updated >= self._idle_seconds]
+        for key in idle:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class DatabaseBucketStore:
+    """数据库中的令牌桶：rate_limit_bucket 表，所有进程共享"""
+
+    def __init__(self, db):
+        from modules.auth.models import RateLimitBucket
+        self._db = db
+        self._table = RateLimitBucket.__table__
+        self._last_prune = time.time()
+        self._idle_seconds = 0
+
+    def take(self, key, rate, capacity, now=None):
+        """
+        从桶中取一个令牌：成功返回 0，否则返回需要等待的秒数
+
+        补充和扣减在一条 UPDATE 中完成（令牌不足时不更新），并发的请求由行锁排队，不会多扣或少扣。
+        """
+        now = time.time() if now is None else now
+        session = self._db.session
+        table = self._table
+        elapsed = case((table.c.updated_at > now, 0), else_=now - table.c.updated_at)
+        refilled = table.c.tokens + elapsed * rate
+        tokens = case((refilled > capacity, capacity), else_=refilled)
+        self._idle_seconds = max(self._idle_seconds, capacity / rate)
+
+        for _ in range(2):
+            taken = session.execute(
+                update(table).where(table.c.key == key, tokens >= 1).values(tokens=tokens - 1, updated_at=now)
+            ).rowcount
+            if taken:
+                session.commit()
+                self.prune_if_due()
+                return 0
+            row = session.execute(select(table.c.tokens, table.c.updated_at).where(table.c.key == key)).one_or_none()
+            if row is not None:
+                session.commit()
+                return (1 - _refill(row.tokens, now - row.updated_at, rate, capacity)) / rate
+            try:
+                session.execute(insert(table).values(key=key, tokens=capacity - 1, updated_at=now))
+                session.commit()
+                return 0
+            except IntegrityError:
+                # 其他进程同时创建了这个桶，重新按 UPDATE 扣减
+                session.rollback()
+        return 1 / rate
+
+    def prune(self, now=None):
+        """删除空闲时间足以补满的桶（与不存在等价），返回删除的行数"""
+        now = time.time() if now is None else now
+        deleted = self._db.session.execute(
+            delete(self._table).where(self._table.c.updated_at < now - self._idle_seconds)
+        ).rowcount
+        self._db.session.commit()
+        return deleted
+
+    def prune_if_due(self):
+        """距上次清理超过 PRUNE_INTERVAL_SECONDS 时清理一次"""
+        now = time.time()
+        if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self._last_prune = now
+            self.prune(now)
+
+    def clear(self):
+        self._db.session.execute(delete(self._table))
+        self._db.session.commit()
+
+
+class RateLimiter:
+    """按 RATELIMIT_RULES 在 before_request 中检查令牌桶"""
+
+    def __init__(self):
+        self._store = MemoryBucketStore()
+        self._rules = {}
+
+    def init_app(self, app, db):
+        """
+        读取配置：
+        - RATELIMIT_ENABLED: 是否启用限流
+        - RATELIMIT_STORAGE: 'memory'（默认）或 'database'
+        - RATELIMIT_RULES: {路由: {'limit': 次数, 'period': 秒数, 'key': 'user'、'ip' 或 'ip_username'}}，
+          路由与 Flask 的 URL 规则相同（如 '/api/pending-changes/<int:id>/transfer'），key 默认为 'user'；
+          值也可以是这样的字典组成的列表，每个都是一个桶
+        """
+        storage = app.config.get('RATELIMIT_STORAGE', 'memory')
+        if storage == 'database':
+            self._store = DatabaseBucketStore(db)
+        elif storage == 'memory':
+            self._store = MemoryBucketStore()
+        else:
+            raise ValueError(f'未知的限流存储 (Unknown rate limit storage): {storage}')
+
+        self._rules = {}
+        for rule, options in (app.config.get('RATELIMIT_RULES') or {}).items():
+            limits = []
+            for bucket in options if isinstance(options, (list, tuple)) else [options]:
+                limit, period, key = bucket['limit'], bucket['period'], bucket.get('key', 'user')
+                if limit < 1 or period <= 0 or key not in KEY_TYPES:
+                    raise ValueError(f'限流规则不合法 (Invalid rate limit rule): {rule} {options}')
+                limits.append((limit / period, limit, key))
+            if not limits:
+                raise ValueError(f'限流规则不合法 (Invalid rate limit rule): {rule} {options}')
+            self._rules[rule] = limits
+
+        app.extensions['ratelimit'] = self
+        if app.config.get('RATELIMIT_ENABLED', True) and self._rules:
+            app.before_request(self._check)
+
+    @property
+    def store(self):
+        return self._store
+
+    def _check(self):
+        rule = request.url_rule
+        limits = self._rules.get(rule.rule) if rule is not None else None
+        if limits is None or request.method == 'OPTIONS':
+            return None
+
+        for rate, capacity, key in limits:
+            bucket = _bucket_name(rule.rule, key)
+            wait = self._store.take(bucket, rate, capacity)
+            if wait > 0:
+                current_app.logger.info('请求被限流 (Rate limited): %s %s', request.method, bucket)
+                return output_json({'message': '请求过于频繁，请稍后重试 (Too many requests, please retry later)'},
+                                   429, {'Retry-After': str(max(1, math.ceil(wait)))})
+        return None
+
+
+def _bucket_name(rule, key):
+    """请求在规则 rule 的 key 类型桶中的名称"""
+    identity = _user_identity() if key == 'user' else None
+    if identity is not None:
+        return f'{rule}|user:{identity}'
+    if key == 'ip_username':
+        return f'{rule}|ip:{request.remote_addr}|username:{_request_username()}'
+    return f'{rule}|ip:{request.remote_addr}'
+
+
+def _user_identity():
+    """请求中有效的 JWT 的用户ID，没有令牌或令牌无效时为 None（按 IP 限流）"""
+    header = request.headers.get('Authorization', '')
+    token = header[7:] if header.startswith('Bearer ') else request.args.get('jwt')
+    if not token:
+        return None
+    try:
+        return decode_token(token)[current_app.config.get('JWT_IDENTITY_CLAIM', 'sub')]
+    except Exception:
+        return None
+
+
+def _request_username():
+    """请求体（JSON）中的用户名，没有时为空字符串"""
+    body = request.get_json(silent=True)
+    username = body.get('username') if isinstance(body, dict) else None
+    return str(username)[:MAX_USERNAME_LENGTH] if username is not None else ''
@@ -0,0 +1,55 @@
+"""
+representations.py - flask_restful 的 JSON 响应序列化
+
+flask_restful 默认用标准库 json 编码响应：
+- 速度慢：在岗名单、待确认名单这类大列表的编码时间在性能剖析中很明显
+- 中文被转义成 \\uXXXX：同样的内容，响应体积接近原来的 2 倍
+
+这里注册自定义的 application/json 表示（representation）：
+- 安装了 orjson 时使用 orjson 编码（C 实现，原生支持 date/datetime，不转义非 ASCII 字符）
+- 没有安装 orjson 时退回标准库 json（ensure_ascii=False，同样不转义中文）
+
+性能对比见 benchmarks/bench_json.py。
+"""
+
+import datetime
+import decimal
+import json
+import time
+
+from flask import make_response
+
+from metrics import RequestMetrics
+
+try:
+    import orjson
+except ImportError:  # orjson 是可选依赖
+    orjson = None
+
+
+def _default(obj):
+    """编码器不认识的类型：日期转 ISO 字符串，Decimal 转浮点数"""
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """把数据编码为 UTF-8 的 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def output_json(data, code, headers=None):
+    """flask_restful 的 application/json 表示：生成 JSON 响应"""
+    started = time.perf_counter()
+    body = dumps(data)
+    RequestMetrics.record_serialization(time.perf_counter() - started)
+
+    resp = make_response(body, code)
+    resp.headers.extend(headers or {})
+    resp.headers['Content-Type'] = 'application/json'
+    return resp
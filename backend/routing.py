@@ -0,0 +1,147 @@
+"""
+routing.py - 读写分离：只读 GET 接口读从库，写操作走主库
+
+配置 SQLALCHEMY_REPLICA_URIS（从库连接URL列表）后：
+- 用 @replica_read 标记的接口，查询发往从库（多个从库时随机选一个）
+- 所有写操作（ORM flush、INSERT/UPDATE/DELETE、SELECT ... FOR UPDATE）始终发往主库
+- 读己之写：
+  * 同一个请求里一旦写过，之后的查询都走主库
+  * 登录用户写过之后的 REPLICA_READ_AFTER_WRITE_SECONDS 秒内，他的请求即使是 @replica_read 接口也读主库，
+    避免从库复制延迟导致"刚提交的数据查不到"。按 JWT 中的用户ID记在进程内（不依赖 cookie：
+    前端跨域调用 API，不带 cookie）；多个进程时写请求的响应还带有 PRIMARY_UNTIL_HEADER 响应头，
+    前端在之后的请求中原样带回，落到其他进程的请求同样读主库
+- 没有配置从库时一切照旧，所有查询都走主库
+
+由 VersionedCache 缓存结果的接口（公司/项目目录、人数统计）不加 @replica_read：
+缓存在提交后立即失效，紧接着的加载如果读到复制延迟中的从库，旧数据会以新版本号缓存到 ttl 结束。
+
+路由由会话类 RoutingSession.get_bind 完成，资源代码不需要关心连接的是哪个库。
+请求级的路由标记保存在 session.info 中，每个请求开始时清空。
+
+从库引擎由 ReplicaRouter 自己创建（保存在 app.extensions['replica_engines']），
+而不是写进 SQLALCHEMY_BINDS：Flask-SQLAlchemy 会为每个绑定键登记一份全局的 MetaData，
+db.create_all() / drop_all() 会连同从库一起处理，而从库的表结构应由复制同步，不能由应用创建。
+"""
+
+import random
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+# 写请求的响应头和前端带回的请求头：在此时间戳（秒）之前的请求都读主库
+PRIMARY_UNTIL_HEADER = 'X-DB-Primary-Until'
+# 进程内记录的用户数超过该值时清理已过期的记录
+MAX_TRACKED_WRITERS = 10000
+
+# session.info 中的请求级标记
+_READ_REPLICA = 'read_replica'
+_WROTE = 'wrote'
+
+
+def _is_write(clause):
+    if isinstance(clause, UpdateBase):
+        return True
+    return isinstance(clause, Select) and clause._for_update_arg is not None
+
+
+class RoutingSession(Session):
+    """
+    按读写路由的会话：写操作和写过之后的读取走主库，
+    当前请求标记为只读（@replica_read）时其余读取走从库
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or _is_write(clause):
+                self.info[_WROTE] = True
+            elif self.info.get(_READ_REPLICA) and not self.info.get(_WROTE):
+                replicas = current_app.extensions.get('replica_engines')
+                if replicas:
+                    return random.choice(replicas)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_read(func):
+    """
+    资源方法装饰器：本次请求的查询发往从库
+
+    放在 @jwt_required() 之下，令牌黑名单检查仍然读主库。
+    当前用户刚写过，或请求带有未过期的 PRIMARY_UNTIL_HEADER 时不切换，继续读主库。
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        from extensions import db, replica_router
+
+        try:
+            primary_until = float(request.headers.get(PRIMARY_UNTIL_HEADER, 0))
+        except ValueError:
+            primary_until = 0
+        primary_until = max(primary_until, replica_router.primary_until(_current_identity()))
+        if primary_until <= time.time():
+            db.session.info[_READ_REPLICA] = True
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def _current_identity():
+    """本次请求已验证的 JWT 用户ID，没有验证过令牌时为 None"""
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+class ReplicaRouter:
+    """创建从库引擎，注册读己之写的请求钩子"""
+
+    def __init__(self):
+        # {用户ID: 读主库截止的时间戳}
+        self._writers = {}
+        self._lock = threading.Lock()
+
+    def primary_until(self, identity):
+        """用户 identity 的请求读主库截止的时间戳，没有写过时为 0"""
+        if identity is None:
+            return 0
+        with self._lock:
+            return self._writers.get(identity, 0)
+
+    def remember_writer(self, identity, until):
+        """记录用户 identity 在 until 之前读主库"""
+        with self._lock:
+            if len(self._writers) >= MAX_TRACKED_WRITERS:
+                now = time.time()
+                self._writers = {key: value for key, value in self._writers.items() if value > now}
+            self._writers[identity] = until
+
+    def init_app(self, app, db):
+        self._writers = {}
+        replica_uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+        if not replica_uris:
+            return
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+        app.extensions['replica_engines'] = [create_engine(uri, **options) for uri in replica_uris]
+
+        @app.before_request
+        def reset_route():
+            # 测试等场景下多个请求可能共用同一个会话，每个请求开始时清空路由标记
+            db.session.info.pop(_READ_REPLICA, None)
+            db.session.info.pop(_WROTE, None)
+
+        @app.after_request
+        def remember_write(response):
+            window = current_app.config.get('REPLICA_READ_AFTER_WRITE_SECONDS')
+            if window and db.session.info.get(_WROTE):
+                until = time.time() + window
+                identity = _current_identity()
+                if identity is not None:
+                    self.remember_writer(identity, until)
+                response.headers[PRIMARY_UNTIL_HEADER] = f'{until:.3f}'
+            return response
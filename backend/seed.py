@@ -0,0 +1,426 @@
+"""
+seed.py - 批量生成/导入数据的 flask seed 命令
+
+init_db.py 只负责导入公司和项目目录（initial_data.json 或HR系统的组织架构导出）。
+压测和基准测试还需要几十万行员工和变动数据，这里用 SQLAlchemy Core 批量生成：
+- executemany 批量插入，不创建 ORM 对象
+- 每块（CHUNK_SIZE 行）一个事务，既不会一次占用过多内存，也不用每行提交一次
+- 生成的数据由随机种子决定，同样的参数总是生成同样的数据
+
+用法（在 backend 目录下执行）:
+    flask seed --scale large --seed 42          # 按预设规模生成
+    flask seed --employees 50000 --changes 0    # 在预设规模基础上覆盖某些表的行数
+    flask seed --file data/seed.json            # 从 JSON 文件导入
+
+数据库中已有数据时，生成的行从各表当前最大ID之后继续编号，不会主键冲突。
+"""
+
+import gc
+import json
+import random
+import time
+from datetime import date, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+
+from modules.auth.passwords import password_hasher
+from modules.employee import OPEN_END, name_grams
+
+# 预设规模：公司、项目、用户、员工、变动请求的条数
+SCALES = {
+    'tiny': {'companies': 3, 'projects': 12, 'users': 3, 'employees': 1000, 'changes': 10000},
+    'small': {'companies': 10, 'projects': 200, 'users': 10, 'employees': 20000, 'changes': 50000},
+    'large': {'companies': 50, 'projects': 2000, 'users': 50, 'employees': 200000, 'changes': 500000},
+}
+
+# 每个事务插入的行数
+CHUNK_SIZE = 20000
+
+# 生成的用户的用户名前缀和密码
+USER_PREFIX = 'bench_user_'
+USER_PASSWORD = 'bench_password'
+
+# 插入顺序（满足外键依赖）
+TABLES = ('company', 'project', 'user', 'employee', 'change_request', 'assignment', 'employee_name_gram')
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何林罗高'
+GIVEN = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华建国志'
+POSITIONS = ['项目经理', '施工员', '安全员', '质检员', '资料员', '造价员', '技术负责人']
+START_DATE = date(2020, 1, 1)
+DATE_RANGE_DAYS = 1800
+
+# 员工状态和变动状态的分布（值, 权重）
+EMPLOYEE_STATUSES = (('在岗', 70), ('待岗', 10), ('离职', 20))
+CHANGE_STATUSES = (('已确认', 75), ('已拒绝', 15), ('待确认', 10))
+TRANSFER_RATIO = 0.8  # 变动中调岗所占比例，其余为离职
+
+
+# 各表生成的列（生成器按这个顺序产出元组）
+COLUMNS = {
+    'company': ('id', 'name'),
+    'project': ('id', 'name', 'company_id'),
+    'user': ('id', 'username', 'password'),
+    'employee': ('id', 'name', 'position', 'efffective_date', 'hire_date', 'status', 'company_id', 'project_id',
+                 'creator_id'),
+    'change_request': ('id', 'type', 'employee_id', 'from_company_id', 'to_company_id',
+                       'from_project_id', 'to_project_id', 'effective_date', 'status', 'creator_id'),
+    'assignment': ('id', 'employee_id', 'company_id', 'project_id', 'valid_from', 'valid_to'),
+    'employee_name_gram': ('id', 'gram', 'employee_id'),
+}
+
+
+def _weighted(rng, choices, k):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=k)
+
+
+def generate_rows(sizes, seed=42, offsets=None, password=USER_PASSWORD):
+    """
+    按表依次生成数据，返回 [(表名, 行元组迭代器), ...]，元组的列顺序见 COLUMNS
+
+    参数:
+    - sizes: {'companies', 'projects', 'users', 'employees', 'changes'} 各表行数
+    - seed: 随机种子
+    - offsets: {表名: 已有最大ID}，生成的主键从 offset + 1 开始连续编号
+    - password: 生成的用户的 password 列（seed_database 传入 USER_PASSWORD 的哈希）
+
+    主键显式给出，员工和变动可以直接引用本次生成的公司、项目和用户的ID。
+    迭代器需要按返回的顺序依次消费（生成变动时会用到生成员工时记下的项目）。
+    随机列按块（CHUNK_SIZE 行）一次性抽样（rng.choices(k=...)），比逐行调用 randint 快数倍。
+    """
+    rng = random.Random(seed)
+    offsets = offsets or {}
+    company_base, project_base, user_base, employee_base, change_base, assignment_base, gram_base = (
+        offsets.get(t, 0) for t in TABLES)
+    companies, projects, users = sizes['companies'], sizes['projects'], sizes['users']
+    employees, changes = sizes['employees'], sizes['changes']
+    if (employees or changes) and not (projects and users):
+        raise ValueError('生成员工和变动需要至少一个项目和一个用户 (Employees and changes need projects and users)')
+    if projects and not companies:
+        raise ValueError('生成项目需要至少一个公司 (Projects need companies)')
+    if changes and not employees:
+        raise ValueError('生成变动需要至少一个员工 (Changes need employees)')
+
+    days = [START_DATE + timedelta(days=d) for d in range(DATE_RANGE_DAYS + 1)]
+    names = [s + g for s in SURNAMES for g in GIVEN] + [s + g1 + g2 for s in SURNAMES for g1 in GIVEN for g2 in GIVEN]
+    project_ids = range(project_base + 1, project_base + projects + 1)
+    user_ids = range(user_base + 1, user_base + users + 1)
+    # 项目按编号轮流分配给本次生成的各公司
+    project_company = {project_base + i: company_base + (i - 1) % companies + 1 for i in range(1, projects + 1)}
+    # 记下每个员工所在的项目（生成变动时作为原项目）、到岗日期和状态（生成任职区间）、姓名（生成搜索索引）
+    employee_projects = []
+    employee_days = []
+    employee_statuses = []
+    employee_names = []
+
+    def chunks(total):
+        for start in range(1, total + 1, CHUNK_SIZE):
+            yield start, min(start + CHUNK_SIZE, total + 1) - start
+
+    def company_rows():
+        for i in range(company_base + 1, company_base + companies + 1):
+            yield i, f'第{i}工程分公司'
+
+    def project_rows():
+        for i in project_ids:
+            yield i, f'第{i}号综合体项目', project_company[i]
+
+    def user_rows():
+        for i in user_ids:
+            yield i, f'{USER_PREFIX}{i}', password
+
+    def employee_rows():
+        for start, k in chunks(employees):
+            chunk_projects = rng.choices(project_ids, k=k)
+            chunk_names = rng.choices(names, k=k)
+            chunk_positions = rng.choices(POSITIONS, k=k)
+            chunk_days = rng.choices(days, k=k)
+            chunk_statuses = _weighted(rng, EMPLOYEE_STATUSES, k)
+            employee_projects.extend(chunk_projects)
+            employee_days.extend(chunk_days)
+            employee_statuses.extend(chunk_statuses)
+            employee_names.extend(chunk_names)
+            yield from zip(
+                range(employee_base + start, employee_base + start + k),
+                chunk_names,
+                chunk_positions,
+                chunk_days,
+                chunk_days,
+                chunk_statuses,
+                map(project_company.__getitem__, chunk_projects),
+                chunk_projects,
+                rng.choices(user_ids, k=k),
+            )
+
+    def change_rows():
+        for start, k in chunks(changes):
+            for i, employee, transfer, to_project, day, status, creator in zip(
+                range(change_base + start, change_base + start + k),
+                rng.choices(range(employees), k=k),
+                rng.choices((True, False), cum_weights=(TRANSFER_RATIO, 1), k=k),
+                rng.choices(project_ids, k=k),
+                rng.choices(days, k=k),
+                _weighted(rng, CHANGE_STATUSES, k),
+                rng.choices(user_ids, k=k),
+            ):
+                from_project = employee_projects[employee]
+                employee_id = employee_base + employee + 1
+                if transfer:
+                    yield (i, '调岗', employee_id, project_company[from_project], project_company[to_project],
+                           from_project, to_project, day, status, creator)
+                else:
+                    yield (i, '离职', employee_id, project_company[from_project], None,
+                           from_project, None, day, status, creator)
+
+    def assignment_rows():
+        # 未离职的员工在当前项目有一个进行中的任职区间
+        assignment_id = assignment_base
+        for employee, (project, day, status) in enumerate(zip(employee_projects, employee_days, employee_statuses)):
+            if status != '离职':
+                assignment_id += 1
+                yield assignment_id, employee_base + employee + 1, project_company[project], project, day, OPEN_END
+
+    def gram_rows():
+        # 姓名搜索的 n-gram 索引（见 modules/employee/search.py）；姓名组合有限，每个姓名只拆一次
+        grams_of = {name: sorted(name_grams(name)) for name in names}
+        gram_id = gram_base
+        for employee, name in enumerate(employee_names):
+            employee_id = employee_base + employee + 1
+            for gram in grams_of[name]:
+                gram_id += 1
+                yield gram_id, gram, employee_id
+
+    return [
+        ('company', company_rows()),
+        ('project', project_rows()),
+        ('user', user_rows()),
+        ('employee', employee_rows()),
+        ('change_request', change_rows()),
+        ('assignment', assignment_rows()),
+        ('employee_name_gram', gram_rows()),
+    ]
+
+
+def load_rows(path):
+    """
+    从 JSON 文件读取要导入的数据，返回 [(表名, 行字典列表), ...]
+
+    文件格式：
+    - companies: 与 data/initial_data.json 相同，公司下嵌套 projects（只需 name）
+    - users / employees / change_requests: 行字典列表，字段与表的列一致，必须给出 id
+
+    公司和项目没有给出 id 时按文件中的顺序，从当前最大ID之后编号。
+    用户的 password 可以是明文，按原样写入，用户第一次登录成功时改存哈希（见 modules/auth/passwords.py）。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    companies, projects = [], []
+    for company in data.get('companies', []):
+        companies.append({key: value for key, value in company.items() if key != 'projects'})
+        for project in company.get('projects', []):
+            projects.append(dict(project, company=len(companies) - 1))
+
+    def parse_dates(rows, *columns):
+        for row in rows:
+            for column in columns:
+                if row.get(column):
+                    row[column] = date.fromisoformat(row[column])
+        return rows
+
+    employees = parse_dates(data.get('employees', []), 'efffective_date', 'hire_date')
+    grams = [{'employee_id': row['id'], 'gram': gram} for row in employees for gram in sorted(name_grams(row['name']))]
+
+    return [
+        ('company', companies),
+        ('project', projects),
+        ('user', data.get('users', [])),
+        ('employee', employees),
+        ('change_request', parse_dates(data.get('change_requests', []), 'effective_date')),
+        ('employee_name_gram', grams),
+    ]
+
+
+def _chunked(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def insert_rows(conn, table, columns, rows, chunk_size=CHUNK_SIZE):
+    """
+    分块插入元组行（列顺序为 columns），每块一个事务，返回插入的行数
+
+    INSERT 语句由 Core 按当前数据库方言只编译一次，每块数据直接交给 DBAPI 的 executemany。
+    （conn.execute(table.insert(), 字典列表) 会逐行构造参数，几十万行时这部分开销比数据库写入本身还大。）
+    需要转换的列（如 SQLite 把 Date 存为字符串）使用列类型自己的 bind_processor 按列批量转换。
+    """
+    dialect = conn.dialect
+    compiled = table.insert().compile(dialect=dialect, column_keys=list(columns))
+    processors = {}
+    for i, column in enumerate(columns):
+        column_type = table.c[column].type
+        processor = column_type.dialect_impl(dialect).bind_processor(dialect)
+        if processor is not None:
+            processors[i] = processor
+    if compiled.positional:
+        # 编译出的参数顺序是表的列顺序，不一定与 columns 相同
+        order = [columns.index(key) for key in compiled.positiontup]
+    else:
+        names = [compiled.binds[column].key for column in columns]
+
+    reorder = compiled.positional and order != list(range(len(columns)))
+
+    count = 0
+    for chunk in _chunked(rows, chunk_size):
+        if processors or reorder or not compiled.positional:
+            # 按列转置后批量转换、调整顺序，再转回行。
+            # 需要转换的列取值重复很多（如日期），只对去重后的值调用 processor。
+            values = list(zip(*chunk))
+            for i, processor in processors.items():
+                converted = {value: processor(value) for value in set(values[i])}
+                values[i] = list(map(converted.__getitem__, values[i]))
+            if compiled.positional:
+                chunk = list(zip(*(values[i] for i in order)))
+            else:
+                chunk = [dict(zip(names, row)) for row in zip(*values)]
+        with conn.begin():
+            conn.exec_driver_sql(compiled.string, chunk)
+        count += len(chunk)
+    return count
+
+
+def insert_dicts(conn, table, rows, chunk_size=CHUNK_SIZE):
+    """从文件导入的行（字典，字段可能不全）：普通的 Core executemany，未给出的列使用列默认值"""
+    count = 0
+    for chunk in _chunked(rows, chunk_size):
+        with conn.begin():
+            conn.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+def current_offsets(conn, tables):
+    """各表当前的最大ID（空表为 0）"""
+    offsets = {name: conn.execute(select(func.coalesce(func.max(tables[name].c.id), 0))).scalar() for name in TABLES}
+    conn.rollback()
+    return offsets
+
+
+def _assign_catalog_ids(rows_by_table, offsets):
+    """给文件中没有 id 的公司、项目编号，并把项目关联到所属公司的 id"""
+    companies = rows_by_table['company']
+    next_id = offsets['company']
+    for company in companies:
+        if 'id' not in company:
+            next_id += 1
+            company['id'] = next_id
+    next_id = offsets['project']
+    for project in rows_by_table['project']:
+        if 'id' not in project:
+            next_id += 1
+            project['id'] = next_id
+        project['company_id'] = companies[project.pop('company')]['id']
+
+
+def seed_database(db, sizes=None, seed=42, path=None, report=None):
+    """
+    向数据库写入生成的数据（sizes）或文件中的数据（path），返回 {表名: 行数}
+
+    生成数据时，原本为空的表先删除二级索引，插入完成后再重建：
+    一次性建索引（排序后构建）比逐行维护 B 树快得多。表里已有数据时不动索引。
+
+    report(表名, 行数, 秒数) 在每张表写完后调用，用于输出进度。
+    写入的是公司/项目目录时，会让进程内的目录缓存失效；写入员工或变动时，让人数统计缓存失效。
+    """
+    from modules.company.resources import catalog_cache
+    from modules.stats import headcount_cache
+
+    tables = db.metadata.tables
+    # 插入过程中会产生数百万个短命的元组，关闭循环垃圾回收，避免反复扫描（引用计数照常回收内存）
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        counts = _seed_tables(db, tables, sizes, seed, path, report)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if counts.get('company') or counts.get('project'):
+        catalog_cache.invalidate()
+    if counts.get('employee') or counts.get('change_request'):
+        headcount_cache.invalidate()
+    return counts
+
+
+def _seed_tables(db, tables, sizes, seed, path, report):
+    counts = {}
+    with db.engine.connect() as conn:
+        offsets = current_offsets(conn, tables)
+        if path:
+            loaded = load_rows(path)
+            _assign_catalog_ids(dict(loaded), offsets)
+        else:
+            # 所有生成的用户密码相同，只计算一次哈希（逐个计算在默认代价下每个用户要几十毫秒）
+            password = password_hasher.hash(USER_PASSWORD) if sizes['users'] else USER_PASSWORD
+            loaded = generate_rows(sizes, seed, offsets, password)
+
+        for name, rows in loaded:
+            table = tables[name]
+            started = time.perf_counter()
+            if path:
+                counts[name] = insert_dicts(conn, table, rows)
+            else:
+                deferred = list(table.indexes) if offsets[name] == 0 else []
+                with conn.begin():
+                    for index in deferred:
+                        index.drop(conn)
+                try:
+                    counts[name] = insert_rows(conn, table, COLUMNS[name], rows)
+                finally:
+                    with conn.begin():
+                        for index in deferred:
+                            index.create(conn)
+            if report:
+                report(name, counts[name], time.perf_counter() - started)
+    return counts
+
+
+@click.command('seed')
+@click.option('--scale', type=click.Choice(list(SCALES)), default='small', show_default=True, help='预设数据规模')
+@click.option('--companies', type=int, help='公司数（覆盖预设）')
+@click.option('--projects', type=int, help='项目数（覆盖预设）')
+@click.option('--users', type=int, help='用户数（覆盖预设）')
+@click.option('--employees', type=int, help='员工数（覆盖预设）')
+@click.option('--changes', type=int, help='变动请求数（覆盖预设）')
+@click.option('--seed', 'seed_value', type=int, default=42, show_default=True, help='随机种子')
+@click.option('--file', 'path', type=click.Path(exists=True, dir_okay=False), help='从 JSON 文件导入，而不是随机生成')
+@with_appcontext
+def seed_command(scale, companies, projects, users, employees, changes, seed_value, path):
+    """批量生成（或从文件导入）公司、项目、用户、员工和变动历史"""
+    from extensions import db
+
+    sizes = dict(SCALES[scale])
+    overrides = {'companies': companies, 'projects': projects, 'users': users,
+                 'employees': employees, 'changes': changes}
+    sizes.update((key, value) for key, value in overrides.items() if value is not None)
+
+    def report(name, count, seconds):
+        rate = count / seconds if seconds else 0
+        click.echo(f'{name:<16}{count:>10} 行 {seconds:>8.2f} 秒 {rate:>12,.0f} 行/秒')
+
+    started = time.perf_counter()
+    try:
+        counts = seed_database(db, sizes, seed_value, path, report)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    click.echo(f'共 {total} 行，耗时 {elapsed:.2f} 秒（{total / elapsed if elapsed else 0:,.0f} 行/秒）')
@@ -0,0 +1,31 @@
+import os
+import pytest
+from sqlalchemy import event
+
+# 未指定运行环境时，测试使用 TestConfig（内存 SQLite，见 config.py）
+os.environ.setdefault('APP_ENV', 'test')
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    返回一个函数：执行 func 并统计期间发往数据库的 SQL 语句条数。
+    JWT 黑名单的定期同步（查询 revoked_token）与被测接口无关，不计入。
+    """
+    from extensions import db
+
+    def count(func):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if 'revoked_token' not in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return len(statements)
+
+    return count
@@ -0,0 +1,157 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+from config import Config
+import pytest
+import threading
+from datetime import date
+from modules.auth import User
+from modules.company import Company, Project
+from modules.employee import Assignment, Employee
+from modules.change import ChangeRequest
+
+# 每条变动同时发起的审批请求数
+THREADS = 8
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """
+    创建使用 SQLite 文件数据库的应用实例：多个线程各自持有连接，
+    并发写入时由数据库加锁串行化，和生产环境多进程部署的情况一致。
+    """
+    db_path = tmp_path_factory.mktemp('race') / 'race.db'
+
+    class SQLiteConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        SLOW_REQUEST_THRESHOLD_MS = None
+        TESTING = True
+
+    app = create_app(SQLiteConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture(scope='module')
+def auth_headers(app):
+    """
+    注册并登录一个测试用户，获取认证头信息。
+    """
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'username': 'testuser',
+        'password': 'testpassword'
+    })
+    response = client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'testpassword'
+    })
+    return {
+        'Authorization': f"Bearer {response.json['token']}"
+    }
+
+
+def _create_pending_transfers(count, tag):
+    """
+    直接写库创建 count 个员工及其待确认的调岗变动，返回变动ID列表。
+    """
+    user = User.query.filter_by(username='testuser').first()
+    company = Company(name=f'{tag}公司')
+    db.session.add(company)
+    db.session.flush()
+    from_project = Project(name=f'{tag}原项目', company_id=company.id)
+    to_project = Project(name=f'{tag}新项目', company_id=company.id)
+    db.session.add_all([from_project, to_project])
+    db.session.flush()
+    changes = []
+    for i in range(count):
+        employee = Employee(name=f'{tag}员工{i}', position='并发测试岗', status='在岗',
+                            company_id=company.id, project_id=from_project.id, creator_id=user.id)
+        db.session.add(employee)
+        db.session.flush()
+        change = ChangeRequest(
+            type='调岗', employee_id=employee.id,
+            from_company_id=company.id, to_company_id=company.id,
+            from_project_id=from_project.id, to_project_id=to_project.id,
+            effective_date=date(2024, 4, 1), status='待确认', creator_id=user.id
+        )
+        db.session.add(change)
+        changes.append(change)
+    db.session.commit()
+    return [change.id for change in changes]
+
+
+def _race(app, requests):
+    """
+    用 Barrier 让所有线程同时发出请求，返回各请求的 (动作, 状态码) 列表。
+    requests 为 (动作, URL, 请求头) 列表。
+    """
+    barrier = threading.Barrier(len(requests))
+    results = [None] * len(requests)
+
+    def worker(index, action, url, headers):
+        client = app.test_client()
+        barrier.wait()
+        results[index] = (action, client.put(url, headers=headers).status_code)
+
+    threads = [threading.Thread(target=worker, args=(i, *request)) for i, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_approvals_have_exactly_one_winner(app, auth_headers):
+    """
+    测试同一条变动被多个审批请求同时确认：只有一个请求返回 200，其余返回 400，
+    员工只被调岗一次（只开启了一个新的任职区间）。
+    """
+    change_ids = _create_pending_transfers(5, '并发确认')
+
+    for change_id in change_ids:
+        results = _race(app, [
+            ('approve', f'/api/pending-changes/{change_id}/approve', auth_headers) for _ in range(THREADS)
+        ])
+        codes = sorted(code for _, code in results)
+        assert codes == [200] + [400] * (THREADS - 1)
+
+    db.session.expire_all()
+    for change_id in change_ids:
+        change = db.session.get(ChangeRequest, change_id)
+        assert change.status == '已确认'
+        assert change.employee.project_id == change.to_project_id
+        assert Assignment.query.filter_by(employee_id=change.employee_id).count() == 1
+
+
+def test_concurrent_approve_and_reject_have_exactly_one_winner(app, auth_headers):
+    """
+    测试同一条变动同时被确认和拒绝：只有一个请求成功，变动的最终状态与成功的请求一致，
+    被拒绝的变动不会修改员工信息。
+    """
+    change_ids = _create_pending_transfers(5, '并发审批')
+
+    for change_id in change_ids:
+        requests = [
+            ('approve' if i % 2 else 'reject', f'/api/pending-changes/{change_id}/{"approve" if i % 2 else "reject"}',
+             auth_headers)
+            for i in range(THREADS)
+        ]
+        results = _race(app, requests)
+        winners = [action for action, code in results if code == 200]
+        assert len(winners) == 1
+        assert all(code == 400 for _, code in results if code != 200)
+
+        db.session.expire_all()
+        change = db.session.get(ChangeRequest, change_id)
+        employee_project = change.employee.project_id
+        if winners[0] == 'approve':
+            assert change.status == '已确认'
+            assert employee_project == change.to_project_id
+        else:
+            assert change.status == '已拒绝'
+            assert employee_project == change.from_project_id
@@ -3,6 +3,10 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app import create_app, db
 import pytest
+import time
+from datetime import datetime
+from sqlalchemy import func, insert, select
+from blocklist import TokenBlocklist
 
 @pytest.fixture(scope='module')
 def app():
@@ -66,4 +70,112 @@ def test_logout(client):
     })
     print(response.data)  # 打印响应数据
     assert response.status_code == 200
-    assert response.json['success'] == True
\ No newline at end of file
+    assert response.json['success'] == True
+
+
+def test_logged_out_token_is_rejected(client):
+    """
+    登出后，同一个令牌再访问需要认证的接口应被拒绝。
+    """
+    client.post('/api/auth/register', json={
+        'username': 'testuser',
+        'password': 'testpassword'
+    })
+    token = client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'testpassword'
+    }).json['token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    assert client.get('/api/active-employees', headers=headers).status_code == 200
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert client.get('/api/active-employees', headers=headers).status_code == 401
+
+
+def test_blocklist_propagates_between_workers(app):
+    """
+    模拟两个进程（两个 TokenBlocklist 实例共享同一个数据库后端）：
+    在 A 吊销的令牌，B 在下一次同步后即可识别。
+    """
+    worker_a = TokenBlocklist()
+    worker_b = TokenBlocklist()
+    worker_a.init_app(app, db)
+    worker_b.init_app(app, db)
+    # 同步间隔设为 0，模拟"已经过了一个同步间隔"
+    worker_b._sync_interval = 0
+
+    assert 'jti-from-a' not in worker_b
+    worker_a.add('jti-from-a', time.time() + 600)
+    assert 'jti-from-a' in worker_a
+    assert 'jti-from-a' in worker_b
+
+
+def test_blocklist_entries_expire_with_token(app):
+    """
+    黑名单条目在令牌过期后自动失效，并从本地缓存和数据库中清除。
+    """
+    from modules.auth import RevokedToken
+
+    blocklist = TokenBlocklist()
+    blocklist.init_app(app, db)
+    blocklist._purge_interval = 0
+    blocklist.add('jti-expired', time.time() - 1)
+    blocklist.add('jti-valid', time.time() + 600)
+
+    assert 'jti-expired' not in blocklist
+    assert 'jti-valid' in blocklist
+    blocklist.sync()
+    remaining = {t.jti for t in RevokedToken.query.filter(RevokedToken.jti.in_(['jti-expired', 'jti-valid']))}
+    assert remaining == {'jti-valid'}
+
+
+def test_blocklist_sync_uses_database_ids(app):
+    """
+    增量同步按数据库分配的 id 而不是时间戳：后分配 id 的记录先提交时，
+    先提交的被同步，较小 id 的记录稍后提交也会在下一次同步中被识别。
+    """
+    from modules.auth import RevokedToken
+
+    blocklist = TokenBlocklist()
+    blocklist.init_app(app, db)
+    blocklist._sync_interval = 0
+    table = RevokedToken.__table__
+    last_id = db.session.execute(select(func.max(table.c.id))).scalar() or 0
+
+    db.session.execute(insert(table).values(id=last_id + 2, jti='jti-committed-first', created_at=datetime(2000, 1, 1)))
+    assert 'jti-committed-first' in blocklist
+    db.session.execute(insert(table).values(id=last_id + 1, jti='jti-committed-later', created_at=datetime(2000, 1, 1)))
+    assert 'jti-committed-later' in blocklist
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """使用 SQLite 文件数据库的应用：连接池中有多个连接，黑名单同步使用独立的连接"""
+    from config import TestConfig
+
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'blocklist.db'}"
+
+    file_app = create_app(FileConfig)
+    with file_app.app_context():
+        db.create_all()
+        yield file_app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_blocklist_sync_leaves_request_session_alone(file_app):
+    """
+    同步和清理在独立的连接上执行，不会提交请求的会话中尚未提交的修改。
+    """
+    from modules.auth import RevokedToken
+
+    blocklist = TokenBlocklist()
+    blocklist.init_app(file_app, db)
+    blocklist._purge_interval = 0
+    db.session.add(RevokedToken(jti='jti-uncommitted', created_at=datetime(2000, 1, 1)))
+
+    blocklist.sync()
+    assert 'jti-uncommitted' not in blocklist
+    db.session.rollback()
+    assert RevokedToken.query.filter_by(jti='jti-uncommitted').count() == 0
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+import bench_endpoints
+import bench_login
+import datagen
+import pytest
+
+
+def test_bench_endpoints_reports_every_scenario(tmp_path):
+    """
+    测试在 tiny 规模的数据上运行基准测试，每个场景都输出延迟分位数、SQL 条数和内存峰值，
+    且所有请求都成功。
+    """
+    results = bench_endpoints.run('tiny', seed=1, iterations=2, warmup=1, data_dir=str(tmp_path))
+
+    assert results['meta']['sizes'] == datagen.SCALES['tiny']
+    assert set(results['scenarios']) == set(bench_endpoints.SCENARIOS)
+    for name, r in results['scenarios'].items():
+        assert 0 < r['p50_ms'] <= r['p95_ms'] <= r['p99_ms'], name
+        assert r['peak_memory_kb'] > 0, name
+        assert all(code.startswith('2') for code in r['status_codes']), (name, r['status_codes'])
+    assert results['scenarios']['active_employees']['queries_per_request'] >= 1
+
+
+def test_bench_login_reports_every_method(tmp_path):
+    """
+    测试登录基准测试对每个哈希方法都输出吞吐量和延迟分位数，且所有登录都成功。
+    """
+    results = bench_login.run(methods=['pbkdf2:sha256:1000', 'pbkdf2:sha256:2000'], requests=6, concurrency=2,
+                              data_dir=str(tmp_path))
+
+    assert list(results['methods']) == ['pbkdf2:sha256:1000', 'pbkdf2:sha256:2000']
+    for method, r in results['methods'].items():
+        assert r['logins_per_second'] > 0, method
+        assert 0 < r['p50_ms'] <= r['p95_ms'], method
+        assert r['status_codes'] == {'200': 6}, method
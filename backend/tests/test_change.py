@@ -3,7 +3,11 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app import create_app, db
 import pytest
+from datetime import date
+from modules.auth import User
 from modules.company import Company, Project
+from modules.employee import Employee
+from modules.change import ChangeRequest
 import json
 
 @pytest.fixture(scope='module')
@@ -212,4 +216,342 @@ def test_reject_change_request(client, auth_headers, initialize_data):
     print(response.data)  # 打印响应数据
     assert response.status_code == 200
     assert response.json['success'] == True
-    assert response.json['message'] == '变更请求已拒绝 (Change request rejected)'
\ No newline at end of file
+    assert response.json['message'] == '变更请求已拒绝 (Change request rejected)'
+
+def _create_pending_changes(count, tag, change_type='调岗', effective_date=date(2024, 1, 31)):
+    """
+    直接写库创建 count 个员工及其待确认变动，每条变动的原/目标公司和项目各不相同。
+    返回创建的变动ID列表。
+    """
+    user = User.query.filter_by(username='testuser').first()
+    change_ids = []
+    for i in range(count):
+        from_company = Company(name=f'{tag}原公司{i}')
+        to_company = Company(name=f'{tag}新公司{i}')
+        db.session.add_all([from_company, to_company])
+        db.session.flush()
+        from_project = Project(name=f'{tag}原项目{i}', company_id=from_company.id)
+        to_project = Project(name=f'{tag}新项目{i}', company_id=to_company.id)
+        employee = Employee(name=f'{tag}员工{i}', position='变动测试岗', status='在岗',
+                            company_id=from_company.id, creator_id=user.id)
+        db.session.add_all([from_project, to_project, employee])
+        db.session.flush()
+        employee.project_id = from_project.id
+        change = ChangeRequest(
+            type=change_type, employee_id=employee.id,
+            from_company_id=from_company.id, to_company_id=to_company.id,
+            from_project_id=from_project.id, to_project_id=to_project.id,
+            effective_date=effective_date, status='待确认', creator_id=user.id
+        )
+        db.session.add(change)
+        db.session.flush()
+        change_ids.append(change.id)
+    db.session.commit()
+    return change_ids
+
+
+def test_pending_changes_query_count_is_constant(client, auth_headers, initialize_data, count_queries):
+    """
+    测试待确认变动名单序列化五个关联名称时不会产生 N+1 查询：
+    变动条数从 2 增加到 8，SQL 条数保持不变。
+    """
+    _create_pending_changes(2, '少量', effective_date=date(2031, 1, 1))
+    _create_pending_changes(8, '大量', effective_date=date(2032, 1, 1))
+
+    def fetch(day):
+        db.session.expunge_all()
+        response = client.get('/api/pending-changes', query_string={
+            'date_from': day, 'date_to': day
+        }, headers=auth_headers)
+        assert response.status_code == 200
+        for change in response.json['changes']:
+            assert change['employee_name']
+            assert '原公司' in change['from_company_name']
+            assert '新公司' in change['to_company_name']
+            assert '原项目' in change['from_project_name']
+            assert '新项目' in change['to_project_name']
+
+    small = count_queries(lambda: fetch('2031-01-01'))
+    large = count_queries(lambda: fetch('2032-01-01'))
+    assert small == large
+
+
+def test_pending_changes_pagination_and_filters(client, auth_headers, initialize_data):
+    """
+    测试待确认变动名单的游标分页、类型过滤和生效日期范围过滤。
+    """
+    transfer_ids = _create_pending_changes(3, '分页调岗', effective_date=date(2033, 3, 1))
+    resign_ids = _create_pending_changes(2, '分页离职', change_type='离职', effective_date=date(2033, 3, 15))
+
+    seen_ids = []
+    cursor = None
+    while True:
+        params = {'limit': 2, 'date_from': '2033-03-01', 'date_to': '2033-03-31', 'with_total': 'true'}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/api/pending-changes', query_string=params, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers['X-Total-Count'] == '5'
+        assert len(response.json['changes']) <= 2
+        seen_ids.extend(c['id'] for c in response.json['changes'])
+        cursor = response.json['next_cursor']
+        if not cursor:
+            break
+    assert seen_ids == sorted(transfer_ids + resign_ids)
+
+    response = client.get('/api/pending-changes', query_string={
+        'type': '离职', 'date_from': '2033-03-01', 'date_to': '2033-03-31'
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert [c['id'] for c in response.json['changes']] == resign_ids
+
+    response = client.get('/api/pending-changes', query_string={
+        'date_from': '2033-03-02', 'date_to': '2033-03-14'
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['changes'] == []
+
+
+def test_batch_approve_change_requests(client, auth_headers, initialize_data, count_queries):
+    """
+    测试批量确认变动申请：待确认的变动全部应用到员工表，
+    已处理和不存在的ID分别返回 already_processed / not_found，且 SQL 条数与批量大小无关。
+    """
+    transfer_ids = _create_pending_changes(3, '批量确认调岗', effective_date=date(2024, 5, 1))
+    resign_ids = _create_pending_changes(1, '批量确认离职', change_type='离职', effective_date=date(2024, 5, 31))
+    processed_id = _create_pending_changes(1, '批量确认已处理')[0]
+    client.put(f'/api/pending-changes/{processed_id}/reject', headers=auth_headers)
+    missing_id = 999999
+
+    ids = transfer_ids + resign_ids + [processed_id, missing_id]
+    response = client.put('/api/pending-changes/approve', json={'ids': ids}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['applied'] == 4
+    outcomes = {r['id']: r['outcome'] for r in response.json['results']}
+    assert all(outcomes[i] == 'applied' for i in transfer_ids + resign_ids)
+    assert outcomes[processed_id] == 'already_processed'
+    assert outcomes[missing_id] == 'not_found'
+
+    db.session.expire_all()
+    for change_id in transfer_ids:
+        change = db.session.get(ChangeRequest, change_id)
+        assert change.status == '已确认'
+        assert change.employee.company_id == change.to_company_id
+        assert change.employee.project_id == change.to_project_id
+        assert change.employee.efffective_date == date(2024, 5, 1)
+        assert change.employee.status == '在岗'
+    resigned = db.session.get(ChangeRequest, resign_ids[0]).employee
+    assert resigned.status == '离职'
+    assert resigned.efffective_date == date(2024, 5, 31)
+
+    # 再次确认同一批ID：全部为已处理
+    response = client.put('/api/pending-changes/approve', json={'ids': transfer_ids}, headers=auth_headers)
+    assert response.json['applied'] == 0
+    assert {r['outcome'] for r in response.json['results']} == {'already_processed'}
+
+    small = _create_pending_changes(2, '批量语句数少')
+    large = _create_pending_changes(10, '批量语句数多')
+    count_small = count_queries(lambda: client.put('/api/pending-changes/approve', json={'ids': small}, headers=auth_headers))
+    count_large = count_queries(lambda: client.put('/api/pending-changes/approve', json={'ids': large}, headers=auth_headers))
+    assert count_small == count_large
+
+
+def test_batch_reject_change_requests(client, auth_headers, initialize_data):
+    """
+    测试批量拒绝变动申请：待确认的变动改为已拒绝，员工信息不变。
+    """
+    change_ids = _create_pending_changes(2, '批量拒绝')
+    response = client.put('/api/pending-changes/reject', json={'ids': change_ids + [999998]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['applied'] == 2
+    assert response.json['results'][-1] == {'id': 999998, 'outcome': 'not_found'}
+
+    db.session.expire_all()
+    for change_id in change_ids:
+        change = db.session.get(ChangeRequest, change_id)
+        assert change.status == '已拒绝'
+        assert change.employee.company_id == change.from_company_id
+
+    response = client.put('/api/pending-changes/reject', json={'ids': []}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_approved_changes_maintain_assignment_intervals(client, auth_headers, initialize_data):
+    """
+    测试确认变动时维护任职区间：调岗关闭原区间并开启新区间，离职关闭当前区间；
+    项目在岗名单按 as_of 日期返回当天在该项目的员工。
+    """
+    from modules.employee import Assignment, OPEN_END
+
+    transfer_id = _create_pending_changes(1, '区间调岗', effective_date=date(2024, 3, 1))[0]
+    transfer = db.session.get(ChangeRequest, transfer_id)
+    employee_id = transfer.employee_id
+    from_project_id, to_project_id = transfer.from_project_id, transfer.to_project_id
+    # 员工在原项目有一个进行中的区间
+    db.session.add(Assignment(employee_id=employee_id, company_id=transfer.from_company_id,
+                              project_id=from_project_id, valid_from=date(2023, 1, 1)))
+    db.session.commit()
+
+    # 单条确认调岗
+    response = client.put(f'/api/pending-changes/{transfer_id}/approve', headers=auth_headers)
+    assert response.status_code == 200
+
+    # 批量确认离职
+    user = User.query.filter_by(username='testuser').first()
+    resign = ChangeRequest(
+        type='离职', employee_id=employee_id, from_company_id=transfer.to_company_id,
+        from_project_id=to_project_id, effective_date=date(2024, 9, 1), status='待确认', creator_id=user.id
+    )
+    db.session.add(resign)
+    db.session.commit()
+    response = client.put('/api/pending-changes/approve', json={'ids': [resign.id]}, headers=auth_headers)
+    assert response.json['applied'] == 1
+
+    db.session.expire_all()
+    intervals = [
+        (a.project_id, a.valid_from, a.valid_to)
+        for a in Assignment.query.filter_by(employee_id=employee_id).order_by(Assignment.valid_from)
+    ]
+    assert intervals == [
+        (from_project_id, date(2023, 1, 1), date(2024, 3, 1)),
+        (to_project_id, date(2024, 3, 1), date(2024, 9, 1)),
+    ]
+    assert all(valid_to != OPEN_END for _, _, valid_to in intervals)
+
+    def roster(project_id, as_of):
+        response = client.get(f'/api/projects/{project_id}/roster', query_string={'as_of': as_of},
+                              headers=auth_headers)
+        assert response.status_code == 200
+        return [e['employee_id'] for e in response.json['employees']]
+
+    assert roster(from_project_id, '2024-02-29') == [employee_id]
+    assert roster(from_project_id, '2024-03-01') == []
+    assert roster(to_project_id, '2024-03-01') == [employee_id]
+    assert roster(to_project_id, '2024-08-31') == [employee_id]
+    assert roster(to_project_id, '2024-09-01') == []
+
+
+def test_backdated_changes_do_not_invert_intervals(client, auth_headers, initialize_data):
+    """
+    测试生效日期早于当前区间开始日期的变动（补录或乱序应用）：按当前区间的开始日期处理，
+    不会产生 valid_to < valid_from 的区间，项目在岗名单不受影响。
+    """
+    from modules.employee import Assignment, OPEN_END
+
+    transfer_id = _create_pending_changes(1, '补录调岗', effective_date=date(2024, 3, 1))[0]
+    transfer = db.session.get(ChangeRequest, transfer_id)
+    employee_id = transfer.employee_id
+    from_project_id, to_project_id = transfer.from_project_id, transfer.to_project_id
+    # 当前区间从 5 月开始，调岗的生效日期 3 月更早
+    db.session.add(Assignment(employee_id=employee_id, company_id=transfer.from_company_id,
+                              project_id=from_project_id, valid_from=date(2024, 5, 1)))
+    db.session.commit()
+    assert client.put(f'/api/pending-changes/{transfer_id}/approve', headers=auth_headers).status_code == 200
+
+    user = User.query.filter_by(username='testuser').first()
+    resign = ChangeRequest(
+        type='离职', employee_id=employee_id, from_company_id=transfer.to_company_id,
+        from_project_id=to_project_id, effective_date=date(2024, 4, 1), status='待确认', creator_id=user.id
+    )
+    db.session.add(resign)
+    db.session.commit()
+    assert client.put(f'/api/pending-changes/{resign.id}/approve', headers=auth_headers).status_code == 200
+
+    db.session.expire_all()
+    intervals = [
+        (a.project_id, a.valid_from, a.valid_to)
+        for a in Assignment.query.filter_by(employee_id=employee_id).order_by(Assignment.id)
+    ]
+    assert intervals == [
+        (from_project_id, date(2024, 5, 1), date(2024, 5, 1)),
+        (to_project_id, date(2024, 5, 1), date(2024, 5, 1)),
+    ]
+    assert all(valid_from <= valid_to != OPEN_END for _, valid_from, valid_to in intervals)
+    response = client.get(f'/api/projects/{to_project_id}/roster', query_string={'as_of': '2024-06-01'},
+                          headers=auth_headers)
+    assert employee_id not in [e['employee_id'] for e in response.json['employees']]
+
+
+def test_project_roster_errors(client, auth_headers, initialize_data):
+    """
+    测试项目在岗名单的参数校验：日期格式错误返回 400，项目不存在返回 404。
+    """
+    response = client.get('/api/projects/1/roster', query_string={'as_of': '2024/01/01'}, headers=auth_headers)
+    assert response.status_code == 400
+
+    response = client.get('/api/projects/999999/roster', headers=auth_headers)
+    assert response.status_code == 404
+    assert response.json['message'] == '未找到项目 (Project not found)'
+
+    response = client.get('/api/projects/1/roster', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['as_of'] == date.today().isoformat()
+
+
+def test_future_dated_changes_are_scheduled_until_due(client, runner, auth_headers, initialize_data):
+    """
+    测试生效日期在未来的变动：确认后为'待生效'，员工信息不变；
+    到期后 flask apply-due-changes 把它们改为'已确认'并应用到员工表和任职区间表，重复执行不会再次应用。
+    """
+    from datetime import timedelta
+    from modules.employee import Assignment
+
+    future = date.today() + timedelta(days=30)
+    batch_ids = _create_pending_changes(2, '定时批量', effective_date=future)
+    single_id = _create_pending_changes(1, '定时单条', change_type='离职', effective_date=future)[0]
+
+    response = client.put('/api/pending-changes/approve', json={'ids': batch_ids}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['applied'] == 0
+    assert response.json['scheduled'] == 2
+    assert {r['outcome'] for r in response.json['results']} == {'scheduled'}
+
+    response = client.put(f'/api/pending-changes/{single_id}/approve', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['scheduled'] is True
+
+    db.session.expire_all()
+    for change_id in batch_ids + [single_id]:
+        change = db.session.get(ChangeRequest, change_id)
+        assert change.status == '待生效'
+        assert change.employee.company_id == change.from_company_id
+        assert change.employee.status == '在岗'
+
+    # 到期前执行：没有可应用的变动
+    result = runner.invoke(args=['apply-due-changes', '--date', (future - timedelta(days=1)).isoformat()])
+    assert result.exit_code == 0, result.output
+    assert '已应用 0 条到期变动' in result.output
+
+    result = runner.invoke(args=['apply-due-changes', '--date', future.isoformat(), '--batch-size', '1'])
+    assert result.exit_code == 0, result.output
+    assert '已应用 3 条到期变动' in result.output
+
+    db.session.expire_all()
+    for change_id in batch_ids:
+        change = db.session.get(ChangeRequest, change_id)
+        assert change.status == '已确认'
+        assert change.employee.company_id == change.to_company_id
+        assert change.employee.project_id == change.to_project_id
+        assert Assignment.query.filter_by(employee_id=change.employee_id, valid_from=future).count() == 1
+    resign = db.session.get(ChangeRequest, single_id)
+    assert resign.status == '已确认'
+    assert resign.employee.status == '离职'
+
+    result = runner.invoke(args=['apply-due-changes', '--date', future.isoformat()])
+    assert '已应用 0 条到期变动' in result.output
+
+
+def test_due_changes_claimed_concurrently_raise_conflict(app, auth_headers, initialize_data):
+    """
+    测试两个 worker 取到同一批到期变动时，后提交状态更新的一方受影响行数不一致，抛出冲突而不会重复应用。
+    """
+    from modules.change.services import APPROVED, SCHEDULED, ChangeConflictError, _transition
+
+    change_ids = _create_pending_changes(2, '并发定时', effective_date=date(2024, 2, 1))
+    ChangeRequest.query.filter(ChangeRequest.id.in_(change_ids)).update({'status': SCHEDULED})
+
+    # 另一个 worker 已经认领了其中一条
+    _transition(change_ids[:1], APPROVED, from_status=SCHEDULED)
+    with pytest.raises(ChangeConflictError):
+        _transition(change_ids, APPROVED, from_status=SCHEDULED)
+    db.session.rollback()
@@ -0,0 +1,247 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+from config import Config
+import json
+import pytest
+import threading
+import time
+from modules.change import change_feed
+
+# 等待推送的最长时间（秒）
+WAIT_SECONDS = 5
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """
+    创建使用 SQLite 文件数据库的应用实例：推送线程有自己的数据库连接，
+    与处理请求的线程并发读写，和生产环境一致。
+    心跳间隔缩短，读取事件流时不会长时间阻塞。
+    """
+    db_path = tmp_path_factory.mktemp('feed') / 'feed.db'
+
+    class FeedConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        SLOW_REQUEST_THRESHOLD_MS = None
+        CHANGE_FEED_HEARTBEAT = 0.1
+        CHANGE_FEED_BACKLOG_LIMIT = 3
+        CHANGE_FEED_QUEUE_SIZE = 3
+        TESTING = True
+
+    app = create_app(FeedConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        change_feed.stop()
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture(scope='module')
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='module')
+def token(client):
+    """
+    注册并登录一个测试用户，返回访问令牌。
+    """
+    client.post('/api/auth/register', json={'username': 'testuser', 'password': 'testpassword'})
+    response = client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpassword'})
+    return response.json['token']
+
+
+@pytest.fixture(scope='module')
+def auth_headers(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def _add_employee(client, auth_headers, name):
+    response = client.post('/api/employees', json={
+        'name': name, 'position': '推送测试岗', 'efffective_date': '2024-01-01'
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json['employee']['id']
+
+
+def _resign(client, auth_headers, employee_id):
+    response = client.put(f'/api/pending-changes/{employee_id}/resign', json={'resign_date': '2024-06-30'},
+                          headers=auth_headers)
+    assert response.status_code == 200
+    response = client.get('/api/pending-changes', headers=auth_headers)
+    return next(c['id'] for c in response.json['changes'] if c['employee_id'] == employee_id)
+
+
+def _last_event_id(client, auth_headers):
+    response = client.get('/api/pending-changes', headers=auth_headers)
+    assert response.status_code == 200
+    return response.json['last_event_id']
+
+
+def _parse(chunk):
+    """把一条 SSE 消息解析为 {'id': ..., 'event': ..., 'data': ...}，注释（心跳）返回 None"""
+    fields = {}
+    for line in chunk.decode('utf-8').strip().split('\n'):
+        if line.startswith(':'):
+            return None
+        key, _, value = line.partition(': ')
+        fields[key] = value
+    if 'event' not in fields:
+        return None
+    return {'id': int(fields['id']), 'event': fields['event'], 'data': json.loads(fields['data'])}
+
+
+def _read_events(response, count):
+    """从事件流中读取 count 个事件（跳过心跳），超时则测试失败"""
+    events = []
+    deadline = time.time() + WAIT_SECONDS
+    chunks = iter(response.response)
+    while len(events) < count:
+        assert time.time() < deadline, f'只收到 {len(events)} 个事件: {events}'
+        event = _parse(next(chunks))
+        if event:
+            events.append(event)
+    return events
+
+
+def test_resume_replays_events_after_last_event_id(client, auth_headers):
+    """
+    测试续传：按 Last-Event-ID 补发之后的提交和确认事件，事件ID递增，created 事件带完整的变动信息。
+    """
+    since = _last_event_id(client, auth_headers)
+    employee_id = _add_employee(client, auth_headers, '续传员工')
+    change_id = _resign(client, auth_headers, employee_id)
+    assert client.put(f'/api/pending-changes/{change_id}/approve', headers=auth_headers).status_code == 200
+
+    response = client.get('/api/pending-changes/events', headers={**auth_headers, 'Last-Event-ID': str(since)},
+                          buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    created, approved = _read_events(response, 2)
+    response.close()
+
+    assert since < created['id'] < approved['id']
+    assert created['event'] == 'created'
+    assert created['data']['id'] == change_id
+    assert created['data']['employee_name'] == '续传员工'
+    assert created['data']['status'] == '待确认'
+    assert approved['event'] == 'approved'
+    assert approved['data'] == {'id': change_id, 'status': '已确认'}
+    assert change_feed.subscriber_count == 0
+
+
+def _stream_token(client, auth_headers):
+    response = client.post('/api/pending-changes/events/token', headers=auth_headers)
+    assert response.status_code == 200
+    return response.json['token']
+
+
+def test_one_publisher_fans_out_to_all_subscribers(client, auth_headers):
+    """
+    测试推送：两个订阅者（其中一个用查询参数传事件流令牌，与浏览器 EventSource 相同）收到同一个事件，
+    本进程只有一个推送线程。
+    """
+    first = client.get('/api/pending-changes/events', headers=auth_headers, buffered=False)
+    second = client.get(f'/api/pending-changes/events?jwt={_stream_token(client, auth_headers)}', buffered=False)
+    assert first.status_code == second.status_code == 200
+    assert change_feed.subscriber_count == 2
+
+    employee_id = _add_employee(client, auth_headers, '推送员工')
+    change_id = _resign(client, auth_headers, employee_id)
+    assert client.put(f'/api/pending-changes/{change_id}/reject', headers=auth_headers).status_code == 200
+
+    first_events = _read_events(first, 2)
+    second_events = _read_events(second, 2)
+    first.close()
+    second.close()
+
+    assert first_events == second_events
+    assert [e['event'] for e in first_events] == ['created', 'rejected']
+    assert first_events[1]['data'] == {'id': change_id, 'status': '已拒绝'}
+    assert [t.name for t in threading.enumerate()].count('change-feed') == 1
+    assert change_feed.subscriber_count == 0
+
+
+def test_resume_too_far_behind_sends_reset(client, auth_headers):
+    """
+    测试落后超过 CHANGE_FEED_BACKLOG_LIMIT 条事件时只收到 reset，事件ID为最新的事件ID。
+    """
+    since = _last_event_id(client, auth_headers)
+    for i in range(4):
+        _resign(client, auth_headers, _add_employee(client, auth_headers, f'落后员工{i}'))
+    latest = _last_event_id(client, auth_headers)
+
+    response = client.get(f'/api/pending-changes/events?last_event_id={since}', headers=auth_headers,
+                          buffered=False)
+    [reset] = _read_events(response, 1)
+    response.close()
+    assert reset == {'id': latest, 'event': 'reset', 'data': {}}
+
+
+def test_events_require_login(client):
+    """
+    测试未登录时返回 401。
+    """
+    assert client.get('/api/pending-changes/events').status_code == 401
+
+
+def test_invalid_last_event_id(client, auth_headers):
+    """
+    测试 Last-Event-ID 不是整数时返回 400。
+    """
+    response = client.get('/api/pending-changes/events', headers={**auth_headers, 'Last-Event-ID': 'abc'})
+    assert response.status_code == 400
+
+
+def test_query_string_accepts_only_stream_tokens(client, auth_headers, token):
+    """
+    测试 URL 中不接受访问令牌（会出现在访问日志中）；事件流令牌不能用于其他接口。
+    """
+    assert client.get(f'/api/pending-changes/events?jwt={token}').status_code == 401
+    stream_token = _stream_token(client, auth_headers)
+    response = client.get('/api/pending-changes', headers={'Authorization': f'Bearer {stream_token}'})
+    assert response.status_code == 400
+    assert change_feed.subscriber_count == 0
+
+
+def _wait_unsubscribed():
+    deadline = time.time() + WAIT_SECONDS
+    while change_feed.subscriber_count:
+        assert time.time() < deadline, '订阅者没有被移除'
+        time.sleep(0.05)
+
+
+def test_slow_subscriber_gets_reset(client, auth_headers):
+    """
+    测试客户端不读取、队列满（CHANGE_FEED_QUEUE_SIZE）时不再为它缓存：订阅者被移除，
+    连接发送 reset 后结束。
+    """
+    response = client.get('/api/pending-changes/events', headers=auth_headers, buffered=False)
+    for i in range(4):
+        _resign(client, auth_headers, _add_employee(client, auth_headers, f'慢速员工{i}'))
+    _wait_unsubscribed()
+
+    events = [_parse(chunk) for chunk in response.response]
+    response.close()
+    assert [e['event'] for e in events if e] == ['reset']
+
+
+def test_stream_duration_and_subscribers_are_capped(client, auth_headers, monkeypatch):
+    """
+    测试连接在 CHANGE_FEED_MAX_STREAM_SECONDS 后结束；连接数达到 CHANGE_FEED_MAX_SUBSCRIBERS 时返回 503。
+    """
+    monkeypatch.setattr(change_feed, 'max_stream_seconds', 0.3)
+    monkeypatch.setattr(change_feed, 'max_subscribers', 1)
+    first = client.get('/api/pending-changes/events', headers=auth_headers, buffered=False)
+    second = client.get('/api/pending-changes/events', headers=auth_headers)
+    assert second.status_code == 503
+    assert second.headers['Retry-After'] == '3'
+
+    started = time.time()
+    list(first.response)
+    first.close()
+    assert time.time() - started < WAIT_SECONDS
+    assert change_feed.subscriber_count == 0
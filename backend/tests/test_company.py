@@ -5,6 +5,7 @@ from app import create_app, db
 import pytest
 
 from modules.company import Company, Project
+from modules.company.resources import catalog_cache
 
 
 import json
@@ -120,4 +121,73 @@ def test_get_company_projects(client, initialize_data):
         
         # 根据 initial_data.json 中的公司名称和项目数量进行断言
         expected_project_count = company_project_counts.get(company_name, 0)
-        assert len(projects_response.json['projects']) == expected_project_count
\ No newline at end of file
+        assert len(projects_response.json['projects']) == expected_project_count
+
+
+def test_companies_etag_and_not_modified(client, initialize_data):
+    """
+    测试公司列表的 ETag / Cache-Control 响应头，以及 If-None-Match 命中时返回 304 且无响应体。
+    """
+    response = client.get('/api/companies')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert etag.startswith('"') and etag.endswith('"')
+    assert 'max-age=' in response.headers['Cache-Control']
+
+    response = client.get('/api/companies', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    response = client.get('/api/companies', headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+    assert response.json['companies']
+
+
+def test_catalog_cache_hit_skips_database(client, initialize_data, count_queries):
+    """
+    测试目录缓存命中后不再访问数据库。
+    """
+    company_id = client.get('/api/companies').json['companies'][0]['id']
+    client.get(f'/api/companies/{company_id}/projects')
+
+    def fetch():
+        assert client.get('/api/companies').status_code == 200
+        assert client.get(f'/api/companies/{company_id}/projects').status_code == 200
+
+    assert count_queries(fetch) == 0
+
+
+def test_catalog_cache_invalidated_on_write(client, initialize_data):
+    """
+    测试新增公司和项目并提交后，缓存失效，接口返回新数据和新的 ETag。
+    """
+    response = client.get('/api/companies')
+    old_etag = response.headers['ETag']
+    old_count = len(response.json['companies'])
+
+    company = Company(name='缓存测试公司')
+    db.session.add(company)
+    db.session.commit()
+
+    response = client.get('/api/companies', headers={'If-None-Match': old_etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != old_etag
+    assert len(response.json['companies']) == old_count + 1
+
+    projects_response = client.get(f'/api/companies/{company.id}/projects')
+    assert projects_response.json['projects'] == []
+    db.session.add(Project(name='缓存测试项目', company_id=company.id))
+    db.session.commit()
+    projects_response = client.get(f'/api/companies/{company.id}/projects')
+    assert [p['name'] for p in projects_response.json['projects']] == ['缓存测试项目']
+
+
+def test_missing_company_not_cached(client, initialize_data):
+    """
+    测试不存在的公司返回 404，且不写入目录缓存（任意ID不能让缓存无限增长）。
+    """
+    for company_id in (900001, 900002, 900003):
+        response = client.get(f'/api/companies/{company_id}/projects')
+        assert response.status_code == 404
+        assert ('projects', company_id) not in catalog_cache._entries
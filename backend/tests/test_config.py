@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+from config import BenchConfig, DevelopmentConfig, ProductionConfig, TestConfig, get_config
+import pytest
+import threading
+import time
+from sqlalchemy import text
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """
+    创建使用 bench 配置的应用实例（SQLite 文件数据库 + WAL），
+    连接池缩小为 1 个连接，便于构造连接池占满的情况。
+    """
+    db_path = tmp_path_factory.mktemp('pool') / 'pool.db'
+
+    class PoolConfig(BenchConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        SQLALCHEMY_ENGINE_OPTIONS = {**BenchConfig.SQLALCHEMY_ENGINE_OPTIONS,
+                                     'pool_size': 1, 'max_overflow': 0}
+        TESTING = True
+
+    app = create_app(PoolConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _metric_value(text, prefix):
+    """
+    从 Prometheus 文本中找出以 prefix 开头的指标行，返回其数值。
+    """
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f'未找到指标: {prefix}')
+
+
+def test_get_config_selects_profile_from_app_env(monkeypatch):
+    """
+    测试按 APP_ENV 选择环境配置，未知的环境名称报错。
+    """
+    monkeypatch.setenv('APP_ENV', 'prod')
+    assert get_config() is ProductionConfig
+    assert get_config('bench') is BenchConfig
+    assert get_config('test') is TestConfig
+
+    monkeypatch.delenv('APP_ENV')
+    assert get_config() is DevelopmentConfig
+
+    with pytest.raises(ValueError):
+        get_config('staging')
+
+
+def test_production_profile_trusts_one_proxy_hop(tmp_path):
+    """
+    测试生产配置默认信任一层反向代理，创建的应用用 ProxyFix 按 X-Forwarded-For 取客户端IP。
+    """
+    assert ProductionConfig().TRUSTED_PROXY_HOPS == 1
+
+    class ProxiedConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "prod.db"}'
+        JWT_SECRET_KEY = 'test_jwt_secret_key'
+
+    app = create_app(ProxiedConfig)
+    assert isinstance(app.wsgi_app, ProxyFix)
+    assert app.wsgi_app.x_for == 1
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_bench_profile_applies_sqlite_pragmas(app):
+    """
+    测试 bench 配置的 SQLITE_PRAGMAS 在每个连接上生效。
+    """
+    with db.engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+
+
+def test_pool_saturation_and_checkout_wait_exported(app):
+    """
+    测试 /metrics 输出连接池饱和度和取连接等待时间：
+    唯一的连接被占用时饱和度为 1，另一个线程取连接要等到连接归还。
+    """
+    from extensions import metrics
+
+    client = app.test_client()
+    db.session.remove()
+
+    engine = db.engine
+    held = engine.connect()
+    waited = threading.Thread(target=lambda: engine.connect().close())
+    waited.start()
+    time.sleep(0.1)
+    with app.test_request_context('/metrics'):
+        saturated = metrics.render()
+    held.close()
+    waited.join()
+
+    assert _metric_value(saturated, 'db_pool_size{pool="primary"}') == 1
+    assert _metric_value(saturated, 'db_pool_checked_out{pool="primary"}') == 1
+    assert _metric_value(saturated, 'db_pool_saturation_ratio{pool="primary"}') == 1
+
+    released = client.get('/metrics').get_data(as_text=True)
+    assert _metric_value(released, 'db_pool_checked_out{pool="primary"}') == 0
+    assert _metric_value(released, 'db_pool_checkout_timeouts_total{pool="primary"}') == 0
+    assert _metric_value(released, 'db_pool_checkout_wait_seconds_sum{pool="primary"}') >= 0.1
+    assert _metric_value(released, 'db_pool_checkout_wait_seconds_bucket{pool="primary",le="0.05"}') < \
+        _metric_value(released, 'db_pool_checkout_wait_seconds_bucket{pool="primary",le="0.5"}')
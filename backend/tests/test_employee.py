@@ -2,7 +2,13 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app import create_app, db
+import csv
+import io
 import pytest
+from sqlalchemy import event
+from modules.auth import User
+from modules.company import Company, Project
+from modules.employee import Employee
 
 @pytest.fixture(scope='module')
 def app():
@@ -88,4 +94,387 @@ def test_add_employee(client, auth_headers):
     assert response.json['employee']['name'] == new_employee['name']
     assert response.json['employee']['position'] == new_employee['position']
     assert response.json['employee']['efffective_date'] == new_employee['efffective_date']
-    assert response.json['employee']['status'] == '待岗'
\ No newline at end of file
+    assert response.json['employee']['status'] == '待岗'
+
+def test_active_employees_keyset_pagination(client, auth_headers):
+    """
+    测试在岗员工列表的游标分页。
+    按 limit=2 逐页读取，验证每页不超过 limit，且所有页拼起来不重不漏。
+    """
+    created_ids = []
+    for i in range(5):
+        response = client.post('/api/employees', json={
+            'name': f'分页员工{i}',
+            'position': '分页测试岗',
+            'efffective_date': '2023-10-01'
+        }, headers=auth_headers)
+        assert response.status_code == 201
+        created_ids.append(response.json['employee']['id'])
+
+    seen_ids = []
+    cursor = None
+    while True:
+        params = {'limit': 2, 'position': '分页测试岗'}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/api/active-employees', query_string=params, headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.json['employees']) <= 2
+        seen_ids.extend(e['id'] for e in response.json['employees'])
+        cursor = response.json['next_cursor']
+        if not cursor:
+            break
+
+    assert seen_ids == sorted(created_ids)
+
+
+def test_active_employees_filters_and_total(client, auth_headers):
+    """
+    测试在岗员工列表的过滤条件和 X-Total-Count 总数响应头。
+    """
+    for i in range(3):
+        client.post('/api/employees', json={
+            'name': f'过滤员工{i}',
+            'position': '过滤测试岗',
+            'efffective_date': '2023-10-01'
+        }, headers=auth_headers)
+
+    response = client.get('/api/active-employees', query_string={
+        'position': '过滤测试岗', 'status': '待岗', 'limit': 1, 'with_total': 'true'
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers['X-Total-Count'] == '3'
+    assert len(response.json['employees']) == 1
+    assert response.json['next_cursor'] is not None
+
+    response = client.get('/api/active-employees', query_string={
+        'position': '过滤测试岗', 'status': '在岗'
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['employees'] == []
+    assert 'X-Total-Count' not in response.headers
+
+
+def test_active_employees_invalid_cursor(client, auth_headers):
+    """
+    测试非法游标返回 400。
+    """
+    response = client.get('/api/active-employees', query_string={'cursor': '不是游标'}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def _sync(client, auth_headers, since, **params):
+    """按 since 取完所有增量页，返回 (employees, removed)"""
+    employees, removed, cursor = [], [], None
+    while True:
+        query = {'since': since, **params}
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get('/api/active-employees', query_string=query, headers=auth_headers)
+        assert response.status_code == 200
+        employees.extend(response.json['employees'])
+        removed.extend(response.json['removed'])
+        cursor = response.json['next_cursor']
+        if not cursor:
+            return employees, removed
+
+
+def test_active_employees_delta_sync(client, auth_headers):
+    """
+    测试增量同步：since 之后新增（单个添加、批量导入）的员工按版本号分页返回，
+    离职的员工以 removed 返回，sync_seq 随写入递增。
+    """
+    since = client.get('/api/active-employees', headers=auth_headers).json['sync_seq']
+
+    first = client.post('/api/employees', json={
+        'name': '同步员工1', 'position': '同步测试岗', 'efffective_date': '2024-01-01'
+    }, headers=auth_headers).json['employee']
+    assert first['updated_seq'] > since
+    response = client.post('/api/employees/bulk', json=[
+        {'name': f'同步员工{i}', 'position': '同步测试岗', 'efffective_date': '2024-01-01'} for i in (2, 3)
+    ], headers=auth_headers)
+    assert response.status_code == 201
+
+    employees, removed = _sync(client, auth_headers, since, limit=1)
+    assert [e['name'] for e in employees] == ['同步员工1', '同步员工2', '同步员工3']
+    assert removed == []
+    # 批量导入的行在同一个事务中写入，版本号相同
+    assert employees[0]['updated_seq'] < employees[1]['updated_seq'] == employees[2]['updated_seq']
+
+    since = client.get('/api/active-employees', headers=auth_headers).json['sync_seq']
+    assert since == employees[2]['updated_seq']
+    assert _sync(client, auth_headers, since) == ([], [])
+
+    response = client.put(f"/api/pending-changes/{first['id']}/resign", json={'resign_date': '2024-06-30'},
+                          headers=auth_headers)
+    assert response.status_code == 200
+    change = next(c for c in client.get('/api/pending-changes', headers=auth_headers).json['changes']
+                  if c['employee_id'] == first['id'])
+    assert client.put(f"/api/pending-changes/{change['id']}/approve", headers=auth_headers).status_code == 200
+
+    assert _sync(client, auth_headers, since) == ([], [first['id']])
+
+
+def test_active_employees_delta_sync_filters(client, auth_headers):
+    """
+    测试增量同步的过滤条件：不符合过滤条件的修改以 removed 返回，非法 since 返回 400。
+    """
+    since = client.get('/api/active-employees', headers=auth_headers).json['sync_seq']
+    employee = client.post('/api/employees', json={
+        'name': '过滤同步员工', 'position': '过滤同步岗', 'efffective_date': '2024-01-01'
+    }, headers=auth_headers).json['employee']
+
+    assert _sync(client, auth_headers, since, status='待岗')[0][0]['id'] == employee['id']
+    assert _sync(client, auth_headers, since, status='在岗') == ([], [employee['id']])
+
+    response = client.get('/api/active-employees', query_string={'since': -1}, headers=auth_headers)
+    assert response.status_code == 400
+    response = client.get('/api/active-employees', query_string={'since': 0, 'cursor': '不是游标'},
+                          headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_active_employees_query_count_is_constant(client, auth_headers, count_queries):
+    """
+    测试在岗员工列表序列化公司名/项目名时不会产生 N+1 查询：
+    员工人数从 3 增加到 12，SQL 条数保持不变。
+    """
+    user = User.query.filter_by(username='testuser').first()
+    company = Company(name='N+1测试公司')
+    db.session.add(company)
+    db.session.flush()
+
+    def add_employees(count, position):
+        for i in range(count):
+            project = Project(name=f'{position}项目{i}', company_id=company.id)
+            db.session.add(project)
+            db.session.flush()
+            db.session.add(Employee(
+                name=f'{position}员工{i}', position=position, status='在岗',
+                company_id=company.id, project_id=project.id, creator_id=user.id
+            ))
+        db.session.commit()
+
+    def fetch(position):
+        # 清空会话缓存，保证关联对象必须从数据库读取
+        db.session.expunge_all()
+        response = client.get('/api/active-employees', query_string={'position': position}, headers=auth_headers)
+        assert response.status_code == 200
+        for employee in response.json['employees']:
+            assert employee['company_name'] == 'N+1测试公司'
+            assert employee['project_name'].startswith(position)
+        return len(response.json['employees'])
+
+    add_employees(3, '少量岗')
+    add_employees(12, '大量岗')
+
+    small = count_queries(lambda: fetch('少量岗'))
+    large = count_queries(lambda: fetch('大量岗'))
+    assert small == large
+
+
+def test_keyset_page_uses_given_column(client, auth_headers):
+    """
+    测试 keyset_page 的下一页游标取自传入的分页键列，而不是固定取 id。
+    """
+    from pagination import decode_cursor, keyset_page
+
+    for i in range(5):
+        client.post('/api/employees', json={
+            'name': f'分页键员工{i}', 'position': '分页键岗', 'efffective_date': '2024-01-01'
+        }, headers=auth_headers)
+    query = Employee.query.filter_by(position='分页键岗')
+    # 倒序逐个修改，版本号的顺序与 id 相反
+    for employee in query.order_by(Employee.id.desc()).all():
+        employee.name += '改'
+        db.session.commit()
+    expected = [e.id for e in query.order_by(Employee.updated_seq)]
+    assert expected == sorted(expected, reverse=True)
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(query, Employee.updated_seq, cursor, limit=2)
+        seen.extend(e.id for e in rows)
+        if cursor is None:
+            break
+        assert decode_cursor(cursor) == rows[-1].updated_seq
+    assert seen == expected and len(seen) == 5
+
+
+def test_bulk_add_employees_json(client, auth_headers):
+    """
+    测试批量导入员工（JSON）：合法行一次性写入，非法行返回逐行错误。
+    """
+    rows = [
+        {'name': '批量员工1', 'position': '批量岗', 'efffective_date': '2024-01-01'},
+        {'name': '', 'position': '批量岗', 'efffective_date': '2024-01-01'},
+        {'name': '批量员工3', 'position': '批量岗', 'efffective_date': '2024/01/01'},
+        {'name': '批量员工4', 'position': '批量岗', 'efffective_date': '2024-01-02'},
+    ]
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # 只统计员工表（姓名搜索索引 employee_name_gram 另有一条 executemany）
+        if statement.startswith('INSERT INTO employee '):
+            statements.append(executemany)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.post('/api/employees/bulk', json=rows, headers=auth_headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code == 201
+    assert response.json['created'] == 2
+    assert [e['row'] for e in response.json['errors']] == [2, 3]
+    # 所有合法行通过一条 executemany 写入
+    assert statements == [True]
+
+    listed = client.get('/api/active-employees', query_string={'position': '批量岗'}, headers=auth_headers)
+    assert [e['name'] for e in listed.json['employees']] == ['批量员工1', '批量员工4']
+    assert all(e['status'] == '待岗' for e in listed.json['employees'])
+
+
+def test_bulk_add_employees_strict_and_csv(client, auth_headers):
+    """
+    测试严格模式下有错误则整批不写入，以及 CSV 文件上传导入。
+    """
+    csv_body = 'name,position,efffective_date\n导入员工1,CSV岗,2024-02-01\n导入员工2,CSV岗,\n'
+    response = client.post('/api/employees/bulk?strict=true', data=csv_body.encode('utf-8'),
+                           content_type='text/csv', headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json['created'] == 0
+    assert response.json['errors'] == [{'row': 2, 'message': 'Hire date is required.'}]
+
+    listed = client.get('/api/active-employees', query_string={'position': 'CSV岗'}, headers=auth_headers)
+    assert listed.json['employees'] == []
+
+    response = client.post('/api/employees/bulk', data={
+        'file': (io.BytesIO(('\ufeff' + csv_body).encode('utf-8')), 'employees.csv')
+    }, content_type='multipart/form-data', headers=auth_headers)
+    assert response.status_code == 201
+    assert response.json['created'] == 1
+
+    listed = client.get('/api/active-employees', query_string={'position': 'CSV岗'}, headers=auth_headers)
+    assert [e['name'] for e in listed.json['employees']] == ['导入员工1']
+
+
+def test_bulk_add_employees_size_limits(app, client, auth_headers, monkeypatch):
+    """
+    测试批量导入的大小限制：请求体超过字节上限时不解析直接返回 413；
+    CSV 行数超过上限时返回 413，且只读取上限加一行。
+    """
+    monkeypatch.setitem(app.config, 'BULK_EMPLOYEE_MAX_BYTES', 200)
+    monkeypatch.setitem(app.config, 'BULK_EMPLOYEE_MAX_ROWS', 2)
+    rows = [{'name': f'超限员工{i}', 'position': '超限岗', 'efffective_date': '2024-01-01'} for i in range(10)]
+    response = client.post('/api/employees/bulk', json=rows, headers=auth_headers)
+    assert response.status_code == 413
+    assert 'Request body must not exceed 200 bytes' in response.json['message']
+
+    read = []
+    monkeypatch.setattr(csv.DictReader, '__next__',
+                        lambda self, next_row=csv.DictReader.__next__: read.append(1) or next_row(self))
+    csv_body = 'name,position,efffective_date\n' + '甲,超限岗,2024-01-01\n' * 5
+    response = client.post('/api/employees/bulk', data=csv_body.encode('utf-8'),
+                           content_type='text/csv', headers=auth_headers)
+    assert response.status_code == 413
+    assert 'At most 2 rows per request' in response.json['message']
+    assert len(read) == 3
+
+    listed = client.get('/api/active-employees', query_string={'position': '超限岗'}, headers=auth_headers)
+    assert listed.json['employees'] == []
+
+
+def test_json_response_is_unescaped_utf8(client, auth_headers):
+    """
+    测试 JSON 响应直接输出 UTF-8 中文，而不是 \\uXXXX 转义。
+    """
+    client.post('/api/employees', json={
+        'name': '编码员工', 'position': '编码测试岗', 'efffective_date': '2023-10-01'
+    }, headers=auth_headers)
+    response = client.get('/api/active-employees', query_string={'position': '编码测试岗'}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert '编码员工'.encode('utf-8') in response.data
+    assert b'\\u' not in response.data
+
+
+def test_json_encoder_fallback_matches_fast_path(monkeypatch):
+    """
+    测试没有 orjson 时退回标准库编码，输出的数据与快速编码一致（含日期）。
+    """
+    from datetime import date
+    import json
+    import representations
+
+    data = {'employees': [{'name': '张三', 'efffective_date': date(2023, 10, 1)}], 'next_cursor': None}
+    fast = representations.dumps(data)
+    monkeypatch.setattr(representations, 'orjson', None)
+    fallback = representations.dumps(data)
+    assert json.loads(fast) == json.loads(fallback) == {
+        'employees': [{'name': '张三', 'efffective_date': '2023-10-01'}], 'next_cursor': None
+    }
+    assert '张三'.encode('utf-8') in fallback
+
+
+def _search(client, auth_headers, **params):
+    response = client.get('/api/employees/search', query_string=params, headers=auth_headers)
+    assert response.status_code == 200, response.json
+    return response.json
+
+
+def test_search_employees_ranked_and_paginated(client, auth_headers):
+    """
+    测试按姓名搜索：完全匹配 > 前缀匹配 > 包含，按档位和 id 翻页；
+    单字关键词也能搜到；关键词的字分开出现、或只是相邻两字都出现的姓名不算匹配。
+    """
+    for name in ('司马欧阳', '欧阳娜娜', '欧明阳', '欧阳明', '阳欧阳'):
+        client.post('/api/employees', json={
+            'name': name, 'position': '搜索测试岗', 'efffective_date': '2024-01-01'
+        }, headers=auth_headers)
+
+    names = []
+    params = {'q': '欧阳', 'limit': 1}
+    while True:
+        page = _search(client, auth_headers, **params)
+        names += [e['name'] for e in page['employees']]
+        if not page['next_cursor']:
+            break
+        params['cursor'] = page['next_cursor']
+    assert names == ['欧阳娜娜', '欧阳明', '司马欧阳', '阳欧阳']
+
+    assert [e['name'] for e in _search(client, auth_headers, q='欧阳明')['employees']] == ['欧阳明']
+    assert [e['name'] for e in _search(client, auth_headers, q=' 娜 ')['employees']] == ['欧阳娜娜']
+    # '阳欧阳' 含有 '欧阳' 和 '阳欧'，但不含 '欧阳欧'
+    assert _search(client, auth_headers, q='欧阳欧')['employees'] == []
+
+
+def test_search_index_follows_insert_rename_and_bulk(client, auth_headers):
+    """
+    测试姓名索引随员工写入同步：改名后旧名搜不到、新名能搜到，批量导入的员工也能搜到。
+    """
+    user = User.query.filter_by(username='testuser').first()
+    employee = Employee(name='改名前甲', position='搜索测试岗', status='待岗', creator_id=user.id)
+    db.session.add(employee)
+    db.session.flush()
+    assert [e['id'] for e in _search(client, auth_headers, q='名前甲')['employees']] == [employee.id]
+
+    employee.name = '改名后乙'
+    db.session.flush()
+    assert _search(client, auth_headers, q='名前甲')['employees'] == []
+    assert [e['id'] for e in _search(client, auth_headers, q='后乙')['employees']] == [employee.id]
+
+    client.post('/api/employees/bulk', json=[
+        {'name': '批量搜索丙', 'position': '搜索测试岗', 'efffective_date': '2024-01-01'},
+    ], headers=auth_headers)
+    found = _search(client, auth_headers, q='搜索丙', active='true')['employees']
+    assert [e['name'] for e in found] == ['批量搜索丙']
+
+
+def test_search_employees_invalid_query(client, auth_headers):
+    """
+    测试关键词为空、过长或游标无效时返回 400。
+    """
+    for params in ({}, {'q': '  '}, {'q': '长' * 65}, {'q': '欧阳', 'cursor': 'bad'}):
+        response = client.get('/api/employees/search', query_string=params, headers=auth_headers)
+        assert response.status_code == 400, params
@@ -0,0 +1,201 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+from datetime import datetime, timedelta, timezone
+import pytest
+import re
+from sqlalchemy import event, update
+from extensions import idempotency
+from idempotency import IDEMPOTENCY_KEY_HEADER, REPLAYED_HEADER, request_fingerprint
+from modules.auth import IdempotencyRecord, User
+from modules.change import ChangeRequest
+from modules.employee import Employee
+
+
+@pytest.fixture(scope='module')
+def app():
+    """
+    创建Flask应用实例并配置为测试模式。
+    初始化数据库并在测试结束后清理。
+    """
+    app = create_app()
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture(scope='module')
+def client(app):
+    return app.test_client()
+
+
+def _login(client, username):
+    client.post('/api/auth/register', json={'username': username, 'password': 'testpassword'})
+    response = client.post('/api/auth/login', json={'username': username, 'password': 'testpassword'})
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+
+@pytest.fixture(scope='module')
+def auth_headers(client):
+    """
+    注册并登录一个测试用户，获取认证头信息。
+    """
+    return _login(client, 'testuser')
+
+
+def _add_employee(client, auth_headers, name, key=None):
+    headers = {**auth_headers, IDEMPOTENCY_KEY_HEADER: key} if key else auth_headers
+    return client.post('/api/employees', json={
+        'name': name, 'position': '幂等测试岗', 'efffective_date': '2024-01-01'
+    }, headers=headers)
+
+
+def _count(model, **filters):
+    db.session.rollback()
+    return model.query.filter_by(**filters).count()
+
+
+def test_retry_returns_stored_response(client, auth_headers):
+    """
+    测试同一个键重试添加员工：返回第一次的响应并带 Idempotent-Replayed，只写入一个员工，
+    重试时只查询 idempotency_record 表（和令牌黑名单），不访问业务表。
+    """
+    first = _add_employee(client, auth_headers, '幂等员工', key='add-1')
+    assert first.status_code == 201
+    assert REPLAYED_HEADER not in first.headers
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        second = _add_employee(client, auth_headers, '幂等员工', key='add-1')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert second.status_code == 201
+    assert second.headers[REPLAYED_HEADER] == 'true'
+    assert second.json == first.json
+    assert _count(Employee, name='幂等员工') == 1
+    assert statements
+    assert not [s for s in statements if re.search(r'\b(employee|change_request)\b', s)]
+
+
+def test_resign_retry_creates_one_change(client, auth_headers):
+    """
+    测试同一个键重试提交离职申请只产生一条变动申请；不带键的请求照常执行。
+    """
+    employee_id = _add_employee(client, auth_headers, '幂等离职员工').json['employee']['id']
+    url = f'/api/pending-changes/{employee_id}/resign'
+    headers = {**auth_headers, IDEMPOTENCY_KEY_HEADER: 'resign-1'}
+
+    responses = [client.put(url, json={'resign_date': '2024-06-30'}, headers=headers) for _ in range(3)]
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert [REPLAYED_HEADER in r.headers for r in responses] == [False, True, True]
+    assert _count(ChangeRequest, employee_id=employee_id) == 1
+
+    assert client.put(url, json={'resign_date': '2024-06-30'}, headers=auth_headers).status_code == 200
+    assert _count(ChangeRequest, employee_id=employee_id) == 2
+
+
+def test_key_reused_for_different_request(client, auth_headers):
+    """
+    测试同一个键用于不同的请求体时返回 422；不同用户的同名键互不影响。
+    """
+    assert _add_employee(client, auth_headers, '请求体A', key='reuse-1').status_code == 201
+    response = _add_employee(client, auth_headers, '请求体B', key='reuse-1')
+    assert response.status_code == 422
+    assert _count(Employee, name='请求体B') == 0
+
+    other_headers = _login(client, 'otheruser')
+    response = _add_employee(client, other_headers, '请求体A', key='reuse-1')
+    assert response.status_code == 201
+    assert REPLAYED_HEADER not in response.headers
+    assert _count(Employee, name='请求体A') == 2
+
+
+def test_concurrent_duplicate_is_rejected(app, client, auth_headers):
+    """
+    测试第一次请求仍在处理中（记录没有响应）时，重复请求返回 409 和 Retry-After，不执行写入；
+    处理中超过 IDEMPOTENCY_LOCK_TIMEOUT 的记录被接管，重新执行。
+    """
+    user_id = User.query.filter_by(username='testuser').one().id
+    body = {'name': '处理中员工', 'position': '幂等测试岗', 'efffective_date': '2024-01-01'}
+    with app.test_request_context('/api/employees', method='POST', json=body):
+        claimed_at, existing = idempotency.claim(user_id, 'in-flight', request_fingerprint())
+    assert claimed_at is not None and existing is None
+
+    response = _add_employee(client, auth_headers, '处理中员工', key='in-flight')
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert _count(Employee, name='处理中员工') == 0
+
+    db.session.execute(update(IdempotencyRecord).where(IdempotencyRecord.key == 'in-flight')
+                       .values(created_at=claimed_at - idempotency.lock_timeout))
+    db.session.commit()
+    response = _add_employee(client, auth_headers, '处理中员工', key='in-flight')
+    assert response.status_code == 201
+    assert _count(Employee, name='处理中员工') == 1
+
+
+def test_server_errors_are_not_stored(client, auth_headers):
+    """
+    测试 5xx 响应不保存，同一个键重试时重新执行；4xx 响应照常保存并重放。
+    """
+    employee_id = _add_employee(client, auth_headers, '调岗出错员工').json['employee']['id']
+    headers = {**auth_headers, IDEMPOTENCY_KEY_HEADER: 'transfer-1'}
+    body = {'new_company': 1, 'new_project': 1, 'effective_date': '不是日期'}
+    for _ in range(2):
+        response = client.put(f'/api/pending-changes/{employee_id}/transfer', json=body, headers=headers)
+        assert response.status_code == 500
+        assert REPLAYED_HEADER not in response.headers
+    assert _count(IdempotencyRecord, key='transfer-1') == 0
+
+    headers[IDEMPOTENCY_KEY_HEADER] = 'transfer-404'
+    body['effective_date'] = '2024-06-30'
+    responses = [client.put('/api/pending-changes/999999/transfer', json=body, headers=headers) for _ in range(2)]
+    assert [r.status_code for r in responses] == [404, 404]
+    assert responses[1].headers[REPLAYED_HEADER] == 'true'
+
+
+def _expire(key):
+    expired = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1)
+    db.session.execute(update(IdempotencyRecord).where(IdempotencyRecord.key == key).values(expires_at=expired))
+    db.session.commit()
+
+
+def test_expired_keys_are_purged_and_reusable(client, auth_headers):
+    """
+    测试过期的键被批量清理，过期后同一个键重新执行。
+    """
+    assert _add_employee(client, auth_headers, '过期员工', key='expire-1').status_code == 201
+    assert _add_employee(client, auth_headers, '未过期员工', key='expire-2').status_code == 201
+    _expire('expire-1')
+
+    response = _add_employee(client, auth_headers, '过期员工', key='expire-1')
+    assert response.status_code == 201
+    assert REPLAYED_HEADER not in response.headers
+    assert _count(Employee, name='过期员工') == 2
+
+    _expire('expire-1')
+    assert idempotency.purge() == 1
+    assert _count(IdempotencyRecord, key='expire-1') == 0
+    assert _count(IdempotencyRecord, key='expire-2') == 1
+
+
+def test_invalid_key(client, auth_headers):
+    """
+    测试键为空或超过 255 个字符时返回 400。
+    """
+    assert _add_employee(client, auth_headers, '非法键员工', key='x' * 256).status_code == 400
+    response = client.post('/api/employees', json={
+        'name': '非法键员工', 'position': '幂等测试岗', 'efffective_date': '2024-01-01'
+    }, headers={**auth_headers, IDEMPOTENCY_KEY_HEADER: ''})
+    assert response.status_code == 400
+    assert _count(Employee, name='非法键员工') == 0
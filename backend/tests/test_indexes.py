@@ -0,0 +1,188 @@
+import sys
+import os
+import re
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+from config import Config
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import event
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """
+    创建使用 SQLite 文件数据库的应用实例，并通过迁移脚本（而不是 create_all）建表，
+    这样测试验证的是迁移真正创建出来的索引。
+    """
+    db_path = tmp_path_factory.mktemp('indexes') / 'explain.db'
+
+    class SQLiteConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        TESTING = True
+
+    app = create_app(SQLiteConfig)
+    with app.app_context():
+        upgrade()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    """
+    创建测试客户端，用于发送HTTP请求到应用。
+    """
+    return app.test_client()
+
+
+@pytest.fixture(scope='module')
+def auth_headers(app):
+    """
+    注册并登录一个测试用户，获取认证头信息。
+    """
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'username': 'testuser',
+        'password': 'testpassword'
+    })
+    response = client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'testpassword'
+    })
+    return {
+        'Authorization': f"Bearer {response.json['token']}"
+    }
+
+
+def _query_plans(table, func):
+    """
+    执行 func，捕获期间所有查询 table 的 SELECT 语句，
+    逐条执行 EXPLAIN QUERY PLAN，返回每条语句的执行计划文本。
+    """
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and re.search(rf'FROM {table}\b', statement):
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert captured, f'没有捕获到查询 {table} 的 SELECT 语句'
+    plans = []
+    with db.engine.connect() as conn:
+        for statement, parameters in captured:
+            rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+            plans.append('\n'.join(row[-1] for row in rows))
+    return plans
+
+
+def test_active_roster_uses_status_index(client, auth_headers):
+    """
+    在岗名单（含翻页）应通过 ix_employee_status_id 索引定位，而不是全表扫描。
+    """
+    for i in range(3):
+        client.post('/api/employees', json={
+            'name': f'索引员工{i}', 'position': '索引测试岗', 'efffective_date': '2023-10-01'
+        }, headers=auth_headers)
+
+    def fetch():
+        first = client.get('/api/active-employees', query_string={'limit': 1}, headers=auth_headers)
+        assert first.status_code == 200
+        second = client.get('/api/active-employees', query_string={
+            'limit': 1, 'cursor': first.json['next_cursor']
+        }, headers=auth_headers)
+        assert second.status_code == 200
+
+    plans = _query_plans('employee', fetch)
+    assert len(plans) == 2
+    for plan in plans:
+        assert 'ix_employee_status_id' in plan, plan
+
+
+def test_active_roster_by_company_uses_company_index(client, auth_headers):
+    """
+    按公司过滤的在岗名单应通过 ix_employee_company_id_status 索引定位。
+    """
+    def fetch():
+        response = client.get('/api/active-employees', query_string={'company_id': 1}, headers=auth_headers)
+        assert response.status_code == 200
+
+    for plan in _query_plans('employee', fetch):
+        assert 'ix_employee_company_id_status' in plan, plan
+
+
+def test_pending_changes_uses_status_index(client, auth_headers):
+    """
+    待确认名单应通过 ix_change_request_status_id 索引定位。
+    """
+    def fetch():
+        response = client.get('/api/pending-changes', headers=auth_headers)
+        assert response.status_code == 200
+
+    for plan in _query_plans('change_request', fetch):
+        assert 'ix_change_request_status_id' in plan, plan
+
+
+def test_project_roster_uses_assignment_index(client, auth_headers):
+    """
+    项目在岗名单（按日期）应通过 ix_assignment_project_id_valid_to 索引定位。
+    """
+    def fetch():
+        response = client.get('/api/projects/1/roster', query_string={'as_of': '2024-01-01'}, headers=auth_headers)
+        assert response.status_code in (200, 404)
+
+    for plan in _query_plans('assignment', fetch):
+        assert 'ix_assignment_project_id_valid_to' in plan, plan
+
+
+def test_employee_conflict_check_uses_employee_status_index(app):
+    """
+    按员工查询待确认变动（冲突检查）应通过 ix_change_request_employee_id_status 索引定位。
+    """
+    from modules.change import ChangeRequest
+
+    def check():
+        ChangeRequest.query.filter_by(employee_id=1, status='待确认').first()
+
+    for plan in _query_plans('change_request', check):
+        assert 'ix_change_request_employee_id_status' in plan, plan
+
+
+def test_due_changes_worker_uses_status_effective_date_index(app):
+    """
+    定时任务查询到期的待生效变动应通过 ix_change_request_status_effective_date 索引定位。
+    """
+    from datetime import date
+    from modules.change.services import apply_due_changes
+
+    def run():
+        apply_due_changes(date(2024, 1, 1), limit=100)
+        db.session.rollback()
+
+    for plan in _query_plans('change_request', run):
+        assert 'ix_change_request_status_effective_date' in plan, plan
+
+
+def test_employee_search_uses_name_gram_index(client, auth_headers):
+    """
+    姓名搜索应通过 ix_employee_name_gram_gram_employee_id 索引查找候选员工，
+    员工表只按主键读取候选行，而不是 LIKE 全表扫描。
+    """
+    client.post('/api/employees', json={
+        'name': '索引搜索员工', 'position': '索引测试岗', 'efffective_date': '2023-10-01'
+    }, headers=auth_headers)
+
+    def fetch():
+        response = client.get('/api/employees/search', query_string={'q': '搜索员'}, headers=auth_headers)
+        assert response.status_code == 200
+        assert [e['name'] for e in response.json['employees']] == ['索引搜索员工']
+
+    for plan in _query_plans('employee', fetch):
+        assert 'ix_employee_name_gram_gram_employee_id' in plan, plan
+        assert 'SCAN employee' not in plan, plan
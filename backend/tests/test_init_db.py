@@ -0,0 +1,165 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+import io
+import json
+import tracemalloc
+import pytest
+import init_db
+from sqlalchemy import func, select
+from modules.company import Company, Project
+
+
+@pytest.fixture(scope='module')
+def app():
+    """
+    创建Flask应用实例并配置为测试模式。
+    """
+    app = create_app()
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture(autouse=True)
+def fresh_db(app):
+    """
+    导入在自己的事务中提交，无法用嵌套事务回滚，每个测试前重建所有表。
+    """
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    yield
+    db.session.remove()
+
+
+def _write_org(tmp_path, companies, name='org.json'):
+    path = tmp_path / name
+    path.write_text(json.dumps({'companies': companies}, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def _catalog():
+    """返回 {项目名: 公司名}"""
+    rows = db.session.execute(
+        select(Project.name, Company.name).join(Company, Project.company_id == Company.id)
+    ).all()
+    return dict(rows)
+
+
+def test_iter_json_array_across_buffer_boundaries():
+    """
+    测试流式解析在很小的读取块下也能正确切分元素（包括跨块的数字和中文字符串）。
+    """
+    text = '{"meta": {"n": 3}, "companies" : [ {"name": "甲", "size": 12345},\n{"name": "乙"} , {"name": "丙", "projects": []} ], "x": 1}'
+    items = list(init_db.iter_json_array(io.StringIO(text), 'companies', read_size=5))
+    assert items == [{'name': '甲', 'size': 12345}, {'name': '乙'}, {'name': '丙', 'projects': []}]
+
+    assert list(init_db.iter_json_array(io.StringIO('{"companies": []}'), 'companies')) == []
+    with pytest.raises(ValueError):
+        list(init_db.iter_json_array(io.StringIO('{"projects": []}'), 'companies'))
+    with pytest.raises(ValueError):
+        list(init_db.iter_json_array(io.StringIO('{"companies": [{"name": "甲"}'), 'companies', read_size=4))
+
+
+def test_iter_json_array_matches_top_level_key_only():
+    """
+    测试只匹配顶层对象的键名：字符串值和嵌套对象中相同的文本不会被当作数组；键名的值不是数组时报错。
+    """
+    text = ('{"note": "\\"companies\\": [\\"假\\"]", "meta": {"companies": ["嵌套"]}, '
+            '"list": [{"companies": ["数组中"]}], "companies": [{"name": "甲"}]}')
+    items = list(init_db.iter_json_array(io.StringIO(text), 'companies', read_size=3))
+    assert items == [{'name': '甲'}]
+
+    with pytest.raises(ValueError):
+        list(init_db.iter_json_array(io.StringIO('{"meta": {"companies": []}}'), 'companies'))
+    with pytest.raises(ValueError):
+        list(init_db.iter_json_array(io.StringIO('{"companies": {"name": "甲"}}'), 'companies'))
+
+
+def test_iter_json_array_large_element_decoded_few_times(monkeypatch):
+    """
+    测试跨越很多次读取的单个大元素不会每读一块就从头重新解码。
+    """
+    calls = []
+    raw_decode = json.JSONDecoder.raw_decode
+    monkeypatch.setattr(json.JSONDecoder, 'raw_decode',
+                        lambda self, s, idx=0: calls.append(idx) or raw_decode(self, s, idx))
+    company = {'name': '大公司', 'projects': [{'name': f'项目{i}'} for i in range(20000)]}
+    text = json.dumps({'companies': [company, {'name': '小公司'}]}, ensure_ascii=False)
+
+    items = list(init_db.iter_json_array(io.StringIO(text), 'companies', read_size=1024))
+    assert items == [company, {'name': '小公司'}]
+    assert len(text) // 1024 > 200
+    assert len(calls) < 30
+
+
+def test_iter_json_array_memory_is_flat(tmp_path):
+    """
+    测试解析大文件时内存峰值与单个元素相当，而不是与文件大小相当。
+    """
+    companies = [{'name': f'公司{i}', 'projects': [{'name': f'项目{i}-{j}'} for j in range(20)]} for i in range(20000)]
+    path = _write_org(tmp_path, companies)
+    file_size = os.path.getsize(path)
+    del companies
+
+    tracemalloc.start()
+    try:
+        with open(path, encoding='utf-8') as fp:
+            count = sum(1 for _ in init_db.iter_json_array(fp, 'companies'))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert count == 20000
+    assert file_size > 10 * 1024 * 1024
+    # 峰值只与读取块大小和单个元素有关（约 1MB），与文件大小无关
+    assert peak < 2 * 1024 * 1024
+
+
+def test_load_org_file_is_idempotent():
+    """
+    测试重复导入 initial_data.json 不报唯一约束错误，也不产生重复数据。
+    """
+    first = init_db.load_org_file()
+    assert first['companies_created'] > 0
+    assert first['projects_created'] > 0
+    catalog = _catalog()
+
+    second = init_db.load_org_file()
+    assert second == {'companies_created': 0, 'projects_created': 0, 'projects_updated': 0}
+    assert _catalog() == catalog
+    assert db.session.execute(select(func.count()).select_from(Company)).scalar() == first['companies_created']
+
+
+def test_load_org_file_updates_moved_projects(tmp_path):
+    """
+    测试项目换了所属公司时更新 company_id，新增的公司和项目被插入，文件中没有的数据保持不变。
+    """
+    init_db.load_org_file(_write_org(tmp_path, [
+        {'name': '甲公司', 'projects': [{'name': '一号项目'}, {'name': '二号项目'}]},
+        {'name': '乙公司', 'projects': [{'name': '三号项目'}]},
+    ], 'v1.json'))
+
+    stats = init_db.load_org_file(_write_org(tmp_path, [
+        {'name': '乙公司', 'projects': [{'name': '三号项目'}, {'name': '二号项目'}]},
+        {'name': '丙公司', 'projects': [{'name': '四号项目'}]},
+    ], 'v2.json'))
+
+    assert stats == {'companies_created': 1, 'projects_created': 1, 'projects_updated': 1}
+    assert _catalog() == {'一号项目': '甲公司', '二号项目': '乙公司', '三号项目': '乙公司', '四号项目': '丙公司'}
+
+
+def test_load_org_file_rolls_back_on_error(tmp_path, monkeypatch):
+    """
+    测试文件中途出错时整个导入回滚，不留下部分数据（出错前已经写入了一批）。
+    """
+    monkeypatch.setattr(init_db, 'BATCH_SIZE', 1)
+    path = tmp_path / 'broken.json'
+    path.write_text('{"companies": [{"name": "甲公司", "projects": [{"name": "一号项目"}]}, {"name": ', encoding='utf-8')
+
+    with pytest.raises(ValueError):
+        init_db.load_org_file(str(path))
+    assert db.session.execute(select(func.count()).select_from(Company)).scalar() == 0
@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+from extensions import metrics
+import json
+import logging
+import pytest
+
+
+@pytest.fixture(scope='module')
+def app():
+    """
+    创建Flask应用实例并配置为测试模式。
+    初始化数据库并在测试结束后清理。
+    """
+    app = create_app()
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """
+    创建测试客户端，用于发送HTTP请求到应用。
+    """
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """
+    每个测试前清空统计数据。
+    """
+    metrics.reset()
+
+
+def _metric_value(text, prefix):
+    """
+    从 Prometheus 文本中找出以 prefix 开头的指标行，返回其数值。
+    """
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f'未找到指标: {prefix}')
+
+
+def test_metrics_endpoint_reports_latency_and_sql(client):
+    """
+    测试请求后 /metrics 输出该接口的请求数、耗时直方图、SQL 条数和耗时。
+    """
+    for _ in range(2):
+        assert client.get('/api/companies/991/projects').status_code == 404
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+
+    label = 'endpoint="/api/companies/<int:id>/projects"'
+    assert _metric_value(text, f'http_requests_total{{{label},method="GET",status="404"}}') == 2
+    assert _metric_value(text, f'http_request_duration_seconds_bucket{{{label},le="+Inf"}}') == 2
+    assert _metric_value(text, f'http_request_duration_seconds_count{{{label}}}') == 2
+    assert _metric_value(text, f'http_request_sql_statements_total{{{label}}}') >= 1
+    assert _metric_value(text, f'http_request_sql_seconds_total{{{label}}}') > 0
+    assert _metric_value(text, f'http_request_serialization_seconds_total{{{label}}}') > 0
+
+
+def test_slow_request_log_lists_top_statements(app, client, caplog):
+    """
+    测试请求耗时超过阈值时输出结构化的慢请求日志，包含耗时最长的 SQL。
+    """
+    app.config['SLOW_REQUEST_THRESHOLD_MS'] = 0
+    app.config['SLOW_REQUEST_TOP_N'] = 1
+    try:
+        with caplog.at_level(logging.WARNING, logger=app.logger.name):
+            client.get('/api/companies/992/projects')
+    finally:
+        app.config['SLOW_REQUEST_THRESHOLD_MS'] = 500
+        app.config['SLOW_REQUEST_TOP_N'] = 5
+
+    records = [json.loads(r.getMessage()) for r in caplog.records if 'slow_request' in r.getMessage()]
+    assert len(records) == 1
+    record = records[0]
+    assert record['endpoint'] == '/api/companies/<int:id>/projects'
+    assert record['status'] == 404
+    assert record['sql_count'] >= 1
+    assert len(record['top_statements']) == 1
+    assert 'SELECT' in record['top_statements'][0]['sql']
@@ -0,0 +1,127 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+from config import TestConfig
+import threading
+import pytest
+from sqlalchemy import update
+from modules.auth import PasswordHasherBusy, User, password_hasher
+from modules.auth.passwords import is_hashed
+
+
+@pytest.fixture(scope='module')
+def app():
+    """
+    创建Flask应用实例并配置为测试模式（密码哈希使用 TestConfig 的最低代价）。
+    初始化数据库并在测试结束后清理。
+    """
+    app = create_app(TestConfig)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture(scope='module')
+def client(app):
+    return app.test_client()
+
+
+def _register(client, username, password='testpassword'):
+    return client.post('/api/auth/register', json={'username': username, 'password': password})
+
+
+def _login(client, username, password='testpassword'):
+    return client.post('/api/auth/login', json={'username': username, 'password': password})
+
+
+def _stored_password(username):
+    db.session.rollback()
+    return User.query.filter_by(username=username).one().password
+
+
+def _set_password(username, stored):
+    db.session.execute(update(User).where(User.username == username).values(password=stored))
+    db.session.commit()
+
+
+def test_register_stores_hash(client):
+    """
+    测试注册只保存按当前配置计算的加盐哈希，同一密码每次的哈希不同；正确密码可以登录，错误密码返回 401。
+    """
+    assert _register(client, 'hashuser').status_code == 201
+    assert _register(client, 'hashuser2').status_code == 201
+    stored = _stored_password('hashuser')
+    assert stored.startswith('pbkdf2:sha256:1000$')
+    assert 'testpassword' not in stored
+    assert stored != _stored_password('hashuser2')
+
+    assert _login(client, 'hashuser').status_code == 200
+    assert _login(client, 'hashuser', 'wrongpassword').status_code == 401
+    assert _stored_password('hashuser') == stored
+
+
+def test_unknown_user_rejected(client):
+    """
+    测试不存在的用户返回 401。
+    """
+    assert _login(client, 'nosuchuser').status_code == 401
+
+
+def test_plaintext_password_rehashed_on_login(client):
+    """
+    测试库中旧的明文密码：错误密码返回 401 且不改写，正确密码登录成功后改存哈希，之后按哈希核对。
+    """
+    _register(client, 'legacyuser')
+    _set_password('legacyuser', 'testpassword')
+
+    assert _login(client, 'legacyuser', 'wrongpassword').status_code == 401
+    assert _stored_password('legacyuser') == 'testpassword'
+
+    assert _login(client, 'legacyuser').status_code == 200
+    stored = _stored_password('legacyuser')
+    assert is_hashed(stored) and stored.startswith('pbkdf2:sha256:1000$')
+    assert _login(client, 'legacyuser').status_code == 200
+    assert _login(client, 'legacyuser', 'wrongpassword').status_code == 401
+
+
+def test_old_cost_rehashed_on_login(client):
+    """
+    测试按旧代价计算的哈希登录成功后按当前配置重新计算。
+    """
+    _register(client, 'costuser')
+    _set_password('costuser', 'pbkdf2:sha256:500$salt$' + '0' * 64)
+    assert _login(client, 'costuser').status_code == 401
+
+    old_method, password_hasher.method = password_hasher.method, 'pbkdf2:sha256:500'
+    password_hasher._dummy = None
+    try:
+        _set_password('costuser', password_hasher.hash('testpassword'))
+    finally:
+        password_hasher.method = old_method
+        password_hasher._dummy = None
+
+    assert _login(client, 'costuser').status_code == 200
+    assert _stored_password('costuser').startswith('pbkdf2:sha256:1000$')
+
+
+def test_busy_pool_returns_503(client, monkeypatch):
+    """
+    测试哈希线程池已满时登录和注册直接返回 503 和 Retry-After，不排队等待。
+    """
+    _register(client, 'busyuser')
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(password_hasher, '_slots', slots)
+
+    response = _login(client, 'busyuser')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert _register(client, 'busyuser2').status_code == 503
+    with pytest.raises(PasswordHasherBusy):
+        password_hasher.hash('testpassword')
+
+    slots.release()
+    assert _login(client, 'busyuser').status_code == 200
@@ -0,0 +1,150 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+from config import TestConfig
+import pytest
+from extensions import rate_limiter
+from ratelimit import DatabaseBucketStore, MemoryBucketStore
+
+
+@pytest.fixture(scope='module')
+def app():
+    """
+    创建开启限流的应用实例：登录每个 IP 每分钟 6 次、其中同一用户名 3 次，在岗名单每分钟 2 次（按用户），
+    部署在一层反向代理之后。
+    """
+    class LimitedConfig(TestConfig):
+        RATELIMIT_ENABLED = True
+        TRUSTED_PROXY_HOPS = 1
+        RATELIMIT_RULES = {
+            '/api/auth/login': [
+                {'limit': 6, 'period': 60, 'key': 'ip'},
+                {'limit': 3, 'period': 60, 'key': 'ip_username'},
+            ],
+            '/api/active-employees': {'limit': 2, 'period': 60},
+        }
+
+    app = create_app(LimitedConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    rate_limiter.store.clear()
+    return app.test_client()
+
+
+def _register(client, username):
+    response = client.post('/api/auth/register', json={'username': username, 'password': 'testpassword'})
+    assert response.status_code in (200, 201, 400)
+
+
+def _login(client, username, ip='10.0.0.1', forwarded_for=None):
+    headers = {'X-Forwarded-For': forwarded_for} if forwarded_for else {}
+    return client.post('/api/auth/login', json={'username': username, 'password': 'testpassword'},
+                       environ_base={'REMOTE_ADDR': ip}, headers=headers)
+
+
+def test_login_limited_per_ip(client):
+    """
+    测试同一 IP 对同一用户名的登录超出配额返回 429 和 Retry-After，其他 IP 不受影响；未配置规则的注册接口不限流。
+    """
+    for _ in range(5):
+        _register(client, 'limituser')
+    assert [_login(client, 'limituser').status_code for _ in range(3)] == [200, 200, 200]
+
+    response = _login(client, 'limituser')
+    assert response.status_code == 429
+    assert 1 <= int(response.headers['Retry-After']) <= 20
+    assert 'message' in response.json
+
+    assert _login(client, 'limituser', ip='10.0.0.2').status_code == 200
+
+
+def test_login_limited_per_ip_across_usernames(client):
+    """
+    测试同一 IP 轮换用户名登录也受按 IP 的配额限制；被拒绝的请求不会再为新的用户名创建令牌桶。
+    """
+    statuses = [_login(client, f'guess_{i}').status_code for i in range(7)]
+    assert statuses == [401] * 6 + [429]
+    assert _login(client, 'guess_new').status_code == 429
+    assert not any('username:guess_new' in key for key in rate_limiter.store._buckets)
+    assert _login(client, 'guess_new', ip='10.0.0.2').status_code == 401
+
+
+def test_client_ip_from_trusted_proxy(client):
+    """
+    测试部署在反向代理之后时按 X-Forwarded-For 中代理添加的客户端IP计数，而不是代理自己的IP；
+    客户端伪造的更早的 X-Forwarded-For 条目不被信任。
+    """
+    _register(client, 'proxyuser')
+    proxy = '192.168.0.1'
+    statuses = [_login(client, 'proxyuser', proxy, forwarded_for='203.0.113.1').status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    assert _login(client, 'proxyuser', proxy, forwarded_for='203.0.113.2').status_code == 200
+    # 伪造的第一项被忽略，仍按代理添加的最后一项（203.0.113.1）计数
+    assert _login(client, 'proxyuser', proxy, forwarded_for='198.51.100.9, 203.0.113.1').status_code == 429
+
+
+def test_authenticated_routes_limited_per_user(client):
+    """
+    测试登录后的接口按用户限流：同一 IP 的两个用户各有自己的配额。
+    """
+    _register(client, 'user_a')
+    _register(client, 'user_b')
+    headers_a = {'Authorization': f"Bearer {_login(client, 'user_a').json['token']}"}
+    headers_b = {'Authorization': f"Bearer {_login(client, 'user_b').json['token']}"}
+
+    statuses = [client.get('/api/active-employees', headers=headers_a).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    assert client.get('/api/active-employees', headers=headers_b).status_code == 200
+    # 未配置规则的接口不限流
+    assert client.get('/api/companies', headers=headers_a).status_code == 200
+
+
+def test_invalid_token_limited_per_ip(client):
+    """
+    测试令牌无效时按 IP 计数（伪造令牌不能绕过限流），请求最终仍被认证拒绝。
+    """
+    headers = {'Authorization': 'Bearer forged'}
+    statuses = [client.get('/api/active-employees', headers=headers).status_code for _ in range(3)]
+    assert 429 not in statuses[:2]
+    assert statuses[2] == 429
+
+
+@pytest.mark.parametrize('make_store', [lambda: MemoryBucketStore(), lambda: DatabaseBucketStore(db)],
+                         ids=['memory', 'database'])
+def test_token_bucket_refills(app, make_store):
+    """
+    测试令牌桶：容量内的突发请求放行，用完后返回需要等待的秒数，按速率补充，最多补满到容量。
+    """
+    store = make_store()
+    store.clear()
+    rate, capacity = 0.5, 2  # 每 2 秒补充一个令牌
+    assert store.take('bucket', rate, capacity, now=100.0) == 0
+    assert store.take('bucket', rate, capacity, now=100.0) == 0
+    assert store.take('bucket', rate, capacity, now=100.0) == pytest.approx(2.0)
+    assert store.take('bucket', rate, capacity, now=101.0) == pytest.approx(1.0)
+    assert store.take('bucket', rate, capacity, now=102.0) == 0
+    # 空闲很久也只补满到容量
+    assert store.take('bucket', rate, capacity, now=1000.0) == 0
+    assert store.take('bucket', rate, capacity, now=1000.0) == 0
+    assert store.take('bucket', rate, capacity, now=1000.0) > 0
+    # 不同的桶互不影响
+    assert store.take('other', rate, capacity, now=1000.0) == 0
+
+
+def test_database_store_prunes_idle_buckets(app):
+    """
+    测试数据库令牌桶的清理：空闲时间足以补满的桶被删除，删除后等价于满桶。
+    """
+    store = DatabaseBucketStore(db)
+    store.clear()
+    store.take('idle', 1, 5, now=100.0)
+    store.take('busy', 1, 5, now=200.0)
+    assert store.prune(now=203.0) == 1
+    assert store.take('idle', 1, 5, now=203.0) == 0
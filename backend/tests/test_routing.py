@@ -0,0 +1,177 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+from config import Config
+import pytest
+from sqlalchemy import insert, select, update
+from modules.auth import User
+from modules.company import Company, Project
+from modules.employee import Employee
+from extensions import replica_router
+from routing import PRIMARY_UNTIL_HEADER
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """
+    用两个 SQLite 文件分别充当主库和从库，两边各自建表。
+    两个库之间没有复制，每个测试按需往某一边写入数据，从而判断查询发往了哪个库。
+    """
+    data_dir = tmp_path_factory.mktemp('routing')
+
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{data_dir / 'primary.db'}"
+        SQLALCHEMY_REPLICA_URIS = [f"sqlite:///{data_dir / 'replica.db'}"]
+        SLOW_REQUEST_THRESHOLD_MS = None
+        TESTING = True
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(app.extensions['replica_engines'][0])
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+        app.extensions['replica_engines'][0].dispose()
+
+
+@pytest.fixture
+def replica(app):
+    """从库引擎"""
+    return app.extensions['replica_engines'][0]
+
+
+def _login_headers(app, username):
+    """
+    在主库注册并登录用户，并把用户复制到从库（模拟复制），返回认证请求头。
+    """
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'username': username,
+        'password': 'testpassword'
+    })
+    response = client.post('/api/auth/login', json={
+        'username': username,
+        'password': 'testpassword'
+    })
+    user = User.query.filter_by(username=username).first()
+    with app.extensions['replica_engines'][0].begin() as conn:
+        conn.execute(insert(User.__table__).values(id=user.id, username=user.username, password=user.password))
+    return {
+        'Authorization': f"Bearer {response.json['token']}"
+    }
+
+
+@pytest.fixture(scope='module')
+def auth_headers(app):
+    return _login_headers(app, 'testuser')
+
+
+@pytest.fixture(scope='module')
+def other_headers(app):
+    """另一个用户的认证请求头"""
+    return _login_headers(app, 'otheruser')
+
+
+def test_read_endpoints_query_replica(app, replica, auth_headers):
+    """
+    测试标记为只读的接口从从库读取：只存在于从库的数据能查到。
+    """
+    client = app.test_client()
+    response = client.get('/api/users/me', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['username'] == 'testuser'
+
+    with replica.begin() as conn:
+        conn.execute(update(User.__table__).where(User.__table__.c.username == 'testuser').values(username='replicauser'))
+    try:
+        assert client.get('/api/users/me', headers=auth_headers).json['username'] == 'replicauser'
+    finally:
+        with replica.begin() as conn:
+            conn.execute(update(User.__table__).where(User.__table__.c.username == 'replicauser')
+                         .values(username='testuser'))
+
+
+def test_cached_endpoints_load_from_primary(app, replica, auth_headers, other_headers):
+    """
+    测试由缓存提供的公司/项目目录和人数统计从主库加载：提交后缓存失效，重新加载时不会把
+    复制延迟中的从库数据以新版本号缓存下来。
+    """
+    client = app.test_client()
+    with replica.begin() as conn:
+        conn.execute(insert(Company.__table__).values(id=100, name='从库公司'))
+        conn.execute(insert(Project.__table__).values(id=100, name='从库项目', company_id=100))
+    client.get('/api/companies')
+    db.session.add(Company(name='主库公司'))
+    db.session.commit()
+
+    names = [c['name'] for c in client.get('/api/companies').json['companies']]
+    assert '主库公司' in names and '从库公司' not in names
+    assert client.get('/api/companies/100/projects').status_code == 404
+
+    assert client.get('/api/stats/headcount', headers=auth_headers).status_code == 200
+    # 另一个用户写入，当前用户没有被记为读主库
+    assert app.test_client().post('/api/employees', json={
+        'name': '统计员工', 'position': '统计测试岗', 'efffective_date': '2024-01-01'
+    }, headers=other_headers).status_code == 201
+    response = client.get('/api/stats/headcount', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['total'] >= 1
+
+
+def test_writes_go_to_primary_and_writer_reads_its_own_writes(app, replica, auth_headers, other_headers):
+    """
+    测试写操作只写主库；写过的用户在 REPLICA_READ_AFTER_WRITE_SECONDS 内读主库（不依赖 cookie，
+    前端跨域请求不带 cookie），其他用户仍然读从库，带回 PRIMARY_UNTIL_HEADER 的请求也读主库。
+    """
+    replica_router._writers.clear()
+    writer = app.test_client(use_cookies=False)
+    reader = app.test_client(use_cookies=False)
+
+    response = writer.post('/api/employees', json={
+        'name': '读写分离员工', 'position': '路由测试岗', 'efffective_date': '2024-01-01'
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    assert 'Set-Cookie' not in response.headers
+    primary_until = response.headers[PRIMARY_UNTIL_HEADER]
+    employee_id = response.json['employee']['id']
+
+    with replica.connect() as conn:
+        assert conn.execute(select(Employee.__table__.c.id).where(Employee.__table__.c.id == employee_id)).first() is None
+    assert db.session.get(Employee, employee_id) is not None
+
+    def active_ids(client, headers):
+        response = client.get('/api/active-employees', query_string={'position': '路由测试岗'}, headers=headers)
+        assert response.status_code == 200
+        return [e['id'] for e in response.json['employees']]
+
+    assert active_ids(reader, auth_headers) == [employee_id]
+    assert active_ids(reader, other_headers) == []
+    # 落到其他进程（没有该用户的写入记录）时，靠前端带回的响应头读主库
+    replica_router._writers.clear()
+    assert active_ids(reader, {**auth_headers, PRIMARY_UNTIL_HEADER: primary_until}) == [employee_id]
+
+    # 读取窗口过期后，写过的用户也回到从库
+    assert active_ids(reader, auth_headers) == []
+    assert active_ids(reader, {**auth_headers, PRIMARY_UNTIL_HEADER: '0'}) == []
+
+
+def test_reads_after_write_in_same_request_use_primary(app, replica):
+    """
+    测试同一个请求里写过之后，即使标记为读从库，后续查询也走主库。
+    """
+    from routing import replica_read
+
+    statement = select(Company.__table__.c.id)
+
+    @replica_read
+    def handler():
+        assert db.session.get_bind(clause=statement) is replica
+        db.session.execute(update(Company.__table__).where(Company.__table__.c.id == 0).values(name='x'))
+        assert db.session.get_bind(clause=statement) is db.engine
+        db.session.rollback()
+
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        handler()
@@ -0,0 +1,141 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+import pytest
+import seed
+from sqlalchemy import func, inspect, select
+from modules.auth import User
+from modules.change import ChangeRequest
+from modules.company import Company, Project
+from modules.employee import Employee, EmployeeNameGram, name_grams
+
+
+@pytest.fixture(scope='module')
+def app():
+    """
+    创建Flask应用实例并配置为测试模式。
+    """
+    app = create_app()
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture(autouse=True)
+def fresh_db(app):
+    """
+    seed 命令按块提交事务，无法用嵌套事务回滚，每个测试前重建所有表。
+    """
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    yield
+    db.session.remove()
+
+
+@pytest.fixture
+def runner(app):
+    """
+    创建测试命令行运行器，用于测试Flask命令行接口。
+    """
+    return app.test_cli_runner()
+
+
+def _count(model):
+    return db.session.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_generate_rows_is_deterministic():
+    """
+    测试同样的规模和种子生成完全相同的数据，不同种子生成不同的数据，
+    且调岗变动的目标项目属于目标公司。
+    """
+    sizes = seed.SCALES['tiny']
+
+    def snapshot(value):
+        return {name: list(rows) for name, rows in seed.generate_rows(sizes, value)}
+
+    first = snapshot(7)
+    assert first == snapshot(7)
+    assert first['employee'] != snapshot(8)['employee']
+    assert len(first['employee']) == sizes['employees']
+    assert len(first['change_request']) == sizes['changes']
+
+    columns = seed.COLUMNS['change_request']
+    projects = {row[0]: row[2] for row in first['project']}
+    for row in first['change_request']:
+        change = dict(zip(columns, row))
+        if change['type'] == '调岗':
+            assert projects[change['to_project_id']] == change['to_company_id']
+
+
+def test_seed_command_inserts_generated_rows(runner):
+    """
+    测试 flask seed 按预设规模写入各表，并且插入后二级索引仍然存在（插入前删除、插入后重建）。
+    """
+    result = runner.invoke(args=['seed', '--scale', 'tiny', '--changes', '2000'])
+    assert result.exit_code == 0, result.output
+    assert '行/秒' in result.output
+
+    sizes = seed.SCALES['tiny']
+    assert _count(Company) == sizes['companies']
+    assert _count(Project) == sizes['projects']
+    assert _count(User) == sizes['users']
+    assert _count(Employee) == sizes['employees']
+    assert _count(ChangeRequest) == 2000
+
+    index_names = {index['name'] for index in inspect(db.engine).get_indexes('employee')}
+    assert {'ix_employee_status_id', 'ix_employee_company_id_status', 'ix_employee_project_id_status'} <= index_names
+
+    # 写入的日期可以按 ORM 的 Date 类型正常读出
+    employee = db.session.get(Employee, 1)
+    assert employee.efffective_date.year >= seed.START_DATE.year
+    assert employee.company_id == db.session.get(Project, employee.project_id).company_id
+
+    # 姓名搜索索引与员工一起生成
+    grams = db.session.execute(
+        select(EmployeeNameGram.gram).where(EmployeeNameGram.employee_id == employee.id)
+    ).scalars().all()
+    assert sorted(grams) == sorted(name_grams(employee.name))
+
+
+def test_seed_command_continues_after_existing_ids(runner):
+    """
+    测试在已有数据的数据库上再次执行 seed，新行从当前最大ID之后编号，不会主键或唯一约束冲突。
+    """
+    args = ['seed', '--scale', 'tiny', '--employees', '50', '--changes', '100']
+    assert runner.invoke(args=args).exit_code == 0
+    result = runner.invoke(args=args + ['--seed', '1'])
+    assert result.exit_code == 0, result.output
+
+    assert _count(Company) == 2 * seed.SCALES['tiny']['companies']
+    assert _count(Employee) == 100
+    assert _count(ChangeRequest) == 200
+    # 第二批的变动只引用第二批的员工
+    min_employee = db.session.execute(
+        select(func.min(ChangeRequest.employee_id)).where(ChangeRequest.id > 100)
+    ).scalar()
+    assert min_employee > 50
+
+
+def test_seed_command_loads_file(runner):
+    """
+    测试 flask seed --file 导入 initial_data.json 格式的公司和项目。
+    """
+    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'initial_data.json')
+    result = runner.invoke(args=['seed', '--file', path])
+    assert result.exit_code == 0, result.output
+
+    company = db.session.execute(select(Company).where(Company.name == '珠海分公司')).scalar_one()
+    assert {project.name for project in company.projects} >= {'丝源大厦', '清远涉外学院', '格力创投中心'}
+
+
+def test_seed_command_rejects_inconsistent_sizes(runner):
+    """
+    测试要求生成员工但没有项目时，命令报用法错误且不写入数据。
+    """
+    result = runner.invoke(args=['seed', '--scale', 'tiny', '--projects', '0'])
+    assert result.exit_code == 2
+    assert _count(Company) == 0
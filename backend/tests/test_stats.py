@@ -0,0 +1,175 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app, db
+import pytest
+from sqlalchemy import event
+from modules.change import ChangeRequest
+from modules.company import Company, Project
+from modules.stats import headcount_cache
+
+
+@pytest.fixture(scope='module')
+def app():
+    """
+    创建Flask应用实例并配置为测试模式。
+    初始化数据库并在测试结束后清理。
+    """
+    app = create_app()
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """
+    创建测试客户端，用于发送HTTP请求到应用。
+    """
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def clean_db(app):
+    """
+    在每个测试之前开始一个数据库会话，
+    并在测试之后回滚以保持数据库状态干净。
+    """
+    with app.app_context():
+        db.session.begin_nested()
+        yield
+        db.session.rollback()
+        headcount_cache.invalidate()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """
+    注册并登录一个测试用户，获取认证头信息。
+    """
+    client.post('/api/auth/register', json={
+        'username': 'testuser',
+        'password': 'testpassword'
+    })
+    response = client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'testpassword'
+    })
+    return {
+        'Authorization': f"Bearer {response.json['token']}"
+    }
+
+
+@pytest.fixture
+def project(app):
+    """
+    创建一个统计测试用的公司和项目。
+    """
+    company = Company(name='统计公司')
+    db.session.add(company)
+    db.session.flush()
+    project = Project(name='统计项目', company_id=company.id)
+    db.session.add(project)
+    db.session.commit()
+    return project
+
+
+def _headcount(client, auth_headers):
+    response = client.get('/api/stats/headcount', headers=auth_headers)
+    assert response.status_code == 200, response.json
+    return response.json
+
+
+def _month(stats, month):
+    return next((m for m in stats['monthly'] if m['month'] == month), {'joiners': 0, 'leavers': 0})
+
+
+def _add_employee(client, auth_headers, name, day):
+    response = client.post('/api/employees', json={
+        'name': name, 'position': '统计测试岗', 'efffective_date': day
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json['employee']['id']
+
+
+def _approve(client, auth_headers, employee_id):
+    change = ChangeRequest.query.filter_by(employee_id=employee_id, status='待确认').one()
+    response = client.put(f'/api/pending-changes/{change.id}/approve', headers=auth_headers)
+    assert response.status_code == 200, response.json
+
+
+def test_headcount_grouped_by_company_project_and_month(client, auth_headers, project):
+    """
+    测试人数统计：按公司/项目/状态分组，调岗后入职月份不变，离职按生效月份计入（含待生效）。
+    """
+    before = _headcount(client, auth_headers)
+
+    transferred = _add_employee(client, auth_headers, '统计员工甲', '2021-05-10')
+    resigned = _add_employee(client, auth_headers, '统计员工乙', '2021-05-20')
+    client.put(f'/api/pending-changes/{transferred}/transfer', json={
+        'new_company': project.company_id, 'new_project': project.id, 'effective_date': '2021-06-01'
+    }, headers=auth_headers)
+    _approve(client, auth_headers, transferred)
+    client.put(f'/api/pending-changes/{resigned}/resign', json={'resign_date': '2031-07-01'}, headers=auth_headers)
+    _approve(client, auth_headers, resigned)
+
+    stats = _headcount(client, auth_headers)
+    assert stats['total'] == before['total'] + 2
+    # 调岗的生效日期已过，员工在岗；离职日期在未来，员工仍为待岗
+    assert stats['by_status']['在岗'] == before['by_status'].get('在岗', 0) + 1
+    assert stats['by_status']['待岗'] == before['by_status'].get('待岗', 0) + 1
+
+    [company] = [c for c in stats['by_company'] if c['company_id'] == project.company_id]
+    assert company == {'company_id': project.company_id, 'company_name': '统计公司',
+                       'total': 1, 'by_status': {'在岗': 1}}
+    [row] = [p for p in stats['by_project'] if p['project_id'] == project.id]
+    assert row['project_name'] == '统计项目' and row['company_id'] == project.company_id
+    assert row['by_status'] == {'在岗': 1}
+
+    assert _month(stats, '2021-05') == {'month': '2021-05', 'joiners': 2, 'leavers': 0}
+    assert _month(stats, '2021-06') == {'joiners': 0, 'leavers': 0}
+    assert _month(stats, '2031-07') == {'month': '2031-07', 'joiners': 0, 'leavers': 1}
+
+
+def test_headcount_cached_until_employee_or_change_commit(app, client, auth_headers):
+    """
+    测试统计结果被缓存：重复请求不执行 SQL；添加员工或审批变动提交后重新计算。
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'GROUP BY' in statement:
+            statements.append(statement)
+
+    _headcount(client, auth_headers)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        _headcount(client, auth_headers)
+        assert statements == []
+
+        employee_id = _add_employee(client, auth_headers, '缓存员工', '2032-01-15')
+        stats = _headcount(client, auth_headers)
+        assert len(statements) == 3
+        assert _month(stats, '2032-01')['joiners'] == 1
+
+        client.put(f'/api/pending-changes/{employee_id}/resign', json={'resign_date': '2032-02-01'},
+                   headers=auth_headers)
+        _headcount(client, auth_headers)
+        statements.clear()
+        # 审批是带条件的 UPDATE 语句（不经过 ORM 对象），同样使缓存失效
+        _approve(client, auth_headers, employee_id)
+        stats = _headcount(client, auth_headers)
+        assert len(statements) == 3
+        assert _month(stats, '2032-02')['leavers'] == 1
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_headcount_requires_login(client):
+    """
+    测试未登录时返回 401。
+    """
+    assert client.get('/api/stats/headcount').status_code == 401
@@ -1,10 +1,11 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Button } from "@/components/ui/button"
+import { Input } from "@/components/ui/input"
 import { TransferModal } from './transfer-modal'
 import { ResignModal } from './resign-modal'
-import { getActiveEmployees } from '@/lib/api'
+import { getActiveEmployeeChanges, getActiveEmployees, searchEmployees } from '@/lib/api'
 import { Employee } from '@/lib/types'
 import { toast } from "@/components/ui/use-toast"
 
@@ -12,18 +13,70 @@ interface EmployeeListProps {
   refreshKey: number
 }
 
+// 已加载的名单：按 id 排序的前几页，nextCursor 为 null 表示已加载到最后一页
+interface Roster {
+  employees: Employee[]
+  syncSeq: number
+  nextCursor: string | null
+}
+
+// 把增量同步的结果合并到本地名单：按 id 替换或追加修改过的员工，删除离开名单的员工，保持按 id 排序。
+// 还有没加载的页时，只合并已加载范围（id 不超过最后一条）内的员工，之后的员工在加载下一页时取到
+function applyChanges(roster: Roster, changes: { employees: Employee[], removed: number[], sync_seq: number }): Roster {
+  const byId = new Map(roster.employees.map(e => [e.id, e]))
+  const lastId = roster.employees.length ? roster.employees[roster.employees.length - 1].id : 0
+  changes.removed.forEach(id => byId.delete(id))
+  changes.employees
+    .filter(e => roster.nextCursor === null || e.id <= lastId)
+    .forEach(e => byId.set(e.id, e))
+  return {
+    employees: Array.from(byId.values()).sort((a, b) => a.id - b.id),
+    syncSeq: changes.sync_seq,
+    nextCursor: roster.nextCursor,
+  }
+}
+
 export function EmployeeList({ refreshKey }: EmployeeListProps) {
   const [employees, setEmployees] = useState<Employee[]>([])
   const [isTransferModalOpen, setIsTransferModalOpen] = useState(false)
   const [isResignModalOpen, setIsResignModalOpen] = useState(false)
   const [selectedEmployee, setSelectedEmployee] = useState<Employee | null>(null)
   const [refresh, setRefresh] = useState(0)
+  const [query, setQuery] = useState('')
+  const [hasMore, setHasMore] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
+  // 已加载名单的本地副本，刷新时只取 syncSeq 之后的变化
+  const roster = useRef<Roster | null>(null)
 
   useEffect(() => {
+    let cancelled = false
     const fetchEmployees = async () => {
       try {
-        const res = await getActiveEmployees()
-        setEmployees(res.employees) // 直接使用 res.employees 而不是 res.data
+        // 输入了关键词时由服务端按姓名搜索，不再下载全部名单在浏览器里过滤
+        const keyword = query.trim()
+        if (keyword) {
+          const res = await searchEmployees(keyword)
+          if (!cancelled) {
+            setEmployees(res.employees)
+          }
+          return
+        }
+        let next: Roster
+        if (roster.current) {
+          next = applyChanges(roster.current, await getActiveEmployeeChanges(roster.current.syncSeq))
+        } else {
+          // 首次加载只取第一页，更多的员工由"加载更多"按页取
+          const res = await getActiveEmployees()
+          next = { employees: res.employees, syncSeq: res.sync_seq, nextCursor: res.next_cursor }
+        }
+        // 被取消的请求结果同样有效，保存下来，下次增量同步从这里继续
+        if (!roster.current || next.syncSeq >= roster.current.syncSeq) {
+          roster.current = next
+        }
+        if (!cancelled) {
+          setEmployees(roster.current.employees)
+          setHasMore(roster.current.nextCursor !== null)
+        }
       } catch (error) {
         toast({ 
           title: "获取员工列表失败", 
@@ -32,8 +85,41 @@ export function EmployeeList({ refreshKey }: EmployeeListProps) {
         })
       }
     }
-    fetchEmployees()
-  }, [refreshKey]) // 添加 refreshKey 依赖
+    // 输入停顿 300ms 后再请求，避免每敲一个字发一次请求
+    const timer = setTimeout(fetchEmployees, query ? 300 : 0)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [refreshKey, query]) // 添加 refreshKey 依赖
+
+  // 取下一页追加到已加载的名单
+  const handleLoadMore = async () => {
+    const current = roster.current
+    if (!current || current.nextCursor === null || loadingMore) return
+    setLoadingMore(true)
+    try {
+      const res = await getActiveEmployees(current.nextCursor)
+      const known = new Set(current.employees.map(e => e.id))
+      roster.current = {
+        employees: [...current.employees, ...res.employees.filter(e => !known.has(e.id))],
+        syncSeq: current.syncSeq,
+        nextCursor: res.next_cursor,
+      }
+      if (!query.trim()) {
+        setEmployees(roster.current.employees)
+      }
+      setHasMore(res.next_cursor !== null)
+    } catch (error) {
+      toast({
+        title: "获取员工列表失败",
+        description: error instanceof Error ? error.message : "未知错误",
+        variant: "destructive"
+      })
+    } finally {
+      setLoadingMore(false)
+    }
+  }
 
   const handleTransfer = (employee: Employee) => {
     setSelectedEmployee(employee)
@@ -55,6 +141,13 @@ export function EmployeeList({ refreshKey }: EmployeeListProps) {
   return (
     <div className="space-y-4">
       <h2 className="text-2xl font-bold">员工列表</h2>
+
+      <Input
+        placeholder="按姓名搜索"
+        value={query}
+        onChange={(e) => setQuery(e.target.value)}
+        className="max-w-xs"
+      />
       
       <div className="grid gap-4 md:grid-cols-2 lg:grid-cols-3">
         {employees.map((employee) => (
@@ -95,6 +188,14 @@ export function EmployeeList({ refreshKey }: EmployeeListProps) {
         ))}
       </div>
 
+      {hasMore && !query.trim() && (
+        <div className="flex justify-center">
+          <Button variant="outline" onClick={handleLoadMore} disabled={loadingMore}>
+            {loadingMore ? '加载中...' : '加载更多'}
+          </Button>
+        </div>
+      )}
+
       {selectedEmployee && (
         <>
           <TransferModal
@@ -1,6 +1,6 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Button } from "@/components/ui/button"
 import { UserPlus, UserMinus, UserCog } from 'lucide-react'
 import {
@@ -12,7 +12,7 @@ import {
   AlertDialogFooter,
 } from "@/components/ui/alert-dialog"
 import { toast } from "@/components/ui/use-toast"
-import { getPendingChanges, approveChange, rejectChange } from '@/lib/api'
+import { getPendingChanges, approveChange, rejectChange, subscribePendingChanges, PendingChangeEvent, PendingChangesSubscription } from '@/lib/api'
 import { PendingChange } from '@/lib/types'
 
 interface PendingChangesListProps {
@@ -26,24 +26,46 @@ export function PendingChangesList({ role, refreshKey, onChangeConfirmed }: Pend
   const [confirmDialogOpen, setConfirmDialogOpen] = useState(false)
   const [rejectDialogOpen, setRejectDialogOpen] = useState(false)
   const [selectedChange, setSelectedChange] = useState<PendingChange | null>(null)
-  const [refresh, setRefresh] = useState(0)
+  // 事件流要求重新加载名单（reset 事件）时 +1
+  const [feedGeneration, setFeedGeneration] = useState(0)
+  // 下一页的游标（null 表示已加载到最后一页）和已加载的最大变动ID
+  const nextCursor = useRef<string | null>(null)
+  const loadedUpTo = useRef(0)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
-    console.log('Component mounted, role:', role);
-    
+    let subscription: PendingChangesSubscription | null = null
+    let cancelled = false
+
+    // 收到推送后只增删对应的条目，不再重新拉取整个名单；重复收到同一事件不影响结果
+    const applyEvent = (event: PendingChangeEvent) => {
+      switch (event.event) {
+        case 'created':
+          // 还有没加载的页时，已加载范围之后的变动在滚动加载下一页时取到
+          if (nextCursor.current !== null && event.change.id > loadedUpTo.current) break
+          setPendingChanges(changes =>
+            changes.some(change => change.id === event.change.id) ? changes : [...changes, event.change])
+          break
+        case 'approved':
+        case 'rejected':
+          setPendingChanges(changes => changes.filter(change => change.id !== event.id))
+          break
+        case 'reset':
+          setFeedGeneration(generation => generation + 1)
+          break
+      }
+    }
+
     const fetchPendingChanges = async () => {
       try {
-        console.log('Fetching pending changes...');
         const response = await getPendingChanges();
-        console.log('Raw API response:', response);
-        
-        // 直接检查 response.changes 是否存在
-        if (response.changes) {
-          console.log('Setting pending changes:', response.changes);
-          setPendingChanges(response.changes);
-        } else {
-          console.error('API返回数据格式错误:', response);
-        }
+        if (cancelled) return
+        nextCursor.current = response.next_cursor
+        loadedUpTo.current = response.changes.length ? response.changes[response.changes.length - 1].id : 0
+        setPendingChanges(response.changes);
+        // 从读取名单之前的事件ID开始订阅，读取名单期间发生的变动也会推送过来
+        // 断线和连接到期由订阅自己用新令牌重连并补发事件
+        subscription = subscribePendingChanges(response.last_event_id, applyEvent)
       } catch (error) {
         console.error('获取待处理变更失败:', error);
         toast({
@@ -57,9 +79,38 @@ export function PendingChangesList({ role, refreshKey, onChangeConfirmed }: Pend
     fetchPendingChanges();
     
     return () => {
-      console.log('Component will unmount');
+      cancelled = true
+      subscription?.close()
     };
-  }, [role, refreshKey]);
+  }, [role, refreshKey, feedGeneration]);
+
+  // 滚动到列表底部时取下一页，追加到已加载的名单
+  const handleLoadMore = async () => {
+    if (nextCursor.current === null || loadingMore) return
+    setLoadingMore(true)
+    try {
+      const response = await getPendingChanges(nextCursor.current)
+      nextCursor.current = response.next_cursor
+      if (response.changes.length) {
+        loadedUpTo.current = response.changes[response.changes.length - 1].id
+      }
+      setPendingChanges(changes => {
+        const known = new Set(changes.map(change => change.id))
+        return [...changes, ...response.changes.filter(change => !known.has(change.id))]
+      })
+    } catch (error) {
+      console.error('获取待处理变更失败:', error);
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  const handleScroll = (e: React.UIEvent<HTMLDivElement>) => {
+    const target = e.currentTarget
+    if (target.scrollTop + target.clientHeight >= target.scrollHeight - 40) {
+      handleLoadMore()
+    }
+  }
 
   const handleConfirm = async () => {
     if (!selectedChange) return
@@ -132,7 +183,7 @@ export function PendingChangesList({ role, refreshKey, onChangeConfirmed }: Pend
 
   return (
     <div className="space-y-2">
-      <div className="max-h-[400px] overflow-y-auto">
+      <div className="max-h-[400px] overflow-y-auto" onScroll={handleScroll}>
         {pendingChanges.length === 0 ? (
           <div className="p-4 text-center text-gray-500">暂无待处理变更</div>
         ) : (
@@ -156,6 +207,7 @@ export function PendingChangesList({ role, refreshKey, onChangeConfirmed }: Pend
             </div>
           ))
         )}
+        {loadingMore && <div className="p-2 text-center text-sm text-gray-500">加载中...</div>}
       </div>
 
       {/* 确认对话框 */}
@@ -9,6 +9,19 @@ const getToken = (): string | null => {
   return localStorage.getItem('token')
 }
 
+// 写请求的响应头：在此时间戳（秒）之前后端的只读接口读主库，之后的请求原样带回（见 backend/routing.py）
+const PRIMARY_UNTIL_HEADER = 'X-DB-Primary-Until'
+
+// 保存在 sessionStorage 中，刷新页面后仍然带回
+const getPrimaryUntil = (): string | null => {
+  const value = sessionStorage.getItem(PRIMARY_UNTIL_HEADER)
+  if (value && Number(value) * 1000 > Date.now()) {
+    return value
+  }
+  sessionStorage.removeItem(PRIMARY_UNTIL_HEADER)
+  return null
+}
+
 // 通用的认证请求函数
 const fetchWithAuth = async (url: string, options: RequestInit = {}) => {
   const token = getToken()
@@ -16,9 +29,11 @@ const fetchWithAuth = async (url: string, options: RequestInit = {}) => {
     throw new Error('未登录')
   }
 
+  const primaryUntil = getPrimaryUntil()
   const headers = {
     'Authorization': `Bearer ${token}`,
     'Content-Type': 'application/json',
+    ...(primaryUntil ? { [PRIMARY_UNTIL_HEADER]: primaryUntil } : {}),
     ...options.headers
   }
 
@@ -27,6 +42,11 @@ const fetchWithAuth = async (url: string, options: RequestInit = {}) => {
     headers
   })
 
+  const wroteUntil = response.headers.get(PRIMARY_UNTIL_HEADER)
+  if (wroteUntil) {
+    sessionStorage.setItem(PRIMARY_UNTIL_HEADER, wroteUntil)
+  }
+
   if (response.status === 401) {
     localStorage.removeItem('token')
     localStorage.removeItem('user')
@@ -69,15 +89,134 @@ export async function getCurrentUser(token: string): Promise<ApiResponse<User>>
   return response.json()
 }
 
-export async function getActiveEmployees(): Promise<{ employees: Employee[] }> {
-  const response = await fetchWithAuth(`${API_BASE}/active-employees`)
+// 在岗员工列表是游标分页的（按 id 排序），每次只取一页；页面需要更多时带上 next_cursor 再取下一页，
+// 页面加载的工作量与已显示的条数有关，与总人数无关。
+// sync_seq 取第一页的值，之后用 getActiveEmployeeChanges 增量同步
+export async function getActiveEmployees(cursor?: string | null, limit = 200): Promise<{ employees: Employee[], next_cursor: string | null, sync_seq: number }> {
+  const params = new URLSearchParams({ limit: String(limit) })
+  if (cursor) {
+    params.set('cursor', cursor)
+  }
+  const response = await fetchWithAuth(`${API_BASE}/active-employees?${params}`)
   return response.json()
 }
 
-export async function getPendingChanges(): Promise<{ changes: PendingChange[] }> {
-  const response = await fetchWithAuth(`${API_BASE}/pending-changes`);
-  const data = await response.json();
-  return data; // 直接返回 { changes: [...] }
+// 增量同步：取回 since 之后新增或修改的员工（employees）和离开名单的员工ID（removed）
+export async function getActiveEmployeeChanges(since: number): Promise<{ employees: Employee[], removed: number[], sync_seq: number }> {
+  const employees: Employee[] = []
+  const removed: number[] = []
+  let cursor: string | null = null
+  let syncSeq: number | null = null
+  do {
+    const params = new URLSearchParams({ since: String(since), limit: '200' })
+    if (cursor) {
+      params.set('cursor', cursor)
+    }
+    const response = await fetchWithAuth(`${API_BASE}/active-employees?${params}`)
+    const data: { employees: Employee[], removed: number[], next_cursor: string | null, sync_seq: number } = await response.json()
+    employees.push(...data.employees)
+    removed.push(...data.removed)
+    syncSeq = syncSeq ?? data.sync_seq
+    cursor = data.next_cursor
+  } while (cursor)
+  return { employees, removed, sync_seq: syncSeq ?? since }
+}
+
+// 按姓名搜索员工（服务端按 完全匹配 > 前缀 > 包含 排序），只取第一页
+export async function searchEmployees(query: string, limit = 50): Promise<{ employees: Employee[], next_cursor: string | null }> {
+  const params = new URLSearchParams({ q: query, limit: String(limit), active: 'true' })
+  const response = await fetchWithAuth(`${API_BASE}/employees/search?${params}`)
+  return response.json()
+}
+
+// 待确认变动名单同样是游标分页的（按变动ID排序），每次只取一页，滚动到底部时带上 next_cursor 取下一页
+// 第一页的 last_event_id（读取名单之前最新的事件ID）用来订阅之后的变动事件
+export async function getPendingChanges(cursor?: string | null, limit = 50): Promise<{ changes: PendingChange[], next_cursor: string | null, last_event_id: number }> {
+  const params = new URLSearchParams({ limit: String(limit) })
+  if (cursor) {
+    params.set('cursor', cursor)
+  }
+  const response = await fetchWithAuth(`${API_BASE}/pending-changes?${params}`)
+  return response.json()
+}
+
+export type PendingChangeEvent =
+  | { event: 'created', change: PendingChange }
+  | { event: 'approved' | 'rejected', id: number, status: string }
+  | { event: 'reset' }
+
+// 订阅待确认变动的事件流（Server-Sent Events），从 lastEventId 之后的事件开始
+// EventSource 不能设置请求头，URL 会出现在访问日志中，所以每次连接前先用请求头换一个短期的事件流令牌放在查询参数 jwt 中。
+// 服务端每个连接最长几分钟（事件流令牌此时已过期，浏览器自带的重连会被拒绝），
+// 连接结束或出错时关闭它，稍后用新令牌带上最后收到的事件ID重新连接，服务端补发断线期间的事件
+const STREAM_RETRY_MS = 3000
+
+export interface PendingChangesSubscription {
+  close: () => void
+}
+
+async function getStreamToken(): Promise<string> {
+  const response = await fetchWithAuth(`${API_BASE}/pending-changes/events/token`, { method: 'POST' })
+  if (!response.ok) {
+    throw new Error('获取事件流令牌失败')
+  }
+  const data: { token: string } = await response.json()
+  return data.token
+}
+
+export function subscribePendingChanges(lastEventId: number, onEvent: (event: PendingChangeEvent) => void): PendingChangesSubscription {
+  let source: EventSource | null = null
+  let retryTimer: ReturnType<typeof setTimeout> | null = null
+  let closed = false
+
+  const track = (e: Event) => {
+    const id = Number((e as MessageEvent).lastEventId)
+    if (id) lastEventId = id
+  }
+
+  const reconnect = () => {
+    source?.close()
+    source = null
+    if (!closed) retryTimer = setTimeout(connect, STREAM_RETRY_MS)
+  }
+
+  async function connect() {
+    let token: string
+    try {
+      token = await getStreamToken()
+    } catch {
+      reconnect()
+      return
+    }
+    if (closed) return
+    const params = new URLSearchParams({ jwt: token, last_event_id: String(lastEventId) })
+    source = new EventSource(`${API_BASE}/pending-changes/events?${params}`)
+    source.addEventListener('created', (e) => {
+      track(e)
+      onEvent({ event: 'created', change: JSON.parse((e as MessageEvent).data) })
+    })
+    for (const name of ['approved', 'rejected'] as const) {
+      source.addEventListener(name, (e) => {
+        track(e)
+        const data: { id: number, status: string } = JSON.parse((e as MessageEvent).data)
+        onEvent({ event: name, id: data.id, status: data.status })
+      })
+    }
+    source.addEventListener('reset', (e) => {
+      track(e)
+      onEvent({ event: 'reset' })
+    })
+    source.onerror = reconnect
+  }
+
+  connect()
+  return {
+    close: () => {
+      closed = true
+      if (retryTimer) clearTimeout(retryTimer)
+      source?.close()
+    },
+  }
 }
 
 export async function addEmployee(name: string, position: string, effectiveDate: string): Promise<ApiResponse<Employee>> {
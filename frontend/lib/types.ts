@@ -18,6 +18,7 @@ export interface Employee {
   project_id: number | null
   project_name: string | null
   creator_id: number
+  updated_seq: number
 }
 
 // 变动申请接口需要匹配后端返回